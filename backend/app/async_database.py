@@ -0,0 +1,212 @@
+"""Async PocketBase data-access layer.
+
+Mirrors the record API of the synchronous ``pocketbase`` SDK used through
+``app.database.pb`` (``collection(name).get_one/get_full_list/...``) but runs
+on a pooled ``httpx.AsyncClient`` so database calls never block the event
+loop. Responses are decoded into the SDK's ``Record`` model and errors are
+raised as ``ClientResponseError``, so ``record_to_dict`` and existing error
+handling behave exactly as with the sync client.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+from urllib.parse import quote
+
+import httpx
+from pocketbase.models.record import Record  # type: ignore[import-untyped]
+from pocketbase.utils import ClientResponseError  # type: ignore[import-untyped]
+
+from app.config import settings
+
+
+class AsyncRecordService:
+    """Async CRUD for one PocketBase collection."""
+
+    def __init__(self, client: "AsyncPocketBase", collection: str) -> None:
+        self.client = client
+        self.base_path = f"/api/collections/{quote(collection)}/records"
+
+    async def get_list(
+        self,
+        page: int = 1,
+        per_page: int = 30,
+        query_params: Optional[dict[str, Any]] = None,
+    ) -> dict:
+        """Return one raw page: {"page", "perPage", "totalItems", "items": [Record]}."""
+        params = dict(query_params or {})
+        params.update({"page": page, "perPage": per_page})
+        data = await self.client.send(self.base_path, params=params)
+        data["items"] = [Record(item) for item in data.get("items") or []]
+        return data
+
+    async def get_full_list(
+        self,
+        batch: int = 500,
+        query_params: Optional[dict[str, Any]] = None,
+    ) -> list[Record]:
+        params = dict(query_params or {})
+        params["skipTotal"] = 1
+        result: list[Record] = []
+        page = 1
+        while True:
+            data = await self.get_list(page, batch, params)
+            result += data["items"]
+            if len(data["items"]) < batch:
+                return result
+            page += 1
+
+    async def get_one(
+        self, record_id: str, query_params: Optional[dict[str, Any]] = None
+    ) -> Record:
+        return Record(
+            await self.client.send(f"{self.base_path}/{quote(record_id)}", params=query_params)
+        )
+
+    async def get_first_list_item(
+        self, filter: str, query_params: Optional[dict[str, Any]] = None
+    ) -> Record:
+        """Return the first record matching ``filter``; raises 404 if none (like the SDK)."""
+        params = dict(query_params or {})
+        params.update({"filter": filter, "skipTotal": 1})
+        data = await self.get_list(1, 1, params)
+        if not data["items"]:
+            raise ClientResponseError("The requested resource wasn't found.", status=404)
+        return data["items"][0]
+
+    async def create(
+        self, body: Optional[dict[str, Any]] = None, query_params: Optional[dict[str, Any]] = None
+    ) -> Record:
+        return Record(
+            await self.client.send(self.base_path, method="POST", params=query_params, json=body)
+        )
+
+    async def create_many(self, bodies: list[dict[str, Any]]) -> list[Record]:
+        """Create several records in one ``/api/batch`` request (all or nothing).
+
+        Raises ClientResponseError if the batch API is disabled (403/404) or
+        any create fails, in which case none of the records are created.
+        """
+        if not bodies:
+            return []
+        results = await self.client.send(
+            "/api/batch",
+            method="POST",
+            json={
+                "requests": [
+                    {"method": "POST", "url": self.base_path, "body": body} for body in bodies
+                ]
+            },
+        )
+        return [Record(result.get("body") or {}) for result in results or []]
+
+    async def update(
+        self,
+        record_id: str,
+        body: Optional[dict[str, Any]] = None,
+        query_params: Optional[dict[str, Any]] = None,
+    ) -> Record:
+        return Record(
+            await self.client.send(
+                f"{self.base_path}/{quote(record_id)}",
+                method="PATCH",
+                params=query_params,
+                json=body,
+            )
+        )
+
+    async def delete(self, record_id: str) -> None:
+        await self.client.send(f"{self.base_path}/{quote(record_id)}", method="DELETE")
+
+
+class AsyncPocketBase:
+    """Minimal async PocketBase client over a pooled, keep-alive httpx client."""
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 20,
+        timeout: float = 30.0,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        # HTTP/1.1: over plain http httpx never negotiates HTTP/2, so
+        # concurrency comes from the pool size alone.
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+        self._collections: dict[str, AsyncRecordService] = {}
+
+    def collection(self, name: str) -> AsyncRecordService:
+        if name not in self._collections:
+            self._collections[name] = AsyncRecordService(self, name)
+        return self._collections[name]
+
+    async def send(
+        self,
+        path: str,
+        *,
+        method: str = "GET",
+        params: Optional[dict[str, Any]] = None,
+        json: Any = None,
+    ) -> Any:
+        """Send a request and return decoded JSON, raising ClientResponseError on failure."""
+        try:
+            response = await self.http.request(method, path, params=params, json=json)
+        except Exception as e:
+            raise ClientResponseError(
+                f"General request error. Original error: {e}", original_error=e
+            )
+        try:
+            data = response.json()
+        except Exception:
+            data = None
+        if response.status_code >= 400:
+            raise ClientResponseError(
+                f"Response error. Status code:{response.status_code}",
+                url=str(response.url),
+                status=response.status_code,
+                data=data,
+            )
+        return data
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+
+_apb: Optional[AsyncPocketBase] = None
+
+
+def get_apb() -> AsyncPocketBase:
+    """Lazy-init the shared async PocketBase client."""
+    global _apb
+    if _apb is None:
+        _apb = AsyncPocketBase(
+            settings.POCKETBASE_URL,
+            max_connections=settings.POCKETBASE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.POCKETBASE_MAX_KEEPALIVE,
+            timeout=settings.POCKETBASE_TIMEOUT,
+        )
+    return _apb
+
+
+async def close_apb() -> None:
+    """Close the shared client's connection pool (called on app shutdown)."""
+    global _apb
+    if _apb is not None:
+        await _apb.aclose()
+        _apb = None
+
+
+# Module-level proxy for convenience, mirroring ``app.database.pb``.
+class _AsyncPBProxy:
+    def __getattr__(self, name):
+        return getattr(get_apb(), name)
+
+
+apb: AsyncPocketBase = _AsyncPBProxy()  # type: ignore[assignment]
@@ -1,4 +1,5 @@
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,8 +7,81 @@ load_dotenv()
 
 class Settings:
     POCKETBASE_URL: str = os.getenv("POCKETBASE_URL", "http://127.0.0.1:8090")
+    # Async PocketBase connection pool. PocketBase is reached over plain HTTP/1.1,
+    # so each in-flight request needs its own connection; keeping them all
+    # alive saves reconnecting after every burst.
+    POCKETBASE_MAX_CONNECTIONS: int = int(os.getenv("POCKETBASE_MAX_CONNECTIONS", "20"))
+    POCKETBASE_MAX_KEEPALIVE: int = int(os.getenv("POCKETBASE_MAX_KEEPALIVE", str(POCKETBASE_MAX_CONNECTIONS)))
+    # Separate pool for realtime subscriptions; each open status stream of a
+    # run in another process holds one connection
+    POCKETBASE_REALTIME_MAX_STREAMS: int = int(os.getenv("POCKETBASE_REALTIME_MAX_STREAMS", "50"))
+    POCKETBASE_TIMEOUT: float = float(os.getenv("POCKETBASE_TIMEOUT", "30"))
     ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
+    # Shared AsyncAnthropic connection pool
+    ANTHROPIC_MAX_CONNECTIONS: int = int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", "20"))
+    ANTHROPIC_MAX_KEEPALIVE: int = int(os.getenv("ANTHROPIC_MAX_KEEPALIVE", "10"))
+    ANTHROPIC_TIMEOUT: float = float(os.getenv("ANTHROPIC_TIMEOUT", "600"))
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+    # Max Gemini calls in flight at once across all pipeline runs (split
+    # across processes, see PIPELINE_WORKER_PROCESSES)
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    # Retries for transient LLM errors (429/5xx): exponential backoff with jitter
+    LLM_RETRY_MAX_ATTEMPTS: int = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "4"))
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+    LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "30.0"))
+    # Provider rate limits (requests / tokens per minute; 0 disables), for the
+    # whole deployment: split across processes like LLM_MAX_CONCURRENCY. Per-model
+    # overrides: LLM_RATE_LIMITS='{"gemini:models/gemini-2.5-flash": {"rpm": 1000, "tpm": 1000000}}'
+    GEMINI_RPM: int = int(os.getenv("GEMINI_RPM", "1000"))
+    GEMINI_TPM: int = int(os.getenv("GEMINI_TPM", "1000000"))
+    ANTHROPIC_RPM: int = int(os.getenv("ANTHROPIC_RPM", "50"))
+    ANTHROPIC_TPM: int = int(os.getenv("ANTHROPIC_TPM", "50000"))
+    LLM_RATE_LIMITS: str = os.getenv("LLM_RATE_LIMITS", "")
+    # Min seconds between partial-output checkpoints while a section streams
+    STREAM_CHECKPOINT_SECONDS: float = float(os.getenv("STREAM_CHECKPOINT_SECONDS", "2.0"))
+    # Max sections executing at once across all pipeline runs (split across processes)
+    PIPELINE_MAX_CONCURRENCY: int = int(os.getenv("PIPELINE_MAX_CONCURRENCY", "6"))
+    # Durable queue of pipeline runs, shared by the API and worker processes
+    PIPELINE_QUEUE_PATH: str = os.getenv(
+        "PIPELINE_QUEUE_PATH", str(Path(__file__).resolve().parents[1] / ".cache" / "pipeline_queue.sqlite3")
+    )
+    # Runs executed inside the API process (0: only `python -m app.worker` runs them)
+    PIPELINE_QUEUE_WORKERS: int = int(os.getenv("PIPELINE_QUEUE_WORKERS", "0"))
+    # Worker processes start.sh launches. The LLM rate limits and the LLM and
+    # section concurrency caps are enforced in memory per process, so the API
+    # and each worker process take an equal share of them (see process_share);
+    # set this to the number actually running when starting workers by hand.
+    PIPELINE_WORKER_PROCESSES: int = int(os.getenv("PIPELINE_WORKER_PROCESSES", "2"))
+    # Runs executed at once by each worker process
+    PIPELINE_WORKER_CONCURRENCY: int = int(os.getenv("PIPELINE_WORKER_CONCURRENCY", "2"))
+    # A worker that misses heartbeats for this long loses its runs to others
+    PIPELINE_LEASE_SECONDS: float = float(os.getenv("PIPELINE_LEASE_SECONDS", "30"))
+    # Claims of a run (first run plus reclaims after lost leases) before it is marked failed
+    PIPELINE_MAX_ATTEMPTS: int = int(os.getenv("PIPELINE_MAX_ATTEMPTS", "3"))
+    # Bulk job import: items fetched/extracted at once, and jobs per batch insert
+    BULK_IMPORT_CONCURRENCY: int = int(os.getenv("BULK_IMPORT_CONCURRENCY", "8"))
+    BULK_IMPORT_BATCH_SIZE: int = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "25"))
+    # Local full-text index of jobs and sections for /api/search (set "" to disable)
+    SEARCH_INDEX_PATH: str = os.getenv(
+        "SEARCH_INDEX_PATH", str(Path(__file__).resolve().parents[1] / ".cache" / "search_index.sqlite3")
+    )
+    # Seconds between checks for edited reference files (0: load once at startup)
+    REFERENCE_RELOAD_SECONDS: float = float(os.getenv("REFERENCE_RELOAD_SECONDS", "2.0"))
+    # Persistent LLM response cache (set LLM_CACHE_PATH="" to disable)
+    LLM_CACHE_PATH: str = os.getenv(
+        "LLM_CACHE_PATH", str(Path(__file__).resolve().parents[1] / ".cache" / "llm_responses.sqlite3")
+    )
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+    # Server-side Gemini context caching for shared reference bundles
+    GEMINI_CONTEXT_CACHE_ENABLED: bool = os.getenv("GEMINI_CONTEXT_CACHE_ENABLED", "true").lower() == "true"
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS: int = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+
+    def process_share(self, total: int) -> int:
+        """This process's share of a deployment-wide limit (0 stays 0: unlimited)."""
+        if total <= 0:
+            return total
+        return max(1, total // (self.PIPELINE_WORKER_PROCESSES + 1))
 
 
 settings = Settings()
@@ -1,10 +1,17 @@
+import asyncio
+import logging
+import threading
 from functools import lru_cache
 from collections.abc import Mapping
+from typing import Optional
 
 from pocketbase import PocketBase
 
+from app.async_database import apb
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 @lru_cache(maxsize=1)
 def get_pb() -> PocketBase:
@@ -74,26 +81,248 @@ def record_to_dict(record) -> dict:
     return data
 
 
+# ── Section id index ─────────────────────────────────────────────
+
+
+class SectionIdIndex:
+    """Process-wide (job_id, section_key) → record id index.
+
+    A job's ids are loaded lazily with one ``get_full_list`` the first time
+    any of its sections is looked up, kept current when sections are created,
+    and invalidated when a job is deleted or a write reveals the index is
+    stale. This lets steady-state section writes skip the lookup query.
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[str, dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str, section_key: str) -> Optional[str]:
+        """Return the record id for a section, or None if it doesn't exist."""
+        return self.for_job(job_id).get(section_key)
+
+    async def aget(self, job_id: str, section_key: str) -> Optional[str]:
+        """Async variant of ``get`` that loads through the async client.
+
+        A miss on an already-loaded job reloads it once, since the section
+        may have been created since by another process (a pipeline worker).
+        """
+        with self._lock:
+            loaded = job_id in self._ids
+        record_id = (await self.afor_job(job_id)).get(section_key)
+        if record_id is None and loaded:
+            self.invalidate(job_id)
+            record_id = (await self.afor_job(job_id)).get(section_key)
+        return record_id
+
+    def for_job(self, job_id: str) -> dict[str, str]:
+        """Return {section_key: record_id} for a job, loading it if needed."""
+        with self._lock:
+            ids = self._ids.get(job_id)
+        if ids is not None:
+            return ids
+        records = pb.collection("sections").get_full_list(
+            query_params=self._query_params(job_id)
+        )
+        return self._merge(job_id, records)
+
+    async def afor_job(self, job_id: str) -> dict[str, str]:
+        with self._lock:
+            ids = self._ids.get(job_id)
+        if ids is not None:
+            return ids
+        records = await apb.collection("sections").get_full_list(
+            query_params=self._query_params(job_id)
+        )
+        return self._merge(job_id, records)
+
+    def _query_params(self, job_id: str) -> dict:
+        return {
+            "filter": f"job = '{sanitize_pb_value(job_id)}'",
+            "fields": "id,section_key",
+        }
+
+    def _merge(self, job_id: str, records) -> dict[str, str]:
+        loaded = {}
+        for r in records:
+            d = record_to_dict(r)
+            loaded[d["section_key"]] = d["id"]
+        with self._lock:
+            # Keep entries added by concurrent creates while we were loading
+            ids = self._ids.setdefault(job_id, {})
+            for key, record_id in loaded.items():
+                ids.setdefault(key, record_id)
+            return ids
+
+    def set(self, job_id: str, section_key: str, record_id: str) -> None:
+        with self._lock:
+            if job_id in self._ids:
+                self._ids[job_id][section_key] = record_id
+
+    def invalidate(self, job_id: str) -> None:
+        with self._lock:
+            self._ids.pop(job_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+
+section_ids = SectionIdIndex()
+
+
 def upsert_section(job_id: str, section_key: str, data: dict) -> dict:
-    """Upsert a section by (job, section_key). Returns the record as a dict."""
+    """Upsert a section by (job, section_key). Returns the record as a dict.
+
+    The record id comes from ``section_ids``, so an existing section costs a
+    single update request. If the index turns out to be stale (the record was
+    deleted, or created by another process) it is reloaded and the write
+    retried once.
+    """
     from pocketbase.utils import ClientResponseError  # type: ignore[import-untyped]
 
-    safe_job = sanitize_pb_value(job_id)
-    safe_key = sanitize_pb_value(section_key)
     try:
-        existing = pb.collection("sections").get_first_list_item(
-            f"job = '{safe_job}' && section_key = '{safe_key}'"
-        )
-        record = pb.collection("sections").update(existing.id, data)
-    except (ClientResponseError, Exception) as exc:
-        # Only treat "not found" as a create trigger
-        is_not_found = (
-            isinstance(exc, ClientResponseError) and exc.status == 404
-        ) or "not found" in str(exc).lower()
-        if not is_not_found:
+        return _write_section(job_id, section_key, data)
+    except ClientResponseError as exc:
+        # 404: indexed record is gone; 400: unique (job, section_key)
+        # violation because another process created it.
+        if exc.status not in (400, 404):
             raise
-        # Record doesn't exist — create it
-        data["job"] = job_id
-        data["section_key"] = section_key
-        record = pb.collection("sections").create(data)
+        section_ids.invalidate(job_id)
+        return _write_section(job_id, section_key, data)
+
+
+def _write_section(job_id: str, section_key: str, data: dict) -> dict:
+    record_id = section_ids.get(job_id, section_key)
+    if record_id:
+        record = pb.collection("sections").update(record_id, data)
+    else:
+        record = pb.collection("sections").create(
+            {**data, "job": job_id, "section_key": section_key}
+        )
+        section_ids.set(job_id, section_key, record.id)
     return record_to_dict(record)
+
+
+# ── Write-behind buffer for section upserts ──────────────────────
+
+
+class SectionWriteBuffer:
+    """Coalesce section upserts per (job, section_key) and flush them in batches.
+
+    ``stage`` merges the new fields into any pending write for the same
+    section, so a ``running`` status followed by a ``complete`` result before
+    the next flush costs a single write. Pending writes are flushed after
+    ``flush_interval`` seconds by a background task, or immediately via
+    ``flush``. Flushing resolves existing record ids from ``section_ids`` and
+    sends every write in one PocketBase batch request, falling back to
+    per-section ``upsert_section`` when the batch API is unavailable.
+
+    Flushes run one at a time, taking their entries only once they hold the
+    lock, so writes for a section land in the order they were staged.
+    """
+
+    def __init__(self, flush_interval: float = 0.5, max_batch: int = 50) -> None:
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: dict[tuple[str, str], dict] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batch_supported = True
+
+    def stage(self, job_id: str, section_key: str, data: dict) -> None:
+        """Queue a section upsert, merging with any pending write for the same key."""
+        self._pending.setdefault((job_id, section_key), {}).update(data)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (sync caller) — write through immediately.
+            self._write(self._take(job_id))
+            return
+        task = self._flush_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._flush_task = loop.create_task(self._flush_later())
+
+    def pending(self, job_id: Optional[str] = None) -> dict[tuple[str, str], dict]:
+        return {
+            k: v for k, v in self._pending.items() if job_id is None or k[0] == job_id
+        }
+
+    async def flush(self, job_id: Optional[str] = None) -> None:
+        """Persist pending writes (for one job, or all) before returning."""
+        async with self._get_flush_lock():
+            entries = self._take(job_id)
+            if not entries:
+                return
+            try:
+                await asyncio.to_thread(self._write, entries)
+            except Exception:
+                logger.exception("Failed to flush %d section writes", len(entries))
+                # Keep the writes for the next flush; newer staged fields win.
+                for k, data in entries.items():
+                    self._pending[k] = {**data, **self._pending.get(k, {})}
+
+    def clear(self) -> None:
+        self._pending.clear()
+        task, self._flush_task = self._flush_task, None
+        if task is not None and not task.done() and not task.get_loop().is_closed():
+            task.cancel()
+
+    async def _flush_later(self) -> None:
+        # stage() doesn't schedule another flush while this task is alive, so
+        # keep going until nothing staged during a flush is left behind.
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            if not self._pending:
+                return
+
+    def _get_flush_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._flush_lock is None or self._flush_lock_loop is not loop:
+            self._flush_lock = asyncio.Lock()
+            self._flush_lock_loop = loop
+        return self._flush_lock
+
+    def _take(self, job_id: Optional[str]) -> dict[tuple[str, str], dict]:
+        entries = self.pending(job_id)
+        for k in entries:
+            del self._pending[k]
+        return entries
+
+    def _write(self, entries: dict[tuple[str, str], dict]) -> None:
+        if self._batch_supported:
+            try:
+                self._write_batch(entries)
+                return
+            except Exception as exc:
+                status = getattr(exc, "status", None)
+                if status in (403, 404):
+                    # Batch API disabled or not supported by this PocketBase.
+                    self._batch_supported = False
+                logger.warning("Batch section write failed, retrying per section: %s", exc)
+        for (job_id, section_key), data in entries.items():
+            upsert_section(job_id, section_key, dict(data))
+
+    def _write_batch(self, entries: dict[tuple[str, str], dict]) -> None:
+        items = list(entries.items())
+        for i in range(0, len(items), self.max_batch):
+            batch = pb.create_batch()
+            for (job_id, section_key), data in items[i:i + self.max_batch]:
+                record_id = section_ids.get(job_id, section_key)
+                if record_id:
+                    batch.collection("sections").update(record_id, data)
+                else:
+                    batch.collection("sections").create(
+                        {**data, "job": job_id, "section_key": section_key}
+                    )
+            results = batch.send()
+            # Record ids of newly created sections so later writes are plain updates
+            for result in results if isinstance(results, list) else []:
+                body = result.get("body") if isinstance(result, dict) else None
+                if isinstance(body, dict) and body.get("id") and body.get("section_key"):
+                    section_ids.set(body.get("job", ""), body["section_key"], body["id"])
+
+
+section_writes = SectionWriteBuffer()
@@ -1,15 +1,13 @@
 """JD extraction utility using Claude Haiku 4."""
 from __future__ import annotations
 
-import asyncio
 import re
 
-import anthropic
 from pydantic import BaseModel, ValidationError
 
-from app.config import settings
+from app.services.provider_clients import get_anthropic
+from app.services.rate_limiter import anthropic_usage_tokens, estimate_tokens, rate_limiter
 
-client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
 MODEL = "claude-haiku-4-5"
 
 
@@ -63,14 +61,16 @@ Rules:
 - Strings only (no null/arrays/objects)"""
 
     try:
-        response = await asyncio.to_thread(
-            client.messages.create,
-            model=MODEL,
-            max_tokens=500,
-            temperature=0,
-            system=system_prompt,
-            messages=[{"role": "user", "content": jd_text}],
-        )
+        estimate = estimate_tokens(system_prompt, jd_text, max_output=500)
+        async with rate_limiter.limit("anthropic", MODEL, estimate, max_output=500) as usage:
+            response = await get_anthropic().messages.create(
+                model=MODEL,
+                max_tokens=500,
+                temperature=0,
+                system=system_prompt,
+                messages=[{"role": "user", "content": jd_text}],
+            )
+            usage.record(anthropic_usage_tokens(response))
 
         # Extract text from response
         text_content = ""
@@ -1,9 +1,54 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import chat, jobs, pipeline, sections
+from app.async_database import close_apb
+from app.database import section_writes
+from app.routers import chat, jobs, pipeline, search, sections
+from app.services.job_queue import get_job_queue, stop_job_queue
+from app.services.provider_clients import close_clients, start_clients
+from app.services.realtime import close_realtime
+from app.services.reference_loader import get_reference_store
+from app.services.search_index import SearchIndex, get_search_index, reindex_all
+
+logger = logging.getLogger(__name__)
+
+
+async def _build_search_index(index: SearchIndex) -> None:
+    """Build the index in the background on first start (or a deleted file)."""
+    try:
+        if await asyncio.to_thread(index.count) == 0:
+            await reindex_all(index)
+    except Exception:
+        logger.warning("Building the search index failed", exc_info=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_clients()
+    await get_reference_store().start()
+    await get_job_queue().start()
+    index = get_search_index()
+    build = None
+    if index is not None:
+        build = asyncio.create_task(_build_search_index(index))
+    yield
+    if build is not None:
+        build.cancel()
+    # Interrupted runs stay queued and resume on the next start
+    await stop_job_queue()
+    await get_reference_store().stop()
+    # Persist any section writes still buffered at shutdown
+    await section_writes.flush()
+    await close_apb()
+    await close_realtime()
+    await close_clients()
+
 
-app = FastAPI(title="AppV2 Pipeline API")
+app = FastAPI(title="AppV2 Pipeline API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +63,7 @@ app.include_router(pipeline.router)
 app.include_router(sections.router)
 app.include_router(sections.section_definitions_router)
 app.include_router(chat.router)
+app.include_router(search.router)
 
 
 @app.get("/")
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date, datetime
 from typing import Optional
 
-from pydantic import BaseModel, field_validator, model_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 # ── Pipeline stages ──────────────────────────────────────────────
@@ -22,7 +22,9 @@ VERDICTS = ["STRONG PURSUE", "PURSUE", "PASS", "HARD PASS"]
 
 # ── Jobs ─────────────────────────────────────────────────────────
 
-class JobCreate(BaseModel):
+class JobBase(BaseModel):
+    """Fields shared by single and bulk job creation."""
+
     jd_url: str
     jd_text: Optional[str] = None
     jd_fetch_status: str = "not_attempted"
@@ -47,6 +49,8 @@ class JobCreate(BaseModel):
             raise ValueError("jd_text must be at least 50 characters if provided")
         return v.strip()
 
+
+class JobCreate(JobBase):
     @model_validator(mode="after")
     def check_text_or_fetch_status(self):
         """Require either jd_text OR successful fetch status."""
@@ -57,6 +61,15 @@ class JobCreate(BaseModel):
         return self
 
 
+class JobBulkItem(JobBase):
+    """One posting in a bulk import; the JD is fetched when no text is given."""
+
+
+class JobBulkCreate(BaseModel):
+    items: list[JobBulkItem] = Field(min_length=1, max_length=500)
+    analyze: bool = True  # queue analysis for each job whose extraction succeeds
+
+
 class JobStageUpdate(BaseModel):
     stage: str
 
@@ -183,14 +196,16 @@ class SectionResponse(BaseModel):
     content_md: Optional[str] = None
     model: Optional[str] = None
     tokens_used: Optional[int] = None
+    prompt_tokens: Optional[int] = None  # input tokens of the generating call
     generation_time_ms: Optional[int] = None
+    input_fingerprint: Optional[str] = None  # hash of the inputs content_md was generated from
     error_message: Optional[str] = None
     is_locked: bool
     created: datetime
     updated: datetime
 
     @field_validator(
-        "content_md", "model", "error_message", mode="before"
+        "content_md", "model", "input_fingerprint", "error_message", mode="before"
     )
     @classmethod
     def empty_str_to_none_section(cls, v):
@@ -198,7 +213,7 @@ class SectionResponse(BaseModel):
             return None
         return v
 
-    @field_validator("tokens_used", "generation_time_ms", mode="before")
+    @field_validator("tokens_used", "prompt_tokens", "generation_time_ms", mode="before")
     @classmethod
     def empty_str_to_none_int(cls, v):
         if v == "":
@@ -229,11 +244,28 @@ class SectionDefinitionResponse(BaseModel):
 class PipelineEvent(BaseModel):
     """SSE event sent during pipeline execution."""
     section_key: str
-    status: str  # running | complete | failed
-    content_md: Optional[str] = None
+    status: str  # running | delta | complete | failed | skipped
+    content_md: Optional[str] = None  # full output on complete; next chunk on delta
     error_message: Optional[str] = None
 
 
+# ── Search ───────────────────────────────────────────────────────
+
+class SearchResult(BaseModel):
+    job_id: str
+    company: str
+    role: str
+    section_key: Optional[str] = None  # None when the match is in the job's JD
+    snippet: str  # matched terms wrapped in <mark></mark>
+    score: float  # higher is better
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: list[SearchResult]
+    took_ms: float
+
+
 # ── Chat ─────────────────────────────────────────────────────────
 
 class ChatMessage(BaseModel):
@@ -4,11 +4,11 @@ from __future__ import annotations
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 
-import anthropic
-
-from app.config import settings
-from app.database import pb, record_to_dict, sanitize_pb_value
+from app.async_database import apb
+from app.database import record_to_dict, sanitize_pb_value
 from app.models import ChatRequest
+from app.services.provider_clients import get_anthropic
+from app.services.rate_limiter import anthropic_usage_tokens, estimate_tokens, rate_limiter
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
@@ -20,13 +20,13 @@ async def chat(job_id: str, body: ChatRequest):
     """Chat with all completed sections as context. Streams the response via SSE."""
     # Load job
     try:
-        job_record = pb.collection("jobs").get_one(job_id)
+        job_record = await apb.collection("jobs").get_one(job_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Job not found")
     job = record_to_dict(job_record)
 
     # Load all completed sections as context
-    sections = pb.collection("sections").get_full_list(
+    sections = await apb.collection("sections").get_full_list(
         query_params={
             "filter": f"job = '{sanitize_pb_value(job_id)}' && status = 'complete'",
             "sort": "created",
@@ -65,18 +65,25 @@ Guidelines:
     ]
     messages.append({"role": "user", "content": body.message})
 
-    async_client = anthropic.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+    async_client = get_anthropic()
+
+    model = "claude-sonnet-4-20250514"
+    estimate = estimate_tokens(
+        system_prompt, *(m["content"] for m in messages), max_output=4000
+    )
 
     async def stream_response():
-        async with async_client.messages.stream(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4000,
-            system=system_prompt,
-            messages=messages,
-        ) as stream:
-            async for text in stream.text_stream:
-                # SSE format: each chunk as a data event
-                yield f"data: {text}\n\n"
+        async with rate_limiter.limit("anthropic", model, estimate, max_output=4000) as usage:
+            async with async_client.messages.stream(
+                model=model,
+                max_tokens=4000,
+                system=system_prompt,
+                messages=messages,
+            ) as stream:
+                async for text in stream.text_stream:
+                    # SSE format: each chunk as a data event
+                    yield f"data: {text}\n\n"
+                usage.record(anthropic_usage_tokens(await stream.get_final_message()))
         yield "data: [DONE]\n\n"
 
     return StreamingResponse(
@@ -2,16 +2,19 @@
 
 from __future__ import annotations
 
-import asyncio
-import re
+import hashlib
+import json
 import time
 from datetime import date
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from app.database import pb, record_to_dict, sanitize_pb_value
+from app.async_database import apb
+from app.database import record_to_dict, sanitize_pb_value, section_ids
 from app.extraction import extract_company_role
 from app.models import (
+    JobBulkCreate,
     JobCreate,
     JobDetailResponse,
     JobFetchRequest,
@@ -25,11 +28,22 @@ from app.models import (
     SectionHeadingResponse,
     SectionResponse,
 )
+from app.services import search_index
 from app.services.jd_fetcher import analyze_jd_text, fetch_jd_from_url
-from app.services.pipeline_executor import run_pipeline
+from app.services.job_import import import_jobs, make_slug
+from app.services.job_queue import PRIORITY_BACKGROUND, get_job_queue
 
 router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 
+# Multi-KB text fields left out of job lists unless asked for
+LARGE_JOB_FIELDS = ("jd_text", "jd_cleaned")
+# Fields a JobResponse can't be built without
+REQUIRED_JOB_FIELDS = ("id", "company", "role", "date_added", "pipeline_stage", "created", "updated")
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+# Back-relation expand: a job's sections come back inside the job record
+SECTIONS_EXPAND = "sections_via_job"
+
 
 # ── POST /api/jobs/fetch-jd ──────────────────────────────────────
 
@@ -48,7 +62,7 @@ async def fetch_job_description(body: JobFetchRequest):
 
     # Check for duplicate URL
     try:
-        existing = pb.collection("jobs").get_first_list_item(
+        existing = await apb.collection("jobs").get_first_list_item(
             f"jd_url = '{sanitize_pb_value(body.jd_url)}'"
         )
         raise HTTPException(
@@ -99,13 +113,6 @@ async def analyze_text(body: JobTextAnalyzeRequest):
     )
 
 
-def _make_slug(company: str, role: str) -> str:
-    """Generate a URL-friendly job ID: company-role-YYYYMMDD."""
-    base = f"{company}-{role}-{date.today().isoformat()}"
-    slug = re.sub(r"[^a-z0-9]+", "-", base.lower()).strip("-")
-    return slug
-
-
 # ── POST /api/jobs ───────────────────────────────────────────────
 
 
@@ -113,7 +120,7 @@ def _make_slug(company: str, role: str) -> str:
 async def create_job(body: JobCreate):
     # Check for duplicate URL
     try:
-        existing = pb.collection("jobs").get_first_list_item(
+        existing = await apb.collection("jobs").get_first_list_item(
             f"jd_url = '{sanitize_pb_value(body.jd_url)}'"
         )
         raise HTTPException(
@@ -142,7 +149,7 @@ async def create_job(body: JobCreate):
         "pipeline_stage": "queue",
         "extraction_status": "pending" if body.jd_text else "failed",
     }
-    record = pb.collection("jobs").create(row)
+    record = await apb.collection("jobs").create(row)
     job_id = record.id
 
     # Run extraction inline only if we have jd_text
@@ -153,14 +160,14 @@ async def create_job(body: JobCreate):
             role = extracted.get("role", "Unknown")
 
             # Generate proper slug from extracted data
-            slug = _make_slug(company, role)
+            slug = make_slug(company, role)
 
             # Handle slug collision
             base_slug = slug
             counter = 2
             while True:
                 try:
-                    pb.collection("jobs").get_first_list_item(
+                    await apb.collection("jobs").get_first_list_item(
                         f"slug = '{sanitize_pb_value(slug)}'"
                     )
                     slug = f"{base_slug}-{counter}"
@@ -169,7 +176,7 @@ async def create_job(body: JobCreate):
                     break
 
             # Update job with extracted data
-            record = pb.collection("jobs").update(
+            record = await apb.collection("jobs").update(
                 job_id,
                 {
                     "company": company,
@@ -180,38 +187,73 @@ async def create_job(body: JobCreate):
             )
         except Exception:
             # Extraction failed, mark as failed but keep the job
-            pb.collection("jobs").update(job_id, {"extraction_status": "failed"})
-            record = pb.collection("jobs").get_one(job_id)
+            await apb.collection("jobs").update(job_id, {"extraction_status": "failed"})
+            record = await apb.collection("jobs").get_one(job_id)
 
     # Re-fetch to ensure all system fields (created/updated) and schema fields are populated.
-    record = pb.collection("jobs").get_one(job_id)
+    record = await apb.collection("jobs").get_one(job_id)
     job_data = record_to_dict(record)
+    await search_index.index_job(job_data)
 
-    # Auto-start analysis if extraction succeeded
+    # Auto-start analysis if extraction succeeded. The pipeline moves the
+    # stage from queue -> analyzed once a worker has run it.
     if job_data.get("extraction_status") == "complete" and body.jd_text:
-        asyncio.create_task(_trigger_analysis_async(job_data))
+        await get_job_queue().aenqueue(job_id, "analysis", priority=PRIORITY_BACKGROUND)
 
     return job_data
 
 
-async def _trigger_analysis_async(job_data: dict) -> None:
-    """Trigger analysis pipeline in the background after job creation."""
-    from app.models import JobResponse
+# ── POST /api/jobs/bulk ──────────────────────────────────────────
+
 
-    job = JobResponse(**job_data)
-    # Run the pipeline - it will update the stage from queue -> analyzing -> analyzed
-    async for _ in run_pipeline(job, "analysis"):
-        pass  # Consume the async generator
+@router.post("/bulk")
+async def bulk_create_jobs(body: JobBulkCreate):
+    """
+    Import many postings at once. Streams one SSE event per item stage
+    (see ``import_jobs``), then a summary with counts per final status.
+    """
+
+    async def event_stream():
+        counts: dict[str, int] = {}
+        async for event in import_jobs(body.items, analyze=body.analyze):
+            if event["status"] in ("created", "duplicate", "failed"):
+                counts[event["status"]] = counts.get(event["status"], 0) + 1
+            yield f"data: {json.dumps(event)}\n\n"
+        yield f"data: {json.dumps({'done': True, **counts})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
 
 
 # ── GET /api/jobs ────────────────────────────────────────────────
 
 
-@router.get("", response_model=list[JobResponse])
+@router.get("", response_model=list[JobResponse], response_model_exclude_unset=True)
 async def list_jobs(
+    request: Request,
+    response: Response,
     stage: str | None = Query(None),
     search: str | None = Query(None),
+    page: int | None = Query(None, ge=1),
+    per_page: int | None = Query(None, ge=1, le=MAX_PER_PAGE),
+    fields: str | None = Query(None),
 ):
+    """
+    List jobs, newest first. Large text fields (``jd_text``, ``jd_cleaned``)
+    are left out unless requested via ``fields`` (comma-separated, or ``*``).
+
+    Pass ``page``/``per_page`` to paginate; the total is returned in the
+    ``X-Total-Count`` header either way. Responses carry an ETag derived from
+    the matching jobs' count and latest update, so a matching
+    ``If-None-Match`` gets a 304 without the list being fetched.
+    """
     filters = []
     if stage:
         filters.append(f"pipeline_stage = '{sanitize_pb_value(stage)}'")
@@ -219,33 +261,103 @@ async def list_jobs(
         filters.append(f"company ~ '{sanitize_pb_value(search)}'")
 
     filter_str = " && ".join(filters) if filters else ""
-    query_params = {"sort": "-date_added"}
+    query_params = {"sort": "-date_added", "fields": _job_fields(fields)}
     if filter_str:
         query_params["filter"] = filter_str
 
-    records = pb.collection("jobs").get_full_list(query_params=query_params)
+    if page is not None or per_page is not None:
+        page, per_page = page or 1, per_page or DEFAULT_PER_PAGE
+
+    # Cheap probe: the count and newest update of the matching jobs
+    probe_params = {"sort": "-updated", "fields": "updated"}
+    if filter_str:
+        probe_params["filter"] = filter_str
+    probe = await apb.collection("jobs").get_list(1, 1, probe_params)
+    total = probe.get("totalItems", 0)
+    latest = probe["items"][0].updated if probe["items"] else ""
+    etag = _list_etag(query_params, page, per_page, total, latest)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Total-Count": str(total)}
+    if page is not None:
+        headers.update({"X-Page": str(page), "X-Per-Page": str(per_page)})
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    if page is None:
+        records = await apb.collection("jobs").get_full_list(query_params=query_params)
+    else:
+        records = (await apb.collection("jobs").get_list(
+            page, per_page, {**query_params, "skipTotal": 1}
+        ))["items"]
     return [record_to_dict(r) for r in records]
 
 
+def _job_fields(fields: str | None) -> str:
+    """PocketBase ``fields`` value for a list request (validated projection)."""
+    if fields and fields.strip() == "*":
+        return ",".join(JobResponse.model_fields)
+    if not fields:
+        return ",".join(f for f in JobResponse.model_fields if f not in LARGE_JOB_FIELDS)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in JobResponse.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # Fields every JobResponse needs are always included
+    return ",".join(dict.fromkeys([*REQUIRED_JOB_FIELDS, *requested]))
+
+
+def _list_etag(query_params: dict, page, per_page, total: int, latest: str) -> str:
+    payload = json.dumps([query_params, page, per_page, total, latest], sort_keys=True)
+    return f'W/"{hashlib.sha1(payload.encode()).hexdigest()[:20]}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {t.strip() for t in if_none_match.split(",")}
+    # Weak comparison: W/"x" and "x" match
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+
+
 # ── GET /api/jobs/{job_id} ───────────────────────────────────────
 
 
-@router.get("/{job_id}", response_model=JobDetailResponse)
-async def get_job(job_id: str):
+@router.get("/{job_id}", response_model=JobDetailResponse, response_model_exclude_unset=True)
+async def get_job(
+    job_id: str,
+    content: str | None = Query(
+        None,
+        description="Comma-separated section keys to include content_md for; "
+        "empty for none (omit for all)",
+    ),
+):
+    """Job with its sections, loaded in one request via back-relation expand.
+
+    ``content`` trims ``content_md`` from sections the client isn't showing
+    (e.g. collapsed ones); with ``content=`` PocketBase doesn't send it at all.
+    """
+    query_params = {"expand": SECTIONS_EXPAND}
+    if content == "":
+        section_fields = [f for f in SectionResponse.model_fields if f != "content_md"]
+        query_params["fields"] = ",".join(
+            ["*", *(f"expand.{SECTIONS_EXPAND}.{f}" for f in section_fields)]
+        )
     try:
-        record = pb.collection("jobs").get_one(job_id)
+        record = await apb.collection("jobs").get_one(job_id, query_params)
     except Exception:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    sections = pb.collection("sections").get_full_list(
-        query_params={
-            "filter": f"job = '{sanitize_pb_value(job_id)}'",
-            "sort": "created",
-        }
-    )
-
     job = record_to_dict(record)
-    job["sections"] = [record_to_dict(s) for s in sections]
+    expanded = (job.pop("expand", None) or {}).get(SECTIONS_EXPAND) or []
+    # Expanded relations come back unordered
+    sections = sorted((record_to_dict(s) for s in expanded), key=lambda s: s.get("created") or "")
+    if content:
+        wanted = set(content.split(","))
+        for section in sections:
+            if section.get("section_key") not in wanted:
+                section.pop("content_md", None)
+    job["sections"] = sections
     return job
 
 
@@ -255,9 +367,13 @@ async def get_job(job_id: str):
 @router.delete("/{job_id}", status_code=204)
 async def delete_job(job_id: str):
     try:
-        pb.collection("jobs").delete(job_id)
+        await apb.collection("jobs").delete(job_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Job not found")
+    # Sections are cascade-deleted with the job
+    section_ids.invalidate(job_id)
+    await get_job_queue().acancel(job_id)
+    await search_index.remove_job(job_id)
 
 
 # ── PUT /api/jobs/{job_id}/stage ─────────────────────────────────
@@ -272,7 +388,7 @@ async def update_stage(job_id: str, body: JobStageUpdate):
         )
 
     try:
-        record = pb.collection("jobs").update(job_id, {"pipeline_stage": body.stage})
+        record = await apb.collection("jobs").update(job_id, {"pipeline_stage": body.stage})
     except Exception:
         raise HTTPException(status_code=404, detail="Job not found")
     return record_to_dict(record)
@@ -285,7 +401,7 @@ async def update_stage(job_id: str, body: JobStageUpdate):
 async def reextract_job(job_id: str):
     """Re-run extraction on an existing job."""
     try:
-        record = pb.collection("jobs").get_one(job_id)
+        record = await apb.collection("jobs").get_one(job_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Job not found")
 
@@ -298,7 +414,7 @@ async def reextract_job(job_id: str):
         )
 
     # Update status to running
-    pb.collection("jobs").update(job_id, {"extraction_status": "running"})
+    await apb.collection("jobs").update(job_id, {"extraction_status": "running"})
 
     try:
         extracted = await extract_company_role(jd_text)
@@ -306,14 +422,14 @@ async def reextract_job(job_id: str):
         role = extracted.get("role", "Unknown")
 
         # Generate new slug
-        slug = _make_slug(company, role)
+        slug = make_slug(company, role)
 
         # Handle slug collision
         base_slug = slug
         counter = 2
         while True:
             try:
-                existing = pb.collection("jobs").get_first_list_item(
+                existing = await apb.collection("jobs").get_first_list_item(
                     f"slug = '{sanitize_pb_value(slug)}'"
                 )
                 # If it's the same job, keep the slug
@@ -325,7 +441,7 @@ async def reextract_job(job_id: str):
                 break
 
         # Update job with extracted data
-        record = pb.collection("jobs").update(
+        record = await apb.collection("jobs").update(
             job_id,
             {
                 "company": company,
@@ -336,10 +452,12 @@ async def reextract_job(job_id: str):
         )
     except Exception as e:
         # Extraction failed
-        pb.collection("jobs").update(job_id, {"extraction_status": "failed"})
+        await apb.collection("jobs").update(job_id, {"extraction_status": "failed"})
         raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
 
-    return record_to_dict(record)
+    job_data = record_to_dict(record)
+    await search_index.index_job(job_data)
+    return job_data
 
 
 # ── PATCH /api/jobs/{job_id} ─────────────────────────────────────
@@ -349,7 +467,7 @@ async def reextract_job(job_id: str):
 async def update_job(job_id: str, body: JobUpdate):
     """Manually update company and/or role."""
     try:
-        record = pb.collection("jobs").get_one(job_id)
+        record = await apb.collection("jobs").get_one(job_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Job not found")
 
@@ -370,14 +488,14 @@ async def update_job(job_id: str, body: JobUpdate):
     company = updates.get("company", job_data.get("company", ""))
     role = updates.get("role", job_data.get("role", ""))
 
-    slug = _make_slug(company, role)
+    slug = make_slug(company, role)
 
     # Handle slug collision
     base_slug = slug
     counter = 2
     while True:
         try:
-            existing = pb.collection("jobs").get_first_list_item(
+            existing = await apb.collection("jobs").get_first_list_item(
                 f"slug = '{sanitize_pb_value(slug)}'"
             )
             if existing.id == job_id:
@@ -390,8 +508,10 @@ async def update_job(job_id: str, body: JobUpdate):
     updates["slug"] = slug
 
     try:
-        record = pb.collection("jobs").update(job_id, updates)
+        record = await apb.collection("jobs").update(job_id, updates)
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to update job")
 
-    return record_to_dict(record)
+    job_data = record_to_dict(record)
+    await search_index.index_job(job_data)
+    return job_data
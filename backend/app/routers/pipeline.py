@@ -1,22 +1,34 @@
-"""Pipeline router — trigger analysis/cover-letter runs + SSE status stream."""
+"""Pipeline router — queue analysis/cover-letter runs + SSE status stream."""
 from __future__ import annotations
 
 import asyncio
 import json
+import logging
+from typing import AsyncIterator, Literal
 
-from fastapi import APIRouter, HTTPException
+import httpx
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from pocketbase.utils import ClientResponseError  # type: ignore[import-untyped]
 
-from app.database import pb, record_to_dict, sanitize_pb_value
-from app.models import JobResponse
-from app.services.pipeline_executor import run_pipeline
+from app.async_database import apb
+from app.database import record_to_dict, sanitize_pb_value
+from app.models import JobResponse, PipelineEvent
+from app.services.event_bus import RUN_FINISHED, event_bus
+from app.services.job_queue import ACTIVE_STATUSES, PRIORITY_INTERACTIVE, get_job_queue
+from app.services.realtime import section_changes
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/pipeline", tags=["pipeline"])
 
+# How often a quiet relay checks whether a worker-process run has finished
+RELAY_POLL_SECONDS = 2.0
+
 
-def _get_job_or_404(job_id: str) -> JobResponse:
+async def _get_job_or_404(job_id: str) -> JobResponse:
     try:
-        record = pb.collection("jobs").get_one(job_id)
+        record = await apb.collection("jobs").get_one(job_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Job not found")
     return JobResponse(**record_to_dict(record))
@@ -25,42 +37,68 @@ def _get_job_or_404(job_id: str) -> JobResponse:
 # ── POST /api/pipeline/{job_id}/analyze ──────────────────────────
 
 @router.post("/{job_id}/analyze")
-async def start_analysis(job_id: str):
-    job = _get_job_or_404(job_id)
+async def start_analysis(
+    job_id: str,
+    priority: int = Query(PRIORITY_INTERACTIVE),
+    mode: Literal["full", "incremental"] = Query("full"),
+):
+    """Run the analysis phase; ``mode=incremental`` only redoes sections whose inputs changed."""
+    await _get_job_or_404(job_id)
 
     # Set stage to analyzing
-    pb.collection("jobs").update(job_id, {"pipeline_stage": "analyzing"})
+    await apb.collection("jobs").update(job_id, {"pipeline_stage": "analyzing"})
 
-    async def event_stream():
-        async for event in run_pipeline(job, "analysis"):
-            data = event.model_dump_json()
-            yield f"data: {data}\n\n"
-        yield "data: {\"done\": true}\n\n"
-
-    return StreamingResponse(
-        event_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
+    return _queued_run_stream(job_id, "analysis", priority, mode)
 
 
 # ── POST /api/pipeline/{job_id}/cover-letter ─────────────────────
 
 @router.post("/{job_id}/cover-letter")
-async def start_cover_letter(job_id: str):
-    job = _get_job_or_404(job_id)
+async def start_cover_letter(
+    job_id: str,
+    priority: int = Query(PRIORITY_INTERACTIVE),
+    mode: Literal["full", "incremental"] = Query("full"),
+):
+    """Run the cover-letter phase; ``mode=incremental`` only redoes sections whose inputs changed."""
+    await _get_job_or_404(job_id)
 
     # Set stage to cover_letter_gen
-    pb.collection("jobs").update(job_id, {"pipeline_stage": "cover_letter_gen"})
+    await apb.collection("jobs").update(job_id, {"pipeline_stage": "cover_letter_gen"})
+
+    return _queued_run_stream(job_id, "cover_letter", priority, mode)
+
+
+# ── POST /api/pipeline/{job_id}/cancel ───────────────────────────
+
+@router.post("/{job_id}/cancel")
+async def cancel_runs(job_id: str, phase: str | None = Query(None)):
+    """Cancel the job's queued or running pipeline runs."""
+    await _get_job_or_404(job_id)
+    runs = await get_job_queue().acancel(job_id, phase)
+    return {"cancelled": [{"id": run.id, "phase": run.phase} for run in runs]}
 
+
+def _queued_run_stream(
+    job_id: str, phase: str, priority: int, mode: str = "full"
+) -> StreamingResponse:
+    """Enqueue a run and relay its events until it finishes.
+
+    A run claimed by this process is relayed from the bus — subscribing before
+    enqueueing means none is missed, and an already active run is joined
+    part-way. Runs claimed by a worker process are followed through
+    PocketBase realtime instead.
+    """
     async def event_stream():
-        async for event in run_pipeline(job, "cover_letter"):
-            data = event.model_dump_json()
-            yield f"data: {data}\n\n"
+        queue = get_job_queue()
+        if queue.workers > 0:
+            with event_bus.subscribe(job_id) as events:
+                run = await queue.aenqueue(job_id, phase, priority, mode)
+                async for event in _run_events(job_id, run.id, events):
+                    yield f"data: {event.model_dump_json()}\n\n"
+        else:
+            run = await queue.aenqueue(job_id, phase, priority, mode)
+            async for event in _remote_run_events(job_id, run.id):
+                yield f"data: {event.model_dump_json()}\n\n"
         yield "data: {\"done\": true}\n\n"
 
     return StreamingResponse(
@@ -74,33 +112,129 @@ async def start_cover_letter(job_id: str):
     )
 
 
+async def _run_events(
+    job_id: str, run_id: int, events: asyncio.Queue
+) -> AsyncIterator[PipelineEvent]:
+    """Yield a run's events from the bus while this process owns it.
+
+    The queue row is checked whenever the bus has been quiet for
+    ``RELAY_POLL_SECONDS``: a run another process claimed is followed with
+    ``_remote_run_events``, and a finished run ends the stream.
+    """
+    queue = get_job_queue()
+    while True:
+        try:
+            event = await asyncio.wait_for(events.get(), RELAY_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            run = await queue.aget(run_id)
+            if run is None or run.status not in ACTIVE_STATUSES:
+                return
+            if run.status == "running" and run.worker_id != queue.worker_id:
+                async for event in _remote_run_events(job_id, run_id):
+                    yield event
+                return
+            continue
+        if event is RUN_FINISHED:
+            return
+        yield event
+
+
+async def _remote_run_events(job_id: str, run_id: int) -> AsyncIterator[PipelineEvent]:
+    """Yield the events of a run executing in a worker process.
+
+    Section changes arrive over PocketBase realtime; the queue row is checked
+    whenever the stream has been quiet for ``RELAY_POLL_SECONDS`` to learn
+    that the run is over. Streamed output reaches PocketBase as periodic
+    checkpoints of a running section, which are relayed as ``delta`` events
+    carrying the text added since the previous checkpoint.
+    """
+    records: asyncio.Queue[dict] = asyncio.Queue()
+
+    async def pump():
+        # PocketBase drops idle realtime clients, so reconnect until cancelled
+        while True:
+            try:
+                async for record in section_changes(job_id):
+                    if record is not None:
+                        records.put_nowait(record)
+            except (httpx.HTTPError, ClientResponseError):
+                logger.warning("Realtime stream for %s failed; reconnecting", job_id, exc_info=True)
+            await asyncio.sleep(1)
+
+    pump_task = asyncio.create_task(pump())
+    statuses: dict[str, str] = {}
+    # Content a section had when it started running (its previous output),
+    # and the streamed output relayed since
+    stale: dict[str, str] = {}
+    relayed: dict[str, str] = {}
+    try:
+        while True:
+            try:
+                record = await asyncio.wait_for(records.get(), RELAY_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                run = await get_job_queue().aget(run_id)
+                if run is None or run.status not in ACTIVE_STATUSES:
+                    return
+                continue
+            key, status = record["section_key"], record["status"]
+            content = record.get("content_md") or ""
+            if statuses.get(key) == status:
+                if status != "running" or content == stale.get(key):
+                    continue
+                # A checkpoint of streamed output
+                previous = relayed.get(key, "")
+                if not content.startswith(previous):
+                    # The section restarted its output (a retry)
+                    yield PipelineEvent(section_key=key, status="running")
+                    previous = ""
+                relayed[key] = content
+                if len(content) > len(previous):
+                    yield PipelineEvent(
+                        section_key=key, status="delta", content_md=content[len(previous):]
+                    )
+                continue
+            statuses[key] = status
+            if status == "running":
+                stale[key], relayed[key] = content, ""
+            yield PipelineEvent(
+                section_key=key,
+                status=status,
+                content_md=record.get("content_md") if status == "complete" else None,
+                error_message=record.get("error_message") or None,
+            )
+    finally:
+        pump_task.cancel()
+
+
 # ── GET /api/pipeline/{job_id}/status ────────────────────────────
 
 @router.get("/{job_id}/status")
 async def pipeline_status(job_id: str):
-    """SSE stream that polls section statuses until pipeline is idle."""
-    _get_job_or_404(job_id)  # 404 check
+    """SSE stream of section statuses until the pipeline is idle.
+
+    Sends one snapshot from the DB, then pushes each change as it happens:
+    from the in-process event bus when the run is local, otherwise from
+    PocketBase realtime. No queries are made while waiting for events.
+    """
+    await _get_job_or_404(job_id)  # 404 check
 
     async def status_stream():
-        while True:
-            sections = pb.collection("sections").get_full_list(
-                query_params={
-                    "filter": f"job = '{sanitize_pb_value(job_id)}'",
-                    "fields": "section_key,status",
-                }
-            )
-            statuses = {
-                record_to_dict(r)["section_key"]: record_to_dict(r)["status"]
-                for r in sections
-            }
+        with event_bus.subscribe(job_id) as queue:
+            statuses = await _section_statuses(job_id)
             yield f"data: {json.dumps(statuses)}\n\n"
 
-            # If nothing is running, stop streaming
-            if not any(s == "running" for s in statuses.values()):
-                yield "data: {\"done\": true}\n\n"
-                break
+            if _any_running(statuses):
+                if event_bus.is_running(job_id):
+                    updates = _bus_updates(queue)
+                else:
+                    updates = _realtime_updates(job_id, statuses)
+                async for changed in updates:
+                    statuses.update(changed)
+                    yield f"data: {json.dumps(statuses)}\n\n"
+                    if not _any_running(statuses):
+                        break
 
-            await asyncio.sleep(2)
+        yield "data: {\"done\": true}\n\n"
 
     return StreamingResponse(
         status_stream(),
@@ -111,3 +245,52 @@ async def pipeline_status(job_id: str):
             "X-Accel-Buffering": "no",
         },
     )
+
+
+async def _section_statuses(job_id: str) -> dict[str, str]:
+    sections = await apb.collection("sections").get_full_list(
+        query_params={
+            "filter": f"job = '{sanitize_pb_value(job_id)}'",
+            "fields": "section_key,status",
+        }
+    )
+    return {
+        record_to_dict(r)["section_key"]: record_to_dict(r)["status"]
+        for r in sections
+    }
+
+
+def _any_running(statuses: dict[str, str]) -> bool:
+    return any(s == "running" for s in statuses.values())
+
+
+async def _bus_updates(queue: asyncio.Queue) -> AsyncIterator[dict[str, str]]:
+    """Yield {section_key: status} per bus event until the local run finishes."""
+    while True:
+        event = await queue.get()
+        if event is RUN_FINISHED:
+            return
+        # Streamed output isn't a status change
+        if event.status != "delta":
+            yield {event.section_key: event.status}
+
+
+async def _realtime_updates(
+    job_id: str, statuses: dict[str, str]
+) -> AsyncIterator[dict[str, str]]:
+    """Yield status changes from PocketBase realtime (run in another process).
+
+    PocketBase drops idle realtime clients, so reconnect whenever the stream
+    ends or fails; the caller stops iterating once nothing is running.
+    """
+    while True:
+        try:
+            async for record in section_changes(job_id):
+                if record is None:
+                    # Subscribed: re-read once so changes made while connecting aren't lost
+                    yield await _section_statuses(job_id)
+                elif statuses.get(record["section_key"]) != record["status"]:
+                    yield {record["section_key"]: record["status"]}
+        except (httpx.HTTPError, ClientResponseError):
+            logger.warning("Realtime stream for %s failed; reconnecting", job_id, exc_info=True)
+        await asyncio.sleep(1)
@@ -0,0 +1,32 @@
+"""Search router — full-text search over jobs and section content."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.models import SearchResponse, SearchResult
+from app.services.search_index import get_search_index
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+# ── GET /api/search ──────────────────────────────────────────────
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Ranked matches for every word of ``q`` (prefix match), with snippets."""
+    index = get_search_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Search index is disabled")
+    start = time.perf_counter()
+    hits = await asyncio.to_thread(index.search, q, limit)
+    return SearchResponse(
+        query=q,
+        results=[SearchResult(**vars(hit)) for hit in hits],
+        took_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
@@ -1,9 +1,14 @@
 """Sections router — read, edit, regenerate, lock individual sections."""
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+from typing import Optional
 
-from app.database import pb, record_to_dict, sanitize_pb_value
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pocketbase.utils import ClientResponseError  # type: ignore[import-untyped]
+
+from app.async_database import apb
+from app.database import record_to_dict, sanitize_pb_value, section_ids
 from app.models import (
     JobResponse,
     SectionDefinitionResponse,
@@ -12,21 +17,44 @@ from app.models import (
     SectionUpdate,
 )
 from app.sections.config import ALL_SECTIONS
-from app.services.pipeline_executor import run_single_section
+from app.services import search_index
+from app.services.pipeline_executor import run_cascade, run_single_section
 
 router = APIRouter(prefix="/api/sections", tags=["sections"])
 
 section_definitions_router = APIRouter(tags=["sections"])
 
 
-def _get_job_or_404(job_id: str) -> JobResponse:
+async def _get_job_or_404(job_id: str) -> JobResponse:
     try:
-        record = pb.collection("jobs").get_one(job_id)
+        record = await apb.collection("jobs").get_one(job_id)
     except Exception:
         raise HTTPException(status_code=404, detail="Job not found")
     return JobResponse(**record_to_dict(record))
 
 
+async def _update_section(job_id: str, key: str, data: dict) -> Optional[dict]:
+    """Update an existing section by (job, key); None if there is none.
+
+    The record id comes from ``section_ids``. If PocketBase no longer has
+    that record (deleted, or recreated by another process) the job's ids are
+    reloaded and the update retried once, like ``upsert_section``.
+    """
+    for attempt in range(2):
+        section_id = await section_ids.aget(job_id, key)
+        if section_id is None:
+            return None
+        try:
+            record = await apb.collection("sections").update(section_id, data)
+        except ClientResponseError as exc:
+            if exc.status != 404:
+                raise
+            section_ids.invalidate(job_id)
+            continue
+        return record_to_dict(record)
+    return None
+
+
 # ── GET /api/section-definitions ─────────────────────────────────
 
 @section_definitions_router.get(
@@ -52,8 +80,8 @@ async def get_section_definitions():
 
 @router.get("/{job_id}", response_model=list[SectionResponse])
 async def list_sections(job_id: str):
-    _get_job_or_404(job_id)
-    records = pb.collection("sections").get_full_list(
+    await _get_job_or_404(job_id)
+    records = await apb.collection("sections").get_full_list(
         query_params={
             "filter": f"job = '{sanitize_pb_value(job_id)}'",
             "sort": "created",
@@ -67,7 +95,7 @@ async def list_sections(job_id: str):
 @router.get("/{job_id}/{key}", response_model=SectionResponse)
 async def get_section(job_id: str, key: str):
     try:
-        record = pb.collection("sections").get_first_list_item(
+        record = await apb.collection("sections").get_first_list_item(
             f"job = '{sanitize_pb_value(job_id)}' && section_key = '{sanitize_pb_value(key)}'"
         )
     except Exception:
@@ -80,60 +108,81 @@ async def get_section(job_id: str, key: str):
 @router.put("/{job_id}/{key}", response_model=SectionResponse)
 async def update_section(job_id: str, key: str, body: SectionUpdate):
     """Edit section content. Auto-locks the section."""
-    try:
-        existing = pb.collection("sections").get_first_list_item(
-            f"job = '{sanitize_pb_value(job_id)}' && section_key = '{sanitize_pb_value(key)}'"
-        )
-    except Exception:
-        raise HTTPException(status_code=404, detail="Section not found")
-
-    record = pb.collection("sections").update(
-        existing.id,
-        {"content_md": body.content_md, "is_locked": True},
+    record = await _update_section(
+        job_id, key, {"content_md": body.content_md, "is_locked": True}
     )
-    return record_to_dict(record)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    await search_index.index_section(job_id, key, body.content_md)
+    return record
 
 
 # ── POST /api/sections/{job_id}/{key}/generate ───────────────────
 
 @router.post("/{job_id}/{key}/generate", response_model=SectionResponse)
-async def regenerate_section(job_id: str, key: str):
-    """Regenerate a single section (unlocks it first)."""
-    job = _get_job_or_404(job_id)
-
-    # Unlock before regenerating
-    try:
-        existing = pb.collection("sections").get_first_list_item(
-            f"job = '{sanitize_pb_value(job_id)}' && section_key = '{sanitize_pb_value(key)}'"
-        )
-        pb.collection("sections").update(existing.id, {"is_locked": False})
-    except Exception:
-        pass  # Section may not exist yet
-
-    event = await run_single_section(job, key)
+async def regenerate_section(
+    job_id: str,
+    key: str,
+    fresh: bool = Query(
+        True, description="Skip the LLM response cache (false reuses a cached answer)"
+    ),
+    cascade: bool = Query(
+        False, description="Also regenerate unlocked downstream sections, streaming SSE events"
+    ),
+):
+    """Regenerate a single section (unlocks it first).
+
+    A user asking to regenerate wants a new answer, so the response cache is
+    skipped unless ``fresh=false``.
+
+    With ``cascade`` the sections that depend on it, directly or not, are
+    regenerated after it and progress streams as SSE like a pipeline run.
+    """
+    job = await _get_job_or_404(job_id)
+    if cascade and not any(sd.key == key for sd in ALL_SECTIONS):
+        raise HTTPException(status_code=404, detail="Unknown section")
+
+    # Unlock before regenerating (section may not exist yet)
+    await _update_section(job_id, key, {"is_locked": False})
+
+    if cascade:
+        return _cascade_stream(job, key, fresh)
+
+    event = await run_single_section(job, key, bypass_cache=fresh)
 
     if event.status == "failed":
         raise HTTPException(status_code=500, detail=event.error_message)
 
     # Return the updated section
-    record = pb.collection("sections").get_first_list_item(
-        f"job = '{sanitize_pb_value(job_id)}' && section_key = '{sanitize_pb_value(key)}'"
-    )
+    section_id = await section_ids.aget(job_id, key)
+    if section_id is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    record = await apb.collection("sections").get_one(section_id)
     return record_to_dict(record)
 
 
+def _cascade_stream(job: JobResponse, key: str, fresh: bool) -> StreamingResponse:
+    async def event_stream():
+        async for event in run_cascade(job, key, bypass_cache=fresh):
+            yield f"data: {event.model_dump_json()}\n\n"
+        yield "data: {\"done\": true}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 # ── POST /api/sections/{job_id}/{key}/lock ───────────────────────
 
 @router.post("/{job_id}/{key}/lock", response_model=SectionResponse)
 async def toggle_lock(job_id: str, key: str, body: SectionLockToggle):
-    try:
-        existing = pb.collection("sections").get_first_list_item(
-            f"job = '{sanitize_pb_value(job_id)}' && section_key = '{sanitize_pb_value(key)}'"
-        )
-    except Exception:
+    record = await _update_section(job_id, key, {"is_locked": body.is_locked})
+    if record is None:
         raise HTTPException(status_code=404, detail="Section not found")
-
-    record = pb.collection("sections").update(
-        existing.id, {"is_locked": body.is_locked}
-    )
-    return record_to_dict(record)
+    return record
@@ -1,20 +1,22 @@
 """Analysis section generation functions (12 sections).
 
 Each function has the signature:
-    def generate_xxx(job, refs, dep_context) -> GenerationResult
+    async def generate_xxx(job, refs, dep_context) -> GenerationResult
 
 - job: JobResponse (has .company, .role, .jd_text, .jd_cleaned)
-- refs: dict[str, str] from reference_loader
-- dep_context: dict[str, str] of completed dependency section content
+- refs: ReferenceSnapshot ({key: text}) of every reference file, taken once per run
+- dep_context: dict[str, str] of completed dependency section content,
+  limited to the section's ``depends_on`` + ``reads`` (read nothing else)
 """
 from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from app.services.llm_service import GenerationResult, call_llm, call_llm_with_cache
-from app.services.reference_loader import load_references
+from app.services.llm_service import GenerationResult, call_llm_async, call_llm_with_cache_async
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from app.models import JobResponse
 
 target_audience = """
@@ -36,7 +38,7 @@ writing_style = """
 
 # ── 1. Evidence Cleanup ──────────────────────────────────────────
 
-def generate_evidence_cleanup(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
+async def generate_evidence_cleanup(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are a job description evidence extractor.
@@ -63,12 +65,12 @@ Raw JD Text:
 ---
 {job.jd_text}
 """
-    return call_llm(system=system, user=user, max_tokens=4000, temperature=0.1)
+    return await call_llm_async(system=system, user=user, max_tokens=4000, temperature=0.1)
 
 
 # ── 2. Gate Check ────────────────────────────────────────────────
 
-def generate_gate_check(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
+async def generate_gate_check(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are a executive recruiter invested in my success.
@@ -97,13 +99,12 @@ Check if this role passes my strict gate criteria for Senior/Principal PM roles.
 Cleaned JD:
 {jd}
 """
-    return call_llm(system=system, user=user, max_tokens=1000, temperature=0.0)
+    return await call_llm_async(system=system, user=user, max_tokens=1000, temperature=0.0)
 
 
 # ── 3. Company Research ──────────────────────────────────────────
 
-def generate_company_research(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
-    r = load_references("research_checklist", "li_profile")
+async def generate_company_research(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are an expert business researcher. 
@@ -136,13 +137,12 @@ Links MUST be provided for all statements.
 Research this company: {job.company} from the perspective of this role: {job.role}
 
 """
-    return call_llm(system=system, user=user, max_tokens=4000, temperature=0.3, use_web_search=True)
+    return await call_llm_async(system=system, user=user, max_tokens=4000, temperature=0.3, use_web_search=True)
 
 
 # ── 4. Leadership Research ───────────────────────────────────────
 
-def generate_leadership_research(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
-    r = load_references("hm_research_checklist")
+async def generate_leadership_research(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are a senior business researcher. 
@@ -175,13 +175,12 @@ Research the leadership team at {job.company} and identify potential hiring mana
 Cleaned Job Description:
 {jd}
 """
-    return call_llm(system=system, user=user, max_tokens=4000, temperature=0.3, use_web_search=True)
+    return await call_llm_async(system=system, user=user, max_tokens=4000, temperature=0.3, use_web_search=True)
 
 
 # ── 5. Strategy Research ─────────────────────────────────────────
 
-def generate_strategy_research(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
-    r = load_references("strategy_checklist")
+async def generate_strategy_research(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are a product strategy researcher expert in evaluating market positioning and product strategy fit.
@@ -221,15 +220,14 @@ Gate Check Results:
 {dep_context.get('gate_check', 'N/A')}
 
 Strategy Checklist:
-{r['strategy_checklist']}
+{refs['strategy_checklist']}
 """
-    return call_llm(system=system, user=user, max_tokens=4000, temperature=0.3, use_web_search=True)
+    return await call_llm_async(system=system, user=user, max_tokens=4000, temperature=0.3, use_web_search=True)
 
 
 # ── 6. Glassdoor Research ────────────────────────────────────────
 
-def generate_glassdoor_research(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
-    r = load_references("glassdoor_method")
+async def generate_glassdoor_research(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are a work-life balance and company culture researcher specializing in employee sentiment analysis.
@@ -261,15 +259,14 @@ Research work-life balance signals and employee sentiment for this company, emph
 Role context: {job.role}
 
 Glassdoor Method:
-{r['glassdoor_method']}
+{refs['glassdoor_method']}
 """
-    return call_llm(system=system, user=user, max_tokens=3000, temperature=0.3, use_web_search=True)
+    return await call_llm_async(system=system, user=user, max_tokens=3000, temperature=0.3, use_web_search=True)
 
 
 # ── 7. Scorecard: Health & Maturity (40pts) ──────────────────────
 
-def generate_scorecard_health(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
-    r = load_references("mnookin_rubric", "deep_analysis_reference")
+async def generate_scorecard_health(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are a role-fit scoring expert using the Mnookin rubric to assess organizational and role health for a health-first Senior Principal PM.
@@ -302,10 +299,10 @@ Score the Health & Maturity dimension (40 points total) for this role, evaluatin
 """
     # Cache large reference materials to reduce latency and cost
     cached_refs = f"""## Mnookin Rubric
-{r['mnookin_rubric']}
+{refs['mnookin_rubric']}
 
 ## Deep Analysis Reference (quality standard)
-{r['deep_analysis_reference']}"""
+{refs['deep_analysis_reference']}"""
 
     jd = job.jd_cleaned or job.jd_text or ""
     user = f"""Score Health & Maturity (40pts) for {job.company} — {job.role}
@@ -319,13 +316,12 @@ Company Research:
 Glassdoor Research:
 {dep_context.get('glassdoor_research', 'N/A')}
 """
-    return call_llm_with_cache(system=system, user=user, cached_content=cached_refs, max_tokens=3000, temperature=0.2)
+    return await call_llm_with_cache_async(system=system, user=user, cached_content=cached_refs, max_tokens=3000, temperature=0.2)
 
 
 # ── 8. Scorecard: Role Fit (30pts) ───────────────────────────────
 
-def generate_scorecard_role_fit(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
-    r = load_references("mnookin_rubric", "deep_analysis_reference")
+async def generate_scorecard_role_fit(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are a role-fit scoring expert using the Mnookin rubric to assess alignment between a Senior Principal PM's strengths and role requirements.
@@ -359,10 +355,10 @@ Score the Role Fit dimension (30 points total) for this role, evaluating skill m
 """
     # Cache large reference materials to reduce latency and cost
     cached_refs = f"""## Mnookin Rubric
-{r['mnookin_rubric']}
+{refs['mnookin_rubric']}
 
 ## Deep Analysis Reference (quality standard)
-{r['deep_analysis_reference']}"""
+{refs['deep_analysis_reference']}"""
 
     jd = job.jd_cleaned or job.jd_text or ""
     user = f"""Score Role Fit (30pts) for {job.company} — {job.role}
@@ -379,13 +375,12 @@ Leadership Research:
 Strategy Research:
 {dep_context.get('strategy_research', 'N/A')}
 """
-    return call_llm_with_cache(system=system, user=user, cached_content=cached_refs, max_tokens=3000, temperature=0.2)
+    return await call_llm_with_cache_async(system=system, user=user, cached_content=cached_refs, max_tokens=3000, temperature=0.2)
 
 
 # ── 9. Scorecard: Personal + Bonus (30pts) ───────────────────────
 
-def generate_scorecard_personal(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
-    r = load_references("mnookin_rubric", "deep_analysis_reference")
+async def generate_scorecard_personal(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are a role-fit scoring expert using the Mnookin rubric to assess personal and motivational alignment with a role opportunity.
@@ -419,10 +414,10 @@ Score the Personal & Bonus dimension (30 points total) for this role, evaluating
 """
     # Cache large reference materials to reduce latency and cost
     cached_refs = f"""## Mnookin Rubric
-{r['mnookin_rubric']}
+{refs['mnookin_rubric']}
 
 ## Deep Analysis Reference (quality standard)
-{r['deep_analysis_reference']}"""
+{refs['deep_analysis_reference']}"""
 
     jd = job.jd_cleaned or job.jd_text or ""
     user = f"""Score Personal + Bonus (30pts) for {job.company} — {job.role}
@@ -436,12 +431,12 @@ Company Research:
 Glassdoor Research:
 {dep_context.get('glassdoor_research', 'N/A')}
 """
-    return call_llm_with_cache(system=system, user=user, cached_content=cached_refs, max_tokens=3000, temperature=0.2)
+    return await call_llm_with_cache_async(system=system, user=user, cached_content=cached_refs, max_tokens=3000, temperature=0.2)
 
 
 # ── 10. Between the Lines ────────────────────────────────────────
 
-def generate_between_the_lines(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
+async def generate_between_the_lines(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are a Strategic Product Analyst who decodes job descriptions to reveal true organizational nature, hidden dynamics, and potential friction points.
@@ -492,13 +487,12 @@ Context:
 
 **Your Analysis:**
 """
-    return call_llm(system=system, user=user, max_tokens=600, temperature=0.2)
+    return await call_llm_async(system=system, user=user, max_tokens=600, temperature=0.2)
 
 
 # ── 11. Hours Estimate ───────────────────────────────────────────
 
-def generate_hours_estimate(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
-    r = load_references("hours_drivers")
+async def generate_hours_estimate(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are an expert at estimating sustainable weekly work hours for tech roles, prioritizing health-first assessment.
@@ -534,7 +528,7 @@ Estimate weekly work hours for this role by triangulating from multiple signals
 """
     # Cache hours drivers framework to reduce latency and cost
     cached_refs = f"""## Hours Drivers Framework
-{r['hours_drivers']}"""
+{refs['hours_drivers']}"""
 
     jd = job.jd_cleaned or job.jd_text or ""
     user = f"""Estimate weekly hours for {job.company} — {job.role}
@@ -551,13 +545,12 @@ Leadership Research:
 Glassdoor Research:
 {dep_context.get('glassdoor_research', 'N/A')}
 """
-    return call_llm_with_cache(system=system, user=user, cached_content=cached_refs, max_tokens=2000, temperature=0.2)
+    return await call_llm_with_cache_async(system=system, user=user, cached_content=cached_refs, max_tokens=2000, temperature=0.2)
 
 
 # ── 12. Final Verdict ────────────────────────────────────────────
 
-def generate_final_verdict(job: JobResponse, refs: dict, dep_context: dict) -> GenerationResult:
-    r = load_references("li_profile")
+async def generate_final_verdict(job: JobResponse, refs: Mapping[str, str], dep_context: dict) -> GenerationResult:
     system = f"""
 ## Role
 You are a strategic talent synthesis expert who synthesizes all analysis dimensions into a decisive, quotable verdict.
@@ -605,6 +598,6 @@ Inputs:
 - Personal Score: {dep_context.get('scorecard_personal', '0')}
 - Deep Analysis: {dep_context.get('between_the_lines', 'N/A')}
 - Hours/Risk: {dep_context.get('hours_estimate', 'N/A')}
-- Candidate Profile: {r['li_profile']}
+- Candidate Profile: {refs['li_profile']}
 """
-    return call_llm(system=system, user=user, max_tokens=600, temperature=0.2)
+    return await call_llm_async(system=system, user=user, max_tokens=600, temperature=0.2)
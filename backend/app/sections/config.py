@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 
 @dataclass
@@ -9,32 +9,49 @@ class SectionDef:
     order: int
     depends_on: List[str]
     phase: str
+    # Run even if some dependencies failed or were skipped, as long as at
+    # least one succeeded. Otherwise any unavailable dependency skips it.
+    allow_partial_context: bool = False
+    # Wall-clock budget for the section, including LLM retries
+    timeout_seconds: float = 300.0
+    # Input token budget for prompts built with PromptBuilder (None: unbounded);
+    # lower-priority context is trimmed to fit
+    input_token_budget: Optional[int] = None
+    # Other completed outputs the section function reads from dep_context,
+    # passed when available without waiting for them or skipping on failure.
+    # depends_on + reads is everything the function is given (and may read).
+    reads: List[str] = field(default_factory=list)
+
+    @property
+    def inputs(self) -> List[str]:
+        """Keys of the completed outputs passed to the section function."""
+        return self.depends_on + [k for k in self.reads if k not in self.depends_on]
 
 
 ANALYSIS_SECTIONS = [
     SectionDef("evidence_cleanup", "Evidence Cleanup", 20, [], "analysis"),
     SectionDef("gate_check", "Gate Check", 7, ["evidence_cleanup"], "analysis"),
-    SectionDef("company_research", "Company Research", 8, ["gate_check"], "analysis"),
-    SectionDef("leadership_research", "Leadership Research", 9, ["gate_check"], "analysis"),
-    SectionDef("strategy_research", "Strategy Research", 10, ["gate_check"], "analysis"),
+    SectionDef("company_research", "Company Research", 8, ["gate_check"], "analysis", reads=["evidence_cleanup"]),
+    SectionDef("leadership_research", "Leadership Research", 9, ["gate_check"], "analysis", reads=["evidence_cleanup"]),
+    SectionDef("strategy_research", "Strategy Research", 10, ["gate_check"], "analysis", reads=["evidence_cleanup"]),
     SectionDef("glassdoor_research", "Glassdoor Research", 11, ["gate_check"], "analysis"),
-    SectionDef("scorecard_health", "Health & Maturity (40pts)", 3, ["company_research", "glassdoor_research"], "analysis"),
-    SectionDef("scorecard_role_fit", "Role Fit (30pts)", 4, ["company_research", "leadership_research", "strategy_research"], "analysis"),
-    SectionDef("scorecard_personal", "Personal + Bonus (30pts)", 5, ["company_research", "glassdoor_research"], "analysis"),
-    SectionDef("between_the_lines", "Between the Lines", 2, ["company_research", "leadership_research", "glassdoor_research"], "analysis"),
-    SectionDef("hours_estimate", "Hours Estimate", 6, ["company_research", "leadership_research"], "analysis"),
+    SectionDef("scorecard_health", "Health & Maturity (40pts)", 3, ["company_research", "glassdoor_research"], "analysis", allow_partial_context=True),
+    SectionDef("scorecard_role_fit", "Role Fit (30pts)", 4, ["company_research", "leadership_research", "strategy_research"], "analysis", allow_partial_context=True),
+    SectionDef("scorecard_personal", "Personal + Bonus (30pts)", 5, ["company_research", "glassdoor_research"], "analysis", allow_partial_context=True),
+    SectionDef("between_the_lines", "Between the Lines", 2, ["company_research", "leadership_research", "glassdoor_research"], "analysis", allow_partial_context=True),
+    SectionDef("hours_estimate", "Hours Estimate", 6, ["company_research", "leadership_research", "glassdoor_research"], "analysis", allow_partial_context=True),
     SectionDef("final_verdict", "Final Verdict", 1, ["scorecard_health", "scorecard_role_fit", "scorecard_personal", "between_the_lines", "hours_estimate"], "analysis"),
 ]
 
 COVER_LETTER_SECTIONS = [
-    SectionDef("cl_pep_talk", "Pep Talk", 12, [], "cover_letter"),
-    SectionDef("cl_resume_headlines", "Resume Headlines", 13, [], "cover_letter"),
-    SectionDef("cl_intro", "Introduction (3 options)", 14, [], "cover_letter"),
-    SectionDef("cl_problem", "Problem Statement (2 options)", 15, [], "cover_letter"),
-    SectionDef("cl_proof", "Proof Points (2 options)", 16, [], "cover_letter"),
-    SectionDef("cl_why_now", "Why Now (2 options)", 17, [], "cover_letter"),
-    SectionDef("cl_closing", "Closing (2 options)", 18, [], "cover_letter"),
-    SectionDef("cl_assembled", "Assembled Drafts (2 options)", 19, ["cl_intro", "cl_problem", "cl_proof", "cl_why_now", "cl_closing"], "cover_letter"),
+    SectionDef("cl_pep_talk", "Pep Talk", 12, [], "cover_letter", input_token_budget=6000, reads=["final_verdict", "between_the_lines", "hours_estimate"]),
+    SectionDef("cl_resume_headlines", "Resume Headlines", 13, [], "cover_letter", input_token_budget=5000),
+    SectionDef("cl_intro", "Introduction (3 options)", 14, [], "cover_letter", input_token_budget=6000, reads=["between_the_lines", "cl_pep_talk"]),
+    SectionDef("cl_problem", "Problem Statement (2 options)", 15, [], "cover_letter", input_token_budget=6000, reads=["company_research", "strategy_research", "between_the_lines"]),
+    SectionDef("cl_proof", "Proof Points (2 options)", 16, [], "cover_letter", input_token_budget=6000, reads=["company_research", "between_the_lines"]),
+    SectionDef("cl_why_now", "Why Now (2 options)", 17, [], "cover_letter", input_token_budget=6000, reads=["company_research", "strategy_research"]),
+    SectionDef("cl_closing", "Closing (2 options)", 18, [], "cover_letter", input_token_budget=5000, reads=["between_the_lines"]),
+    SectionDef("cl_assembled", "Assembled Drafts (2 options)", 19, ["cl_intro", "cl_problem", "cl_proof", "cl_why_now", "cl_closing", "cl_resume_headlines"], "cover_letter", input_token_budget=8000),
 ]
 
 ALL_SECTIONS = ANALYSIS_SECTIONS + COVER_LETTER_SECTIONS
@@ -0,0 +1,213 @@
+"""Server-side Gemini context caching for shared reference material.
+
+Sections such as the scorecards send the same large reference bundle
+(rubric + deep-analysis reference) on every call. Instead of re-sending it,
+``ContextCacheManager`` creates a Gemini cached-content object once per
+(model, system instruction, reference bundle) and reuses it by content hash
+until it is close to expiring. When the reference text changes, the hash
+changes, and the superseded server-side cache is deleted and recreated.
+
+The manager talks to ``client.caches`` / ``client.aio.caches`` only, so tests
+can pass a local fake with the same ``create``/``delete`` surface.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _CacheEntry:
+    name: str
+    content_hash: str
+    expires_at: float
+
+
+def _hash(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _is_definitive(exc: Exception) -> bool:
+    """True for errors that will recur for the same bundle (4xx other than
+    timeouts and rate limits), e.g. content below the minimum size or a model
+    without caching support."""
+    code = getattr(exc, "code", None)
+    return isinstance(code, int) and 400 <= code < 500 and code not in (408, 429)
+
+
+def _expires_at(cached: Any, ttl_seconds: int) -> float:
+    expire_time = getattr(cached, "expire_time", None)
+    if isinstance(expire_time, datetime):
+        return expire_time.timestamp()
+    return time.time() + ttl_seconds
+
+
+class ContextCacheManager:
+    """Create-once, reuse-by-hash manager for Gemini cached-content objects."""
+
+    def __init__(
+        self,
+        client: Any,
+        ttl_seconds: int = 3600,
+        refresh_margin_seconds: int = 60,
+        retry_after_seconds: float = 60.0,
+    ) -> None:
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_after_seconds = retry_after_seconds
+        # bundle label (model + system) → live cache entry
+        self._entries: dict[str, _CacheEntry] = {}
+        # content hashes the API refused to cache (e.g. below the minimum size)
+        self._rejected: set[str] = set()
+        # content hash → time before which creation isn't retried (transient errors)
+        self._retry_at: dict[str, float] = {}
+        # Guards the maps above; held only briefly, never across API calls
+        self._lock = threading.Lock()
+        # Serializes creation on the sync path (one create per bundle)
+        self._create_lock = threading.Lock()
+        self._async_locks: dict[str, asyncio.Lock] = {}
+
+    # ── Public API ──────────────────────────────────────────────
+
+    def get_or_create(self, *, model: str, system: str, cached_content: str) -> Optional[str]:
+        """Return a cached-content name for this bundle, creating it if needed.
+
+        Returns None if the bundle cannot be cached; callers should then send
+        the reference material inline.
+        """
+        label, content_hash = self._keys(model, system, cached_content)
+        with self._create_lock:
+            with self._lock:
+                name, stale = self._lookup(label, content_hash)
+                if name is not None or self._skip_creation(content_hash):
+                    return name
+            if stale is not None:
+                self._delete(stale)
+            try:
+                cached = self.client.caches.create(
+                    model=model, config=self._create_config(label, system, cached_content)
+                )
+            except Exception as e:
+                with self._lock:
+                    self._creation_failed(content_hash, e)
+                return None
+            with self._lock:
+                return self._store(label, content_hash, cached)
+
+    async def get_or_create_async(
+        self, *, model: str, system: str, cached_content: str
+    ) -> Optional[str]:
+        """Async variant of ``get_or_create`` using ``client.aio.caches``."""
+        label, content_hash = self._keys(model, system, cached_content)
+        lock = self._async_locks.setdefault(label, asyncio.Lock())
+        async with lock:
+            with self._lock:
+                name, stale = self._lookup(label, content_hash)
+                if name is not None or self._skip_creation(content_hash):
+                    return name
+            if stale is not None:
+                await self._delete_async(stale)
+            try:
+                cached = await self.client.aio.caches.create(
+                    model=model, config=self._create_config(label, system, cached_content)
+                )
+            except Exception as e:
+                with self._lock:
+                    self._creation_failed(content_hash, e)
+                return None
+            with self._lock:
+                return self._store(label, content_hash, cached)
+
+    def invalidate(self, name: str) -> None:
+        """Forget an entry (e.g. after the server reports it missing)."""
+        with self._lock:
+            for label, entry in list(self._entries.items()):
+                if entry.name == name:
+                    del self._entries[label]
+
+    # ── Internals ───────────────────────────────────────────────
+
+    def _keys(self, model: str, system: str, cached_content: str) -> tuple[str, str]:
+        return _hash(model, system), _hash(model, system, cached_content)
+
+    def _skip_creation(self, content_hash: str) -> bool:
+        """True if this bundle was refused, or failed transiently too recently."""
+        if content_hash in self._rejected:
+            return True
+        retry_at = self._retry_at.get(content_hash)
+        if retry_at is None:
+            return False
+        if time.time() < retry_at:
+            return True
+        del self._retry_at[content_hash]
+        return False
+
+    def _creation_failed(self, content_hash: str, exc: Exception) -> None:
+        if _is_definitive(exc):
+            logger.warning("Context cache refused for this bundle; sending inline", exc_info=True)
+            self._rejected.add(content_hash)
+        else:
+            logger.warning(
+                "Context cache creation failed; sending inline for %gs",
+                self.retry_after_seconds, exc_info=True,
+            )
+            self._retry_at[content_hash] = time.time() + self.retry_after_seconds
+
+    def _lookup(self, label: str, content_hash: str) -> tuple[Optional[str], Optional[_CacheEntry]]:
+        """Return (reusable name, stale entry to delete)."""
+        entry = self._entries.get(label)
+        if entry is None:
+            return None, None
+        fresh = entry.expires_at - self.refresh_margin_seconds > time.time()
+        if entry.content_hash == content_hash and fresh:
+            return entry.name, None
+        del self._entries[label]
+        # Expired entries are gone server-side already; only superseded ones need deleting.
+        return None, entry if fresh else None
+
+    def _create_config(self, label: str, system: str, cached_content: str) -> dict:
+        return {
+            "display_name": f"pipeline-jd-{label[:16]}",
+            "system_instruction": system,
+            "contents": [
+                {
+                    "role": "user",
+                    "parts": [{"text": f"## CACHED REFERENCE MATERIAL\n{cached_content}"}],
+                }
+            ],
+            "ttl": f"{self.ttl_seconds}s",
+        }
+
+    def _store(self, label: str, content_hash: str, cached: Any) -> str:
+        entry = _CacheEntry(
+            name=cached.name,
+            content_hash=content_hash,
+            expires_at=_expires_at(cached, self.ttl_seconds),
+        )
+        self._entries[label] = entry
+        return entry.name
+
+    def _delete(self, entry: _CacheEntry) -> None:
+        try:
+            self.client.caches.delete(name=entry.name)
+        except Exception:
+            logger.warning("Failed to delete superseded context cache %s", entry.name, exc_info=True)
+
+    async def _delete_async(self, entry: _CacheEntry) -> None:
+        try:
+            await self.client.aio.caches.delete(name=entry.name)
+        except Exception:
+            logger.warning("Failed to delete superseded context cache %s", entry.name, exc_info=True)
@@ -0,0 +1,82 @@
+"""In-process pub/sub for pipeline events.
+
+``run_pipeline`` and ``run_single_section`` publish every ``PipelineEvent``
+they produce here, keyed by job id. The status SSE endpoint subscribes
+instead of polling the sections collection, so updates reach clients as soon
+as they happen and an idle stream costs no DB queries.
+
+The bus only sees runs in this process; ``is_running`` tells subscribers
+whether to rely on it or fall back to PocketBase realtime (see
+``app.services.realtime``).
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from app.models import PipelineEvent
+
+# Queued after the last event of a job's final active run.
+RUN_FINISHED = None
+
+
+class EventBus:
+    def __init__(self) -> None:
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._active_runs: dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[asyncio.Queue]:
+        """Yield a queue receiving this job's events until the block exits.
+
+        The queue receives ``PipelineEvent``s, then ``RUN_FINISHED`` once no
+        run for the job is active any more.
+        """
+        queue: asyncio.Queue[Optional[PipelineEvent]] = asyncio.Queue()
+        self._subscribers[job_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    def publish(self, job_id: str, event: PipelineEvent) -> PipelineEvent:
+        """Deliver an event to every subscriber of the job; returns the event."""
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(event)
+        return event
+
+    def begin_run(self, job_id: str) -> None:
+        self._active_runs[job_id] += 1
+
+    def end_run(self, job_id: str) -> None:
+        self._active_runs[job_id] -= 1
+        if self._active_runs[job_id] > 0:
+            return
+        del self._active_runs[job_id]
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(RUN_FINISHED)
+
+    def notify_finished(self, job_id: str) -> None:
+        """Send ``RUN_FINISHED`` to subscribers of a job that has no active run
+        (e.g. a queued run was cancelled before it started)."""
+        if self.is_running(job_id):
+            return
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(RUN_FINISHED)
+
+    def is_running(self, job_id: str) -> bool:
+        """True if a run for this job is executing in this process."""
+        return self._active_runs.get(job_id, 0) > 0
+
+    def clear(self) -> None:
+        self._subscribers.clear()
+        self._active_runs.clear()
+
+
+event_bus = EventBus()
@@ -5,9 +5,9 @@ import re
 from dataclasses import dataclass
 
 import httpx
-from anthropic import AsyncAnthropic
 
-from app.config import settings
+from app.services.provider_clients import get_anthropic
+from app.services.rate_limiter import anthropic_usage_tokens, estimate_tokens, rate_limiter
 
 # Sites that require JavaScript rendering
 JS_REQUIRED_DOMAINS = [
@@ -195,7 +195,7 @@ async def _extract_jd_from_html(html: str, url: str) -> dict:
     Returns:
         Dict with jd_text, is_complete, confidence, section_headings
     """
-    client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+    client = get_anthropic()
 
     system_prompt = """Extract the job description text from the provided HTML.
 
@@ -228,13 +228,16 @@ Rules:
 
     user_prompt = f"Extract the job description from this HTML:\n\n{html_preview}"
 
-    response = await client.messages.create(
-        model="claude-haiku-4-5",
-        max_tokens=4000,
-        temperature=0,
-        system=system_prompt,
-        messages=[{"role": "user", "content": user_prompt}],
-    )
+    estimate = estimate_tokens(system_prompt, user_prompt, max_output=4000)
+    async with rate_limiter.limit("anthropic", "claude-haiku-4-5", estimate, max_output=4000) as usage:
+        response = await client.messages.create(
+            model="claude-haiku-4-5",
+            max_tokens=4000,
+            temperature=0,
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}],
+        )
+        usage.record(anthropic_usage_tokens(response))
 
     # Extract JSON from response
     text_content = "".join(
@@ -419,7 +422,7 @@ async def analyze_jd_text(jd_text: str) -> AnalyzeResult:
     Returns:
         AnalyzeResult with word_count and section_headings
     """
-    client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+    client = get_anthropic()
 
     system_prompt = """Analyze the provided job description text and identify section headings.
 
@@ -435,13 +438,17 @@ Rules:
 - Return them in the order they appear in the document
 - If no clear headings are found, return an empty array"""
 
-    response = await client.messages.create(
-        model="claude-haiku-4-5",
-        max_tokens=1000,
-        temperature=0,
-        system=system_prompt,
-        messages=[{"role": "user", "content": f"Analyze this job description:\n\n{jd_text[:50000]}"}],
-    )
+    user_prompt = f"Analyze this job description:\n\n{jd_text[:50000]}"
+    estimate = estimate_tokens(system_prompt, user_prompt, max_output=1000)
+    async with rate_limiter.limit("anthropic", "claude-haiku-4-5", estimate, max_output=1000) as usage:
+        response = await client.messages.create(
+            model="claude-haiku-4-5",
+            max_tokens=1000,
+            temperature=0,
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}],
+        )
+        usage.record(anthropic_usage_tokens(response))
 
     # Extract JSON from response
     text_content = "".join(
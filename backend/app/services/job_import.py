@@ -0,0 +1,294 @@
+"""Bulk job import.
+
+``import_jobs`` turns a list of postings (URLs, optionally with JD text) into
+jobs the way ``POST /api/jobs`` does for one: fetch the JD when no text was
+given, extract company and role, create the job and queue its analysis. For
+hundreds of postings it
+
+- dedupes against existing ``jd_url``s with one query per chunk of URLs,
+- fetches and extracts with bounded concurrency,
+- creates jobs in batched inserts (one ``/api/batch`` request per batch),
+- queues the batch's analyses in one queue transaction,
+
+and yields one progress event per item stage so callers can stream them.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import AsyncIterator, Optional
+
+from pocketbase.utils import ClientResponseError  # type: ignore[import-untyped]
+
+from app.async_database import apb
+from app.config import settings
+from app.database import record_to_dict, sanitize_pb_value
+from app.extraction import extract_company_role
+from app.models import JobBulkItem
+from app.services import search_index
+from app.services.jd_fetcher import fetch_jd_from_url
+from app.services.job_queue import PRIORITY_BACKGROUND, get_job_queue
+
+logger = logging.getLogger(__name__)
+
+# URLs / slugs per lookup query (keeps filter strings well under URL limits)
+LOOKUP_CHUNK = 50
+
+
+def make_slug(company: str, role: str, day: Optional[str] = None) -> str:
+    """Generate a URL-friendly job ID: company-role-YYYYMMDD (today unless ``day``)."""
+    base = f"{company}-{role}-{day or date.today().isoformat()}"
+    slug = re.sub(r"[^a-z0-9]+", "-", base.lower()).strip("-")
+    return slug
+
+
+@dataclass
+class _Prepared:
+    """An item that has been fetched and extracted, ready to insert."""
+
+    index: int
+    row: dict
+    extracted: bool
+    base_slug: Optional[str] = None
+    events: list[dict] = field(default_factory=list)
+    # Set when the item can't be created (no JD text to store)
+    error: Optional[str] = None
+
+
+async def existing_job_urls(urls: list[str]) -> dict[str, str]:
+    """Map each URL that already has a job to that job's id."""
+    found: dict[str, str] = {}
+    for i in range(0, len(urls), LOOKUP_CHUNK):
+        chunk = urls[i:i + LOOKUP_CHUNK]
+        records = await apb.collection("jobs").get_full_list(
+            query_params={
+                "filter": " || ".join(f"jd_url = '{sanitize_pb_value(u)}'" for u in chunk),
+                "fields": "id,jd_url",
+            }
+        )
+        for record in records:
+            d = record_to_dict(record)
+            found[d["jd_url"]] = d["id"]
+    return found
+
+
+async def _taken_slugs(bases: set[str]) -> set[str]:
+    """Existing slugs that start with any of ``bases``."""
+    taken: set[str] = set()
+    ordered = sorted(bases)
+    for i in range(0, len(ordered), LOOKUP_CHUNK):
+        chunk = ordered[i:i + LOOKUP_CHUNK]
+        records = await apb.collection("jobs").get_full_list(
+            query_params={
+                "filter": " || ".join(f"slug ~ '{sanitize_pb_value(b)}%'" for b in chunk),
+                "fields": "slug",
+            }
+        )
+        taken.update(record_to_dict(r)["slug"] for r in records)
+    return taken
+
+
+async def _prepare(index: int, item: JobBulkItem) -> _Prepared:
+    """Fetch (if needed) and extract one item. Never raises.
+
+    ``jd_text`` is required on jobs, so an item whose JD can't be fetched
+    comes back with ``error`` set and is not inserted.
+    """
+    events = []
+    jd_text = item.jd_text
+    fetch_status = item.jd_fetch_status
+    confidence = item.jd_fetch_confidence
+
+    if not jd_text:
+        try:
+            result = await fetch_jd_from_url(item.jd_url)
+        except Exception as exc:
+            logger.warning("Bulk import: fetching %s failed", item.jd_url, exc_info=True)
+            result = None
+            error = str(exc)
+        else:
+            error = result.error_message
+        if result is not None and result.success and result.jd_text:
+            jd_text = result.jd_text
+            fetch_status, confidence = "success", result.confidence
+            events.append({"index": index, "jd_url": item.jd_url, "status": "fetched"})
+        else:
+            error = error or "No job description found"
+            events.append({
+                "index": index, "jd_url": item.jd_url, "status": "fetch_failed", "error": error,
+            })
+            return _Prepared(index=index, row={}, extracted=False, events=events, error=error)
+
+    row = {
+        "company": "",
+        "role": "",
+        "jd_url": item.jd_url,
+        "jd_text": jd_text,
+        "jd_fetch_status": fetch_status,
+        "jd_fetch_confidence": confidence,
+        "date_added": date.today().isoformat(),
+        "pipeline_stage": "queue",
+        "extraction_status": "failed",
+    }
+    prepared = _Prepared(index=index, row=row, extracted=False, events=events)
+    try:
+        extracted = await extract_company_role(jd_text)
+    except Exception as exc:
+        logger.warning("Bulk import: extraction for %s failed", item.jd_url, exc_info=True)
+        events.append({
+            "index": index, "jd_url": item.jd_url, "status": "extraction_failed", "error": str(exc),
+        })
+        return prepared
+
+    row["company"] = extracted.get("company", "Unknown")
+    row["role"] = extracted.get("role", "Unknown")
+    row["extraction_status"] = "complete"
+    prepared.extracted = True
+    prepared.base_slug = make_slug(row["company"], row["role"])
+    return prepared
+
+
+def _assign_slugs(batch: list[_Prepared], taken: set[str]) -> None:
+    """Give every row a slug unique among ``taken`` and the batch itself."""
+    stamp = int(time.time())
+    for p in batch:
+        if p.base_slug is None:
+            # No company/role to build a slug from (same scheme as create_job)
+            slug = f"jd-{stamp}-{p.index}"
+        else:
+            slug, counter = p.base_slug, 2
+            while slug in taken:
+                slug = f"{p.base_slug}-{counter}"
+                counter += 1
+        taken.add(slug)
+        p.row["slug"] = slug
+
+
+async def _insert(batch: list[_Prepared]) -> list[tuple[_Prepared, Optional[dict], Optional[str]]]:
+    """Create the batch's jobs; returns (item, created job, error) per item.
+
+    One batch request when possible. If it fails (batch API disabled, or a
+    row rejected — which rolls back the whole batch) rows are created one by
+    one so a bad row only fails itself.
+    """
+    _assign_slugs(batch, await _taken_slugs({p.base_slug for p in batch if p.base_slug}))
+    try:
+        records = await apb.collection("jobs").create_many([p.row for p in batch])
+        return [(p, record_to_dict(r), None) for p, r in zip(batch, records)]
+    except ClientResponseError as exc:
+        logger.warning("Bulk job insert failed, creating jobs one by one: %s", exc)
+
+    results = []
+    for p in batch:
+        try:
+            record = await apb.collection("jobs").create(p.row)
+            results.append((p, record_to_dict(record), None))
+        except Exception as exc:
+            results.append((p, None, str(exc)))
+    return results
+
+
+async def import_jobs(
+    items: list[JobBulkItem],
+    analyze: bool = True,
+    concurrency: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[dict]:
+    """Import postings, yielding progress events.
+
+    Each event has the item's ``index`` and ``jd_url`` and a ``status``:
+    ``duplicate`` (with the existing ``job_id``), ``fetched``,
+    ``fetch_failed``, ``extraction_failed``, ``created`` (with ``job_id``,
+    ``company``, ``role``, ``analysis_queued``) or ``failed`` (with
+    ``error``). An item whose JD can't be fetched is reported ``failed`` and
+    not created, since a job needs its JD text. Jobs whose extraction failed
+    are still created, like ``POST /api/jobs`` does, so they can be fixed by
+    hand.
+    """
+    concurrency = concurrency or settings.BULK_IMPORT_CONCURRENCY
+    batch_size = batch_size or settings.BULK_IMPORT_BATCH_SIZE
+
+    # Dedupe within the request, then against existing jobs
+    first_index: dict[str, int] = {}
+    todo: list[tuple[int, JobBulkItem]] = []
+    for index, item in enumerate(items):
+        if item.jd_url in first_index:
+            yield {
+                "index": index, "jd_url": item.jd_url, "status": "duplicate",
+                "duplicate_of": first_index[item.jd_url],
+            }
+            continue
+        first_index[item.jd_url] = index
+        todo.append((index, item))
+
+    existing = await existing_job_urls([item.jd_url for _, item in todo])
+    for index, item in todo:
+        if item.jd_url in existing:
+            yield {
+                "index": index, "jd_url": item.jd_url, "status": "duplicate",
+                "job_id": existing[item.jd_url],
+            }
+    todo = [(index, item) for index, item in todo if item.jd_url not in existing]
+
+    # Fetch + extract concurrently; insert in batches as items become ready
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def prepare(index: int, item: JobBulkItem) -> _Prepared:
+        async with semaphore:
+            return await _prepare(index, item)
+
+    tasks = [asyncio.create_task(prepare(index, item)) for index, item in todo]
+    urls = {index: item.jd_url for index, item in todo}
+    batch: list[_Prepared] = []
+    try:
+        for finished in asyncio.as_completed(tasks):
+            prepared = await finished
+            for event in prepared.events:
+                yield event
+            if prepared.error is not None:
+                yield {
+                    "index": prepared.index, "jd_url": urls[prepared.index],
+                    "status": "failed", "error": prepared.error,
+                }
+                continue
+            batch.append(prepared)
+            if len(batch) >= batch_size:
+                async for event in _insert_events(batch, urls, analyze):
+                    yield event
+                batch = []
+        if batch:
+            async for event in _insert_events(batch, urls, analyze):
+                yield event
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _insert_events(
+    batch: list[_Prepared], urls: dict[int, str], analyze: bool
+) -> AsyncIterator[dict]:
+    results = await _insert(batch)
+    queued = {
+        job["id"] for prepared, job, _ in results
+        if job is not None and analyze and prepared.extracted
+    }
+    if queued:
+        await get_job_queue().aenqueue_many(sorted(queued), "analysis", priority=PRIORITY_BACKGROUND)
+    for prepared, job, error in results:
+        if job is None:
+            yield {"index": prepared.index, "jd_url": urls[prepared.index], "status": "failed", "error": error}
+            continue
+        await search_index.index_job(job)
+        yield {
+            "index": prepared.index,
+            "jd_url": urls[prepared.index],
+            "status": "created",
+            "job_id": job["id"],
+            "company": job.get("company", ""),
+            "role": job.get("role", ""),
+            "analysis_queued": job["id"] in queued,
+        }
@@ -0,0 +1,579 @@
+"""Durable queue of pipeline runs.
+
+Runs are rows in a local SQLite file, so queued work survives a restart.
+``workers`` coroutines claim the highest-priority queued run, execute it via
+``run_pipeline`` (which publishes every event to the event bus) and record
+the outcome. Several processes can drain the same file (see ``app.worker``):
+a claim takes a lease that the owning process renews with heartbeats, and a
+run whose lease expires — its worker died — is claimed again by another.
+A run claimed ``max_attempts`` times without finishing is marked failed
+instead of being claimed again.
+
+At most one run per (job, phase) is active at a time — enqueueing a run that
+is already queued or running returns the existing one, raising its priority
+if the new request is more urgent. Queued runs can be cancelled before they
+start; running ones are cancelled by cancelling their worker's task, which
+the owning process notices on its next heartbeat.
+
+SQLite calls block, so workers and the ``a``-prefixed methods used from
+request handlers run them in a thread. A failing database (e.g. locked for
+longer than the busy timeout) is logged and retried with backoff; it never
+stops a worker.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from app.async_database import apb
+from app.config import settings
+from app.database import record_to_dict
+from app.models import JobResponse
+from app.services.event_bus import event_bus
+from app.services.pipeline_executor import run_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Runs started from the UI jump ahead of automatic ones (e.g. after create)
+PRIORITY_INTERACTIVE = 10
+PRIORITY_BACKGROUND = 0
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Longest wait between retries while the queue database keeps failing
+MAX_BACKOFF_SECONDS = 30.0
+
+
+@dataclass
+class QueuedRun:
+    id: int
+    job_id: str
+    phase: str
+    priority: int
+    status: str  # queued | running | done | failed | cancelled
+    attempts: int = 0
+    error: str = ""
+    worker_id: str = ""
+    mode: str = "full"  # full | incremental (see run_pipeline)
+
+
+async def execute_run(job_id: str, phase: str, mode: str = "full") -> None:
+    """Default runner: load the job and run its phase to completion."""
+    record = await apb.collection("jobs").get_one(job_id)
+    job = JobResponse(**record_to_dict(record))
+    async for _ in run_pipeline(job, phase, mode):
+        pass  # Events reach subscribers through the event bus
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """SQLite-backed priority queue of pipeline runs with leased workers.
+
+    ``workers`` is the number of runs this process executes at once; 0 makes
+    it a producer only (enqueue, cancel, inspect).
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        workers: int = 2,
+        runner: Callable[[str, str, str], Awaitable[None]] = execute_run,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = 30.0,
+        poll_seconds: float = 1.0,
+        max_attempts: int = 3,
+    ) -> None:
+        self.path = Path(path)
+        self.workers = workers
+        self.runner = runner
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        # Runs enqueued by other processes only show up by polling
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker_tasks: list[asyncio.Task] = []
+        # run id -> task executing it in this process
+        self._running: dict[int, asyncio.Task] = {}
+
+        if str(self.path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Other processes may hold the write lock briefly while claiming
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if str(self.path) != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                phase TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT NOT NULL DEFAULT '',
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                worker_id TEXT NOT NULL DEFAULT '',
+                lease_expires_at REAL,
+                mode TEXT NOT NULL DEFAULT 'full'
+            )
+            """
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        for column, ddl in (
+            ("worker_id", "TEXT NOT NULL DEFAULT ''"),
+            ("lease_expires_at", "REAL"),
+            ("mode", "TEXT NOT NULL DEFAULT 'full'"),
+        ):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {ddl}")
+        # One active run per (job, phase)
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_runs_active ON runs (job_id, phase) "
+            "WHERE status IN ('queued', 'running')"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_runs_queued ON runs (status, priority, id)"
+        )
+        self._conn.commit()
+
+    # ── Public API ──────────────────────────────────────────────
+
+    def enqueue(
+        self,
+        job_id: str,
+        phase: str,
+        priority: int = PRIORITY_BACKGROUND,
+        mode: str = "full",
+    ) -> QueuedRun:
+        """Queue a run, or return the active run for the same job and phase.
+
+        A still-queued incremental run asked for again in full mode becomes a
+        full run (it covers everything the incremental one would have).
+        """
+        run = self._insert(job_id, phase, priority, mode)
+        self._wake()
+        return run
+
+    async def aenqueue(
+        self,
+        job_id: str,
+        phase: str,
+        priority: int = PRIORITY_BACKGROUND,
+        mode: str = "full",
+    ) -> QueuedRun:
+        """``enqueue`` without blocking the event loop."""
+        run = await asyncio.to_thread(self._insert, job_id, phase, priority, mode)
+        self._wake()
+        return run
+
+    def enqueue_many(
+        self,
+        job_ids: list[str],
+        phase: str,
+        priority: int = PRIORITY_BACKGROUND,
+        mode: str = "full",
+    ) -> list[QueuedRun]:
+        """``enqueue`` for several jobs in one transaction."""
+        runs = self._insert_many(job_ids, phase, priority, mode)
+        self._wake()
+        return runs
+
+    async def aenqueue_many(
+        self,
+        job_ids: list[str],
+        phase: str,
+        priority: int = PRIORITY_BACKGROUND,
+        mode: str = "full",
+    ) -> list[QueuedRun]:
+        """``enqueue_many`` without blocking the event loop."""
+        runs = await asyncio.to_thread(self._insert_many, job_ids, phase, priority, mode)
+        self._wake()
+        return runs
+
+    def cancel(self, job_id: str, phase: Optional[str] = None) -> list[QueuedRun]:
+        """Cancel the job's active runs (for one phase, or all); returns them."""
+        runs = self._cancel_rows(job_id, phase)
+        self._stop_cancelled(job_id, runs)
+        return runs
+
+    async def acancel(self, job_id: str, phase: Optional[str] = None) -> list[QueuedRun]:
+        """``cancel`` without blocking the event loop."""
+        runs = await asyncio.to_thread(self._cancel_rows, job_id, phase)
+        self._stop_cancelled(job_id, runs)
+        return runs
+
+    def get(self, run_id: int) -> Optional[QueuedRun]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return _to_run(row) if row else None
+
+    async def aget(self, run_id: int) -> Optional[QueuedRun]:
+        """``get`` without blocking the event loop."""
+        return await asyncio.to_thread(self.get, run_id)
+
+    def active(self, job_id: str) -> list[QueuedRun]:
+        """Queued and running runs for a job."""
+        with self._lock:
+            return self._active_runs(job_id)
+
+    def position(self, run_id: int) -> int:
+        """Number of queued runs that will be claimed before this one."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT priority FROM runs WHERE id = ? AND status = 'queued'", (run_id,)
+            ).fetchone()
+            if row is None:
+                return 0
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM runs WHERE status = 'queued' "
+                "AND (priority > ? OR (priority = ? AND id < ?))",
+                (row["priority"], row["priority"], run_id),
+            ).fetchone()[0]
+
+    async def start(self) -> None:
+        """Start the workers and the heartbeat renewing their leases.
+
+        Runs interrupted by a crash are not reset here — other processes may
+        still own them — but are claimed again once their lease expires.
+        """
+        if self._worker_tasks or self.workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"pipeline-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._worker_tasks.append(
+            asyncio.create_task(self._heartbeat(), name="pipeline-heartbeat")
+        )
+
+    async def stop(self) -> None:
+        """Stop the workers. Runs they were executing go back to the queue."""
+        tasks, self._worker_tasks = self._worker_tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ── Workers ─────────────────────────────────────────────────
+
+    async def _worker(self) -> None:
+        failures = 0
+        while True:
+            try:
+                run = await self._claim_next()
+                if run is None:
+                    self._wakeup.clear()
+                    # Re-check after clearing so a concurrent enqueue isn't missed
+                    run = await self._claim_next()
+            except Exception:
+                failures += 1
+                delay = min(self.poll_seconds * 2 ** failures, MAX_BACKOFF_SECONDS)
+                logger.warning(
+                    "Claiming a pipeline run failed; retrying in %.1fs", delay, exc_info=True
+                )
+                await asyncio.sleep(delay)
+                continue
+            failures = 0
+            if run is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(run)
+
+    async def _heartbeat(self) -> None:
+        """Renew leases of local runs; cancel those this worker no longer owns.
+
+        A failed renewal is retried on the next beat; the lease outlives two
+        missed beats.
+        """
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                lost = await asyncio.to_thread(self._renew_leases, list(self._running))
+            except Exception:
+                logger.warning("Renewing pipeline run leases failed", exc_info=True)
+                continue
+            for run_id in lost:
+                task = self._running.get(run_id)
+                if task is not None:
+                    logger.info("Pipeline run %s was cancelled or reclaimed; stopping it", run_id)
+                    task.cancel()
+
+    async def _execute(self, run: QueuedRun) -> None:
+        task = asyncio.create_task(self.runner(run.job_id, run.phase, run.mode))
+        self._running[run.id] = task
+        try:
+            await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done():
+                # The worker itself is stopping: abandon the run, it resumes
+                # from the queue on the next start
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                self._requeue(run.id)
+                raise
+            # The run was cancelled via cancel() or a heartbeat found it
+            # cancelled elsewhere; its row is already final
+        except Exception as exc:
+            logger.exception("Pipeline run %s (%s %s) failed", run.id, run.job_id, run.phase)
+            await self._record(run.id, "failed", str(exc))
+        else:
+            await self._record(run.id, "done", "")
+        finally:
+            self._running.pop(run.id, None)
+
+    async def _claim_next(self) -> Optional[QueuedRun]:
+        """``_claim`` in a thread; a run claimed as the worker stops goes back."""
+        claim = asyncio.ensure_future(asyncio.to_thread(self._claim))
+        try:
+            return await asyncio.shield(claim)
+        except asyncio.CancelledError:
+            run = await claim
+            if run is not None:
+                self._requeue(run.id)
+            raise
+
+    async def _record(self, run_id: int, status: str, error: str) -> None:
+        # Finish recording even if the worker is being stopped meanwhile
+        write = asyncio.ensure_future(asyncio.to_thread(self._complete, run_id, status, error))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            await asyncio.gather(write, return_exceptions=True)
+            raise
+        except Exception:
+            # The lease lapses without heartbeats, so the run is claimed again
+            logger.exception("Recording the outcome of pipeline run %s failed", run_id)
+
+    def _claim(self) -> Optional[QueuedRun]:
+        """Atomically lease the next claimable run and return it.
+
+        Claimable runs are queued ones and running ones whose lease expired.
+        Those already claimed ``max_attempts`` times are marked failed instead.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        "SELECT * FROM runs WHERE status = 'queued' OR (status = 'running' "
+                        "AND (lease_expires_at IS NULL OR lease_expires_at < ?)) "
+                        "ORDER BY priority DESC, id ASC LIMIT 1",
+                        (now,),
+                    ).fetchone()
+                    if row is None or row["attempts"] < self.max_attempts:
+                        break
+                    logger.error(
+                        "Pipeline run %s (%s %s) gave up after %d attempts",
+                        row["id"], row["job_id"], row["phase"], row["attempts"],
+                    )
+                    self._conn.execute(
+                        "UPDATE runs SET status = 'failed', error = ?, finished_at = ?, "
+                        "lease_expires_at = NULL WHERE id = ?",
+                        (f"Gave up after {row['attempts']} attempts", now, row["id"]),
+                    )
+                if row is None:
+                    self._conn.commit()
+                    return None
+                self._conn.execute(
+                    "UPDATE runs SET status = 'running', started_at = ?, attempts = attempts + 1, "
+                    "worker_id = ?, lease_expires_at = ? WHERE id = ?",
+                    (now, self.worker_id, now + self.lease_seconds, row["id"]),
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        if row["status"] == "running":
+            logger.warning(
+                "Reclaiming pipeline run %s from %s (lease expired)", row["id"], row["worker_id"]
+            )
+        run = _to_run(row)
+        run.status = "running"
+        run.attempts += 1
+        run.worker_id = self.worker_id
+        return run
+
+    def _renew_leases(self, run_ids: list[int]) -> list[int]:
+        """Extend the leases of the given local runs; returns ids this worker lost."""
+        lost = []
+        expires = time.time() + self.lease_seconds
+        with self._lock:
+            for run_id in run_ids:
+                renewed = self._conn.execute(
+                    "UPDATE runs SET lease_expires_at = ? "
+                    "WHERE id = ? AND status = 'running' AND worker_id = ?",
+                    (expires, run_id, self.worker_id),
+                ).rowcount
+                if not renewed:
+                    lost.append(run_id)
+            self._conn.commit()
+        return lost
+
+    def _complete(self, run_id: int, status: str, error: str) -> None:
+        with self._lock:
+            # Only while we own it: a cancel or a reclaim may have taken it over
+            self._conn.execute(
+                "UPDATE runs SET status = ?, error = ?, finished_at = ?, lease_expires_at = NULL "
+                "WHERE id = ? AND status = 'running' AND worker_id = ?",
+                (status, error, time.time(), run_id, self.worker_id),
+            )
+            self._conn.commit()
+
+    def _requeue(self, run_id: int) -> None:
+        # A graceful stop is not a failed attempt
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = 'queued', started_at = NULL, lease_expires_at = NULL, "
+                "attempts = MAX(attempts - 1, 0) "
+                "WHERE id = ? AND status = 'running' AND worker_id = ?",
+                (run_id, self.worker_id),
+            )
+            self._conn.commit()
+
+    # ── Internals ───────────────────────────────────────────────
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _insert(self, job_id: str, phase: str, priority: int, mode: str) -> QueuedRun:
+        return self._insert_many([job_id], phase, priority, mode)[0]
+
+    def _insert_many(
+        self, job_ids: list[str], phase: str, priority: int, mode: str
+    ) -> list[QueuedRun]:
+        with self._lock:
+            # Write lock up front: another process can't queue the same run in between
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                runs = [self._insert_row(job_id, phase, priority, mode) for job_id in job_ids]
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return runs
+
+    def _insert_row(self, job_id: str, phase: str, priority: int, mode: str) -> QueuedRun:
+        # Caller holds the lock and commits
+        existing = self._active(job_id, phase)
+        if existing is not None:
+            upgraded = (
+                max(priority, existing.priority),
+                "full" if mode == "full" else existing.mode,
+            )
+            if existing.status == "queued" and upgraded != (existing.priority, existing.mode):
+                self._conn.execute(
+                    "UPDATE runs SET priority = ?, mode = ? WHERE id = ?",
+                    (*upgraded, existing.id),
+                )
+                existing.priority, existing.mode = upgraded
+            return existing
+        cursor = self._conn.execute(
+            "INSERT INTO runs (job_id, phase, priority, status, created_at, mode) "
+            "VALUES (?, ?, ?, 'queued', ?, ?)",
+            (job_id, phase, priority, time.time(), mode),
+        )
+        return QueuedRun(cursor.lastrowid, job_id, phase, priority, "queued", mode=mode)
+
+    def _cancel_rows(self, job_id: str, phase: Optional[str]) -> list[QueuedRun]:
+        with self._lock:
+            runs = [
+                run for run in self._active_runs(job_id)
+                if phase is None or run.phase == phase
+            ]
+            for run in runs:
+                self._finish(run.id, "cancelled", "")
+        return runs
+
+    def _stop_cancelled(self, job_id: str, runs: list[QueuedRun]) -> None:
+        for run in runs:
+            task = self._running.get(run.id)
+            if task is not None:
+                task.cancel()
+            elif not event_bus.is_running(job_id):
+                # Never started: release anyone streaming its progress
+                event_bus.notify_finished(job_id)
+
+    def _active(self, job_id: str, phase: str) -> Optional[QueuedRun]:
+        row = self._conn.execute(
+            "SELECT * FROM runs WHERE job_id = ? AND phase = ? "
+            "AND status IN ('queued', 'running')",
+            (job_id, phase),
+        ).fetchone()
+        return _to_run(row) if row else None
+
+    def _active_runs(self, job_id: str) -> list[QueuedRun]:
+        rows = self._conn.execute(
+            "SELECT * FROM runs WHERE job_id = ? AND status IN ('queued', 'running') "
+            "ORDER BY id",
+            (job_id,),
+        ).fetchall()
+        return [_to_run(row) for row in rows]
+
+    def _finish(self, run_id: int, status: str, error: str) -> None:
+        self._conn.execute(
+            "UPDATE runs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, error, time.time(), run_id),
+        )
+        self._conn.commit()
+
+
+def _to_run(row: sqlite3.Row) -> QueuedRun:
+    return QueuedRun(
+        id=row["id"],
+        job_id=row["job_id"],
+        phase=row["phase"],
+        priority=row["priority"],
+        status=row["status"],
+        attempts=row["attempts"],
+        error=row["error"],
+        worker_id=row["worker_id"],
+        mode=row["mode"],
+    )
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            settings.PIPELINE_QUEUE_PATH,
+            workers=settings.PIPELINE_QUEUE_WORKERS,
+            lease_seconds=settings.PIPELINE_LEASE_SECONDS,
+            max_attempts=settings.PIPELINE_MAX_ATTEMPTS,
+        )
+    return _job_queue
+
+
+async def stop_job_queue() -> None:
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.stop()
+        _job_queue.close()
+        _job_queue = None
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import random
+import re
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
-from typing import Optional
+from typing import Awaitable, Callable, Iterator, Optional, TypeVar
+
+import httpx
 
 import google.genai
 from google.genai.types import Content
 
 from app.config import settings
+from app.services.context_cache import ContextCacheManager
+from app.services.rate_limiter import estimate_tokens, rate_limiter
+from app.services.response_cache import CachedResponse, ResponseCache, make_cache_key
 
 # Use the latest stable model with best quality/cost balance
 MODEL = "models/gemini-2.5-flash"
@@ -15,6 +25,50 @@ MODEL = "models/gemini-2.5-flash"
 # Initialize client with API key
 client = google.genai.Client(api_key=settings.GEMINI_API_KEY) if settings.GEMINI_API_KEY else None
 
+# Server-side cached-content objects for large shared reference bundles
+context_cache = (
+    ContextCacheManager(client, ttl_seconds=settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS)
+    if client and settings.GEMINI_CONTEXT_CACHE_ENABLED
+    else None
+)
+
+# Caps the number of Gemini calls in flight across every running pipeline.
+# Created lazily so it binds to the running event loop.
+_llm_semaphore: Optional[asyncio.BoundedSemaphore] = None
+
+# Persistent response cache, opened on first use (disabled when LLM_CACHE_PATH is empty).
+_response_cache: Optional[ResponseCache] = None
+
+# Set to True to skip the response cache for every LLM call in the current
+# context (e.g. an explicit "regenerate" that should produce a fresh answer).
+bypass_response_cache: ContextVar[bool] = ContextVar("bypass_response_cache", default=False)
+
+# Monotonic time by which LLM calls in the current context must finish
+# (set per section by the pipeline executor). Retries that would run past
+# it are not attempted.
+llm_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+class StreamSink:
+    """Receiver for output chunks while an LLM call streams."""
+
+    def write(self, text: str) -> None:
+        pass
+
+    def reset(self) -> None:
+        """Discard output written so far (the call is starting over)."""
+
+
+# When set, async calls stream the response and feed each chunk to this sink
+# (set per section by the pipeline executor); otherwise they wait for the
+# complete response.
+stream_sink: ContextVar[Optional[StreamSink]] = ContextVar("stream_sink", default=None)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
 
 @dataclass
 class GenerationResult:
@@ -22,6 +76,322 @@ class GenerationResult:
     model: str
     tokens_used: int
     generation_time_ms: int
+    cache_hits: int = 0
+    cache_misses: int = 0
+    cached_tokens: int = 0
+    retries: int = 0
+    prompt_tokens: int = 0  # input size as reported by the provider (local estimate on cache hits)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient LLM errors.
+
+    Attempt ``n`` (0-based) waits a random time up to
+    ``min(max_delay, base_delay * 2**n)``, unless the server says how long
+    to wait via Retry-After / RetryInfo.
+    """
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy(
+    max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+    base_delay=settings.LLM_RETRY_BASE_DELAY,
+    max_delay=settings.LLM_RETRY_MAX_DELAY,
+)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound the LLM calls made in this context (including retries) to ``seconds``."""
+    if seconds is None:
+        yield
+        return
+    token = llm_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        llm_deadline.reset(token)
+
+
+def _get_llm_semaphore() -> asyncio.BoundedSemaphore:
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.BoundedSemaphore(
+            settings.process_share(settings.LLM_MAX_CONCURRENCY)
+        )
+    return _llm_semaphore
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    global _response_cache
+    if _response_cache is None and settings.LLM_CACHE_PATH:
+        _response_cache = ResponseCache(
+            settings.LLM_CACHE_PATH,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+            max_bytes=settings.LLM_CACHE_MAX_BYTES,
+        )
+    return _response_cache
+
+
+def _cache_lookup(
+    config: dict, user: str, bypass_cache: bool
+) -> tuple[Optional[str], Optional[GenerationResult]]:
+    """Return (cache key, cached result). The key is None when caching is skipped."""
+    cache = get_response_cache()
+    if cache is None or bypass_cache or bypass_response_cache.get():
+        return None, None
+
+    start = time.perf_counter()
+    key = make_cache_key(
+        model=MODEL,
+        system=config["system_instruction"],
+        user=user,
+        temperature=config["temperature"],
+        max_tokens=config["max_output_tokens"],
+        tools=config.get("tools"),
+    )
+    hit = cache.get(key)
+    if hit is None:
+        return key, None
+
+    elapsed_ms = int((time.perf_counter() - start) * 1000)
+    print(f"\n--- LLM CACHE HIT ({hit.model}) [key: {key[:12]}, time: {elapsed_ms}ms] ---\n")
+    return key, GenerationResult(
+        content_md=hit.content_md,
+        model=hit.model,
+        tokens_used=0,
+        generation_time_ms=elapsed_ms,
+        cache_hits=1,
+        prompt_tokens=estimate_tokens(config["system_instruction"], user),
+    )
+
+
+def _cache_store(key: Optional[str], result: GenerationResult) -> GenerationResult:
+    """Record a cache miss and persist the fresh result under ``key``."""
+    if key is None:
+        return result
+    result.cache_misses = 1
+    cache = get_response_cache()
+    if cache is not None and result.content_md:
+        cache.set(key, CachedResponse(
+            content_md=result.content_md,
+            model=result.model,
+            tokens_used=result.tokens_used,
+            generation_time_ms=result.generation_time_ms,
+        ))
+    return result
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, (httpx.TimeoutException, httpx.NetworkError)):
+        return True
+    return getattr(exc, "code", None) in RETRYABLE_STATUS_CODES
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Server-requested wait in seconds, from Retry-After or Gemini RetryInfo."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    details = getattr(exc, "details", None)
+    if isinstance(details, dict):
+        for detail in details.get("error", {}).get("details", []) or []:
+            match = re.fullmatch(r"([\d.]+)s", str(detail.get("retryDelay", "")))
+            if match:
+                return float(match.group(1))
+    return None
+
+
+def _retry_delay(exc: Exception, attempt: int, policy: RetryPolicy) -> Optional[float]:
+    """Seconds to wait before retrying after ``attempt`` failed, or None to give up."""
+    if not _is_retryable(exc) or attempt + 1 >= policy.max_attempts:
+        return None
+    delay = _retry_after(exc)
+    if delay is None:
+        delay = policy.backoff(attempt)
+    deadline_at = llm_deadline.get()
+    if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+        return None
+    return delay
+
+
+def _with_retries(call: Callable[[], T], policy: RetryPolicy) -> tuple[T, int]:
+    """Run ``call`` under ``policy``; returns (result, number of retries)."""
+    attempt = 0
+    while True:
+        try:
+            return call(), attempt
+        except Exception as e:
+            delay = _retry_delay(e, attempt, policy)
+            if delay is None:
+                raise
+            attempt += 1
+            print(f"Gemini call failed ({e}); retry {attempt} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+async def _with_retries_async(
+    call: Callable[[], Awaitable[T]], policy: RetryPolicy
+) -> tuple[T, int]:
+    """Async ``_with_retries``: backs off with asyncio.sleep, so waiting
+    never holds an LLM concurrency slot or blocks the event loop."""
+    attempt = 0
+    while True:
+        try:
+            return await call(), attempt
+        except Exception as e:
+            delay = _retry_delay(e, attempt, policy)
+            if delay is None:
+                raise
+            attempt += 1
+            print(f"Gemini call failed ({e}); retry {attempt} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class _StreamedResponse:
+    """A streamed response reassembled into the shape ``_finish`` expects."""
+    text: str
+    usage_metadata: object = None
+
+
+async def _generate_async(config: dict, user: str):
+    """Call Gemini, streaming into the current ``stream_sink`` if one is set."""
+    sink = stream_sink.get()
+    if sink is None:
+        return await client.aio.models.generate_content(
+            model=MODEL,
+            contents=_build_contents(user),
+            config=config,
+        )
+
+    sink.reset()
+    parts: list[str] = []
+    usage = None
+    async for chunk in await client.aio.models.generate_content_stream(
+        model=MODEL,
+        contents=_build_contents(user),
+        config=config,
+    ):
+        text = chunk.text
+        if text:
+            parts.append(text)
+            sink.write(text)
+        # Usage is reported on the final chunk
+        usage = getattr(chunk, "usage_metadata", None) or usage
+    return _StreamedResponse(text="".join(parts), usage_metadata=usage)
+
+
+def _build_contents(user: str) -> list[dict]:
+    return [
+        {
+            "role": "user",
+            "parts": [{"text": user}]
+        }
+    ]
+
+
+def _build_config(
+    *,
+    system: str,
+    max_tokens: int,
+    temperature: float,
+    use_web_search: bool,
+) -> dict:
+    # google.genai uses system_instruction parameter for role/context
+    config = {
+        "system_instruction": system,
+        "temperature": temperature,
+        "max_output_tokens": max_tokens,
+    }
+
+    # Enable web search if requested
+    if use_web_search:
+        config["tools"] = [{"google_search": {}}]
+
+    return config
+
+
+def _build_cached_config(*, cache_name: str, max_tokens: int, temperature: float) -> dict:
+    # System instruction and reference material live in the cached content;
+    # Gemini rejects requests that set them again alongside cached_content.
+    return {
+        "cached_content": cache_name,
+        "temperature": temperature,
+        "max_output_tokens": max_tokens,
+    }
+
+
+def _is_missing_cache_error(exc: Exception) -> bool:
+    """True if Gemini rejected a request because its cached content is gone."""
+    return getattr(exc, "code", None) in (403, 404)
+
+
+def _with_cached_content(system: str, cached_content: str | None) -> str:
+    """Prepend cached reference material to the system instruction."""
+    if cached_content:
+        return f"{system}\n\n## CACHED REFERENCE MATERIAL\n{cached_content}"
+    return system
+
+
+def _usage_tokens(response) -> tuple[int, int]:
+    """Return (total tokens, cached-content tokens) from response usage metadata."""
+    tokens = 0
+    cache_tokens = 0
+    if hasattr(response, 'usage_metadata') and response.usage_metadata:
+        tokens = (
+            (response.usage_metadata.prompt_token_count or 0) +
+            (response.usage_metadata.candidates_token_count or 0)
+        )
+        if hasattr(response.usage_metadata, 'cached_content_input_token_count'):
+            cache_tokens = response.usage_metadata.cached_content_input_token_count or 0
+    return tokens, cache_tokens
+
+
+def _prompt_tokens(response) -> int:
+    """Input tokens from response usage metadata (0 if not reported)."""
+    usage = getattr(response, "usage_metadata", None)
+    return (getattr(usage, "prompt_token_count", None) or 0) if usage else 0
+
+
+def _finish(
+    response, start: float, retries: int = 0, prompt_estimate: int = 0
+) -> GenerationResult:
+    """Build a GenerationResult from a Gemini response and log the output.
+
+    ``prompt_estimate`` stands in for the prompt size when the response does
+    not report usage.
+    """
+    content_md = response.text
+    tokens, cache_tokens = _usage_tokens(response)
+    prompt_tokens = _prompt_tokens(response) or prompt_estimate
+
+    elapsed_ms = int((time.perf_counter() - start) * 1000)
+    cache_note = f" [cache hits: {cache_tokens}]" if cache_tokens > 0 else ""
+    if retries:
+        cache_note += f" [retries: {retries}]"
+
+    print(f"\n--- LLM OUTPUT START ({MODEL}) [tokens: {tokens}{cache_note}, time: {elapsed_ms}ms] ---\n{content_md}\n--- LLM OUTPUT END ---\n")
+
+    return GenerationResult(
+        content_md=content_md,
+        model=MODEL,
+        tokens_used=tokens,
+        generation_time_ms=elapsed_ms,
+        cached_tokens=cache_tokens,
+        retries=retries,
+        prompt_tokens=prompt_tokens,
+    )
 
 
 def call_llm(
@@ -31,6 +401,8 @@ def call_llm(
     max_tokens: int = 4000,
     temperature: float = 0.3,
     use_web_search: bool = True,
+    bypass_cache: bool = False,
+    retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY,
 ) -> GenerationResult:
     """
     Generate content using google.genai (Gemini API).
@@ -40,60 +412,95 @@ def call_llm(
     - Temperature control for creativity/determinism
     - Output token limits
     - Token counting for tracking usage
+    - Response caching (skip with ``bypass_cache=True``)
+    - Retries with jittered backoff on 429/5xx (see ``RetryPolicy``)
+    - Provider rate limits shared across the process (see ``rate_limiter``)
     """
     if not client:
         raise RuntimeError("GEMINI_API_KEY not configured")
 
-    start = time.perf_counter()
-
-    try:
-        # Build the request with system instruction
-        # google.genai uses system_instruction parameter for role/context
-        config = {
-            "system_instruction": system,
-            "temperature": temperature,
-            "max_output_tokens": max_tokens,
-        }
-        
-        # Enable web search if requested
-        if use_web_search:
-            config["tools"] = [{"google_search": {}}]
-        
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=[
-                {
-                    "role": "user",
-                    "parts": [{"text": user}]
-                }
-            ],
-            config=config
-        )
+    config = _build_config(
+        system=system,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        use_web_search=use_web_search,
+    )
+    key, cached = _cache_lookup(config, user, bypass_cache)
+    if cached is not None:
+        return cached
 
-        content_md = response.text
+    estimate = estimate_tokens(system, user, max_output=max_tokens)
 
-        # Extract token counts from usage metadata
-        tokens = 0
-        if hasattr(response, 'usage_metadata') and response.usage_metadata:
-            tokens = (
-                response.usage_metadata.prompt_token_count +
-                response.usage_metadata.candidates_token_count
+    def attempt():
+        with rate_limiter.limit_sync("gemini", MODEL, estimate, max_output=max_tokens) as usage:
+            response = client.models.generate_content(
+                model=MODEL,
+                contents=_build_contents(user),
+                config=config,
             )
+            usage.record(_usage_tokens(response)[0])
+            return response
 
+    start = time.perf_counter()
+
+    try:
+        response, retries = _with_retries(attempt, retry_policy)
     except Exception as e:
         print(f"Error calling Gemini API: {e}")
         raise
 
-    elapsed_ms = int((time.perf_counter() - start) * 1000)
+    return _cache_store(key, _finish(response, start, retries, estimate - max_tokens))
 
-    print(f"\n--- LLM OUTPUT START ({MODEL}) [tokens: {tokens}, time: {elapsed_ms}ms] ---\n{content_md}\n--- LLM OUTPUT END ---\n")
 
-    return GenerationResult(
-        content_md=content_md,
-        model=MODEL,
-        tokens_used=tokens,
-        generation_time_ms=elapsed_ms,
+async def call_llm_async(
+    *,
+    system: str,
+    user: str,
+    max_tokens: int = 4000,
+    temperature: float = 0.3,
+    use_web_search: bool = True,
+    bypass_cache: bool = False,
+    retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+) -> GenerationResult:
+    """
+    Async variant of ``call_llm`` built on the genai async client.
+
+    Awaits the network call directly instead of occupying a worker thread.
+    The number of concurrent calls is bounded by ``LLM_MAX_CONCURRENCY``;
+    retry backoff happens outside that bound. When a ``stream_sink`` is set
+    the response is streamed into it chunk by chunk.
+    """
+    if not client:
+        raise RuntimeError("GEMINI_API_KEY not configured")
+
+    config = _build_config(
+        system=system,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        use_web_search=use_web_search,
     )
+    key, cached = _cache_lookup(config, user, bypass_cache)
+    if cached is not None:
+        return cached
+
+    estimate = estimate_tokens(system, user, max_output=max_tokens)
+
+    async def attempt():
+        # Wait for rate-limit budget before taking a concurrency slot
+        async with rate_limiter.limit("gemini", MODEL, estimate, max_output=max_tokens) as usage:
+            async with _get_llm_semaphore():
+                response = await _generate_async(config, user)
+            usage.record(_usage_tokens(response)[0])
+            return response
+
+    start = time.perf_counter()
+    try:
+        response, retries = await _with_retries_async(attempt, retry_policy)
+    except Exception as e:
+        print(f"Error calling Gemini API: {e}")
+        raise
+
+    return _cache_store(key, _finish(response, start, retries, estimate - max_tokens))
 
 
 def call_llm_with_cache(
@@ -103,67 +510,141 @@ def call_llm_with_cache(
     cached_content: str | None = None,
     max_tokens: int = 4000,
     temperature: float = 0.3,
+    bypass_cache: bool = False,
+    retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY,
 ) -> GenerationResult:
     """
     Generate content with prompt caching for reference materials.
 
     Reduces latency and cost for repeated reference material (rubrics, frameworks).
-    Caches system instruction + large reference content.
+    The system instruction + reference content are stored once as a Gemini
+    cached-content object and reused by hash; if the bundle cannot be cached
+    it is sent inline as part of the system instruction instead.
     """
     if not client:
         raise RuntimeError("GEMINI_API_KEY not configured")
 
-    start = time.perf_counter()
+    config = _build_config(
+        system=_with_cached_content(system, cached_content),
+        max_tokens=max_tokens,
+        temperature=temperature,
+        use_web_search=False,
+    )
+    key, cached = _cache_lookup(config, user, bypass_cache)
+    if cached is not None:
+        return cached
 
-    try:
-        # Build contents with cache tokens if reference material is provided
-        contents = [
-            {
-                "role": "user",
-                "parts": [{"text": user}]
-            }
-        ]
-
-        # If cached content is provided, prepend it to the system instruction
-        system_instruction = system
-        if cached_content:
-            system_instruction = f"{system}\n\n## CACHED REFERENCE MATERIAL\n{cached_content}"
-
-        response = client.models.generate_content(
+    cache_name = None
+    if cached_content and context_cache is not None:
+        cache_name = context_cache.get_or_create(
+            model=MODEL, system=system, cached_content=cached_content
+        )
+
+    estimate = estimate_tokens(config["system_instruction"], user, max_output=max_tokens)
+
+    def generate():
+        nonlocal cache_name
+        if cache_name:
+            try:
+                return client.models.generate_content(
+                    model=MODEL,
+                    contents=_build_contents(user),
+                    config=_build_cached_config(
+                        cache_name=cache_name, max_tokens=max_tokens, temperature=temperature
+                    ),
+                )
+            except Exception as e:
+                if not _is_missing_cache_error(e):
+                    raise
+                # Cache vanished server-side; forget it and send inline.
+                context_cache.invalidate(cache_name)
+                cache_name = None
+        return client.models.generate_content(
             model=MODEL,
-            contents=contents,
-            config={
-                "system_instruction": system_instruction,
-                "temperature": temperature,
-                "max_output_tokens": max_tokens,
-            }
+            contents=_build_contents(user),
+            config=config,
         )
 
-        content_md = response.text
+    def attempt():
+        with rate_limiter.limit_sync("gemini", MODEL, estimate, max_output=max_tokens) as usage:
+            response = generate()
+            usage.record(_usage_tokens(response)[0])
+            return response
 
-        # Extract token counts - note cache hits use fewer tokens
-        tokens = 0
-        cache_tokens = 0
-        if hasattr(response, 'usage_metadata') and response.usage_metadata:
-            tokens = (
-                response.usage_metadata.prompt_token_count +
-                response.usage_metadata.candidates_token_count
-            )
-            if hasattr(response.usage_metadata, 'cached_content_input_token_count'):
-                cache_tokens = response.usage_metadata.cached_content_input_token_count
+    start = time.perf_counter()
 
+    try:
+        response, retries = _with_retries(attempt, retry_policy)
     except Exception as e:
         print(f"Error calling Gemini API with cache: {e}")
         raise
 
-    elapsed_ms = int((time.perf_counter() - start) * 1000)
-    cache_note = f" [cache hits: {cache_tokens}]" if cache_tokens > 0 else ""
+    return _cache_store(key, _finish(response, start, retries, estimate - max_tokens))
 
-    print(f"\n--- LLM OUTPUT START ({MODEL}) [tokens: {tokens}{cache_note}, time: {elapsed_ms}ms] ---\n{content_md}\n--- LLM OUTPUT END ---\n")
 
-    return GenerationResult(
-        content_md=content_md,
-        model=MODEL,
-        tokens_used=tokens,
-        generation_time_ms=elapsed_ms,
+async def call_llm_with_cache_async(
+    *,
+    system: str,
+    user: str,
+    cached_content: str | None = None,
+    max_tokens: int = 4000,
+    temperature: float = 0.3,
+    bypass_cache: bool = False,
+    retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+) -> GenerationResult:
+    """Async variant of ``call_llm_with_cache``."""
+    if not client:
+        raise RuntimeError("GEMINI_API_KEY not configured")
+
+    config = _build_config(
+        system=_with_cached_content(system, cached_content),
+        max_tokens=max_tokens,
+        temperature=temperature,
+        use_web_search=False,
     )
+    key, cached = _cache_lookup(config, user, bypass_cache)
+    if cached is not None:
+        return cached
+
+    cache_name = None
+    if cached_content and context_cache is not None:
+        cache_name = await context_cache.get_or_create_async(
+            model=MODEL, system=system, cached_content=cached_content
+        )
+
+    estimate = estimate_tokens(config["system_instruction"], user, max_output=max_tokens)
+
+    async def generate():
+        nonlocal cache_name
+        if cache_name:
+            try:
+                return await _generate_async(
+                    _build_cached_config(
+                        cache_name=cache_name, max_tokens=max_tokens, temperature=temperature
+                    ),
+                    user,
+                )
+            except Exception as e:
+                if not _is_missing_cache_error(e):
+                    raise
+                # Cache vanished server-side; forget it and send inline.
+                context_cache.invalidate(cache_name)
+                cache_name = None
+        return await _generate_async(config, user)
+
+    async def attempt():
+        # Wait for rate-limit budget before taking a concurrency slot
+        async with rate_limiter.limit("gemini", MODEL, estimate, max_output=max_tokens) as usage:
+            async with _get_llm_semaphore():
+                response = await generate()
+            usage.record(_usage_tokens(response)[0])
+            return response
+
+    start = time.perf_counter()
+    try:
+        response, retries = await _with_retries_async(attempt, retry_policy)
+    except Exception as e:
+        print(f"Error calling Gemini API with cache: {e}")
+        raise
+
+    return _cache_store(key, _finish(response, start, retries, estimate - max_tokens))
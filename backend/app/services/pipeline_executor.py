@@ -1,17 +1,37 @@
 """DAG-based pipeline executor.
 
 Runs section functions respecting their dependency graph. Sections whose
-dependencies are all satisfied run concurrently via asyncio. Progress is
-reported through an async callback so the router can stream SSE events.
+dependencies are all satisfied run concurrently via asyncio, up to
+this process's share of ``PIPELINE_MAX_CONCURRENCY`` across all runs,
+longest critical path first
+(see ``app.services.scheduler``). When a section fails, dependents that
+cannot run on partial context are skipped instead of paying for an LLM call
+whose output would be thrown away. Section functions are coroutines that
+await the async LLM client directly; the number of in-flight LLM calls is
+bounded inside ``llm_service``. Progress is
+yielded as ``PipelineEvent``s for the router to stream over SSE and published
+to the in-process event bus for status subscribers; while a section's LLM
+call streams, its output arrives as ``delta`` events.
+
+Every generated section stores a fingerprint of its inputs (JD text,
+dependency outputs, reference files, prompt source). In ``incremental`` mode
+a section whose stored fingerprint still matches is kept as is; only changed
+sections and everything downstream of them are regenerated.
 """
 from __future__ import annotations
 
 import asyncio
+import functools
+import hashlib
+import inspect
 import logging
 import re
-from typing import AsyncIterator, Callable, Optional
+import time
+from typing import AsyncIterator, Callable, Mapping, Optional
 
-from app.database import pb, record_to_dict, sanitize_pb_value, upsert_section
+from app.async_database import apb
+from app.config import settings
+from app.database import record_to_dict, sanitize_pb_value, section_writes
 from app.models import JobResponse, PipelineEvent
 from app.sections.config import (
     ANALYSIS_SECTIONS,
@@ -19,34 +39,67 @@ from app.sections.config import (
     SectionDef,
 )
 from app.sections.registry import SECTION_FUNCTIONS
-from app.services.reference_loader import load_references
+from app.services import search_index
+from app.services.event_bus import event_bus
+from app.services.llm_service import StreamSink, stream_sink
+from app.services.reference_loader import ReferenceSnapshot, get_reference_store
+from app.services.scheduler import DagScheduler, PrioritySlots, SectionDurations
 
 logger = logging.getLogger(__name__)
 
 
+RUN_MODES = ("full", "incremental")
+
+# Strong references to fire-and-forget tasks until they finish
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
 async def run_pipeline(
     job: JobResponse,
     phase: str,  # "analysis" | "cover_letter"
+    mode: str = "full",  # "full" | "incremental"
 ) -> AsyncIterator[PipelineEvent]:
-    """Execute all sections for a phase, yielding SSE events as they complete."""
+    """Execute all sections for a phase, yielding SSE events as they complete.
+
+    ``full`` regenerates every unlocked section; ``incremental`` only those
+    whose input fingerprint changed, plus their transitive dependents.
+    Every event is also published to the event bus for status subscribers.
+    """
+    event_bus.begin_run(job.id)
+    try:
+        async for event in _execute_phase(job, phase, mode):
+            yield event_bus.publish(job.id, event)
+    finally:
+        event_bus.end_run(job.id)
+
 
+async def _execute_phase(
+    job: JobResponse, phase: str, mode: str = "full"
+) -> AsyncIterator[PipelineEvent]:
     section_defs = ANALYSIS_SECTIONS if phase == "analysis" else COVER_LETTER_SECTIONS
+    incremental = mode == "incremental"
 
-    # Pre-load all reference files (cached, so cheap after first call)
-    refs = load_references(
-        "li_profile", "resume", "mnookin_rubric", "role_analysis_template",
-        "deep_analysis_reference", "quality_checklist", "hours_drivers",
-        "research_checklist", "hm_research_checklist", "strategy_checklist",
-        "glassdoor_method", "cover_letter_template", "approach", "cl_best_practices",
-    )
+    # One reference snapshot for the whole run, even if files are edited mid-run
+    refs = _load_all_references()
 
-    # Load any already-completed sections (for cover_letter phase, includes analysis)
+    # Load any already-completed sections (for cover_letter phase, includes
+    # analysis; incremental runs compare against this phase's too)
     completed: dict[str, str] = {}
-    if phase == "cover_letter":
-        completed = _load_completed_sections(job.id)
+    stored_fingerprints: dict[str, str] = {}
+    if phase == "cover_letter" or incremental:
+        for d in await _load_completed_records(job.id):
+            completed[d["section_key"]] = d["content_md"]
+            stored_fingerprints[d["section_key"]] = d.get("input_fingerprint") or ""
 
     # Track which sections are locked (skip generation)
-    locked_keys = _get_locked_keys(job.id)
+    locked_keys = await _get_locked_keys(job.id)
 
     # Build pending set (skip locked sections that already have content)
     pending_defs = []
@@ -57,96 +110,226 @@ async def run_pipeline(
         else:
             pending_defs.append(sd)
 
-    # DAG execution: keep running until all pending sections are done
-    in_flight: dict[str, asyncio.Task] = {}
-    done_keys: set[str] = set(completed.keys())
-    failed_keys: set[str] = set()
-
-    while pending_defs or in_flight:
-        # Find sections whose deps are all satisfied and not yet launched
-        ready = [
-            sd for sd in pending_defs
-            if all(dep in done_keys for dep in sd.depends_on)
-        ]
-
-        for sd in ready:
-            pending_defs.remove(sd)
-            # Mark running in DB
-            _update_section_status(job.id, sd, "running")
-            yield PipelineEvent(section_key=sd.key, status="running")
-
-            task = asyncio.create_task(
-                _run_section(sd, job, refs, completed)
-            )
-            in_flight[sd.key] = task
-
-        if not in_flight:
-            # Nothing in flight and nothing ready — shouldn't happen unless
-            # deps reference a failed section. Break to avoid infinite loop.
-            break
-
-        # Wait for at least one task to finish
-        done_tasks, _ = await asyncio.wait(
-            in_flight.values(),
-            return_when=asyncio.FIRST_COMPLETED,
-        )
-
-        for task in done_tasks:
-            # Find which key this task belongs to
-            key = next(k for k, t in in_flight.items() if t is task)
-            del in_flight[key]
-
-            sd = next(s for s in section_defs if s.key == key)
-
-            try:
-                result = task.result()
-                completed[key] = result.content_md
-                done_keys.add(key)
-
-                # Persist to DB
-                _save_section_result(job.id, sd, result)
-
-                # Special: evidence_cleanup also populates jobs.jd_cleaned
-                if key == "evidence_cleanup":
-                    _set_jd_cleaned(job.id, result.content_md)
-
-                # Special: hours_estimate populates jobs.hours
-                if key == "hours_estimate":
-                    _extract_hours(job.id, result.content_md)
-
-                yield PipelineEvent(
-                    section_key=key,
-                    status="complete",
-                    content_md=result.content_md,
-                )
-
-            except Exception as exc:
-                logger.exception("Section %s failed", key)
-                failed_keys.add(key)
-                done_keys.add(key)  # treat as done so dependents can detect
-                _update_section_status(job.id, sd, "failed", str(exc))
-                yield PipelineEvent(
-                    section_key=key,
-                    status="failed",
-                    error_message=str(exc),
-                )
+    async for event in _run_sections(
+        job, pending_defs, refs, completed,
+        stored_fingerprints=stored_fingerprints if incremental else None,
+    ):
+        yield event
 
     # After all sections complete, extract score/hours/verdict from final_verdict
     if phase == "analysis" and "final_verdict" in completed:
-        _extract_verdict_metadata(job.id, completed["final_verdict"])
+        await _extract_verdict_metadata(job.id, completed["final_verdict"])
 
     # Update pipeline stage
     if phase == "analysis":
-        _set_pipeline_stage(job.id, "analyzed")
+        await _set_pipeline_stage(job.id, "analyzed")
     elif phase == "cover_letter":
-        _set_pipeline_stage(job.id, "ready")
+        await _set_pipeline_stage(job.id, "ready")
+
+
+async def _run_sections(
+    job: JobResponse,
+    pending_defs: list[SectionDef],
+    refs: ReferenceSnapshot,
+    completed: dict[str, str],
+    stored_fingerprints: Optional[dict[str, str]] = None,
+    priority_boost: float = 0.0,
+    bypass_cache: bool = False,
+) -> AsyncIterator[PipelineEvent]:
+    """Run ``pending_defs`` over their dependency DAG, yielding events.
+
+    ``completed`` holds the output of sections outside the run and is updated
+    with each section that finishes. With ``stored_fingerprints`` (incremental
+    mode) a section whose inputs are unchanged keeps its stored output.
+    """
+    refs_digest = refs.digest
+
+    # DAG execution: launch sections as their dependencies finish, longest
+    # critical path first
+    await _load_duration_history()
+    # Earlier output of a section in this run doesn't satisfy its dependents
+    pending_keys = {sd.key for sd in pending_defs}
+    scheduler = DagScheduler(
+        pending_defs,
+        [key for key in completed if key not in pending_keys],
+        section_durations.estimate,
+    )
+    in_flight: dict[asyncio.Task, SectionDef] = {}
+    # Fingerprint of the inputs each launched section runs on
+    fingerprints: dict[str, str] = {}
+    # Sections that failed or were skipped in this run
+    unavailable: set[str] = set()
+    # Sections generated in this run (their dependents are never reused)
+    regenerated: set[str] = set()
+    # Streamed output from running sections, and the pending read of it
+    deltas: asyncio.Queue[PipelineEvent] = asyncio.Queue()
+    next_delta: Optional[asyncio.Future] = None
+    # Job updates running beside the DAG (hours extraction)
+    side_tasks: list[asyncio.Task] = []
+
+    try:
+        while True:
+            # Skipping a section can make its own dependents ready, so drain
+            # the ready queue until it stays empty.
+            while ready := scheduler.pop_ready():
+                for sd in ready:
+                    reason = _skip_reason(sd, unavailable)
+                    if reason:
+                        unavailable.add(sd.key)
+                        scheduler.mark_done(sd.key)
+                        _update_section_status(job.id, sd, "skipped", reason)
+                        yield PipelineEvent(
+                            section_key=sd.key, status="skipped", error_message=reason
+                        )
+                        continue
+
+                    fingerprints[sd.key] = _input_fingerprint(sd, job, refs_digest, completed)
+                    if (
+                        stored_fingerprints is not None
+                        and sd.key in completed
+                        and stored_fingerprints.get(sd.key) == fingerprints[sd.key]
+                        and not regenerated.intersection(sd.inputs)
+                    ):
+                        # Inputs unchanged: keep the stored output
+                        scheduler.mark_done(sd.key)
+                        yield PipelineEvent(section_key=sd.key, status="complete")
+                        continue
+
+                    # Mark running in DB
+                    _update_section_status(job.id, sd, "running")
+                    yield PipelineEvent(section_key=sd.key, status="running")
+
+                    task = asyncio.create_task(_run_scheduled_section(
+                        sd, scheduler.priority[sd.key] + priority_boost, job, refs, completed,
+                        deltas.put_nowait, bypass_cache,
+                    ))
+                    in_flight[task] = sd
+
+            if not in_flight:
+                # Anything still pending depends on a section outside this run
+                # that never completed: skip it, naming that dependency.
+                missing = scheduler.release_missing()
+                if not missing:
+                    break
+                unavailable.update(missing)
+                continue
+
+            # Wait for at least one task to finish or stream more output
+            if next_delta is None:
+                next_delta = asyncio.ensure_future(deltas.get())
+            done_tasks, _ = await asyncio.wait(
+                [*in_flight, next_delta],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+            # Emit streamed output first: a finished section's last chunks are
+            # already queued and must precede its "complete" event.
+            streamed = []
+            if next_delta in done_tasks:
+                done_tasks.discard(next_delta)
+                streamed.append(next_delta.result())
+                next_delta = None
+            while not deltas.empty():
+                streamed.append(deltas.get_nowait())
+            for event in _coalesce_deltas(streamed):
+                yield event
+
+            # Stage results for every finished task, then persist them in one
+            # flush before emitting their terminal events.
+            events: list[PipelineEvent] = []
+            for task in done_tasks:
+                sd = in_flight.pop(task)
+                key = sd.key
+
+                try:
+                    result = task.result()
+                    completed[key] = result.content_md
+                    regenerated.add(key)
+                    if not getattr(result, "cache_hits", 0):
+                        section_durations.record(key, result.generation_time_ms)
+
+                    # Persist to DB
+                    await _save_section_result(job.id, sd, result, fingerprints[key])
+
+                    # Special: evidence_cleanup also populates jobs.jd_cleaned
+                    if key == "evidence_cleanup":
+                        await _set_jd_cleaned(job.id, result.content_md)
+
+                    # Special: hours_estimate populates jobs.hours. It's an
+                    # LLM call, so it runs beside the DAG instead of holding
+                    # up the loop.
+                    if key == "hours_estimate":
+                        side_tasks.append(_spawn(_extract_hours(job.id, result.content_md)))
+
+                    events.append(PipelineEvent(
+                        section_key=key,
+                        status="complete",
+                        content_md=result.content_md,
+                    ))
+
+                except Exception as exc:
+                    logger.exception("Section %s failed", key)
+                    unavailable.add(key)
+                    _update_section_status(job.id, sd, "failed", str(exc))
+                    events.append(PipelineEvent(
+                        section_key=key,
+                        status="failed",
+                        error_message=str(exc),
+                    ))
+
+                # Dependents of a failed section are released too; _skip_reason
+                # decides whether they run on partial context.
+                scheduler.mark_done(key)
+
+            await section_writes.flush(job.id)
+            for event in events:
+                yield event
+    finally:
+        if next_delta is not None:
+            next_delta.cancel()
+        # Run abandoned (cancelled from the queue or the consumer went away):
+        # stop paying for sections nobody will save.
+        for task, sd in in_flight.items():
+            task.cancel()
+            _update_section_status(job.id, sd, "failed", "Cancelled")
+        if in_flight:
+            # The trailing flush is skipped on this path; without this the
+            # sections would stay "running" in PocketBase. Shielded so a
+            # repeated cancellation doesn't drop the write.
+            await asyncio.shield(_spawn(section_writes.flush(job.id)))
+
+    # Job updates made beside the DAG finish before the run does
+    if side_tasks:
+        await asyncio.gather(*side_tasks)
+    # Make sure every staged section write has landed before the run ends
+    await section_writes.flush(job.id)
 
 
 async def run_single_section(
     job: JobResponse,
     section_key: str,
+    bypass_cache: bool = False,
+) -> PipelineEvent:
+    """Regenerate a single section (used by the sections router).
+
+    With ``bypass_cache`` the LLM response cache is skipped so the section is
+    generated fresh even when its inputs are unchanged. The running and final
+    events are published to the event bus.
+    """
+    event_bus.begin_run(job.id)
+    try:
+        return event_bus.publish(
+            job.id, await _regenerate_section(job, section_key, bypass_cache)
+        )
+    finally:
+        event_bus.end_run(job.id)
+
+
+async def _regenerate_section(
+    job: JobResponse,
+    section_key: str,
+    bypass_cache: bool,
 ) -> PipelineEvent:
-    """Regenerate a single section (used by the sections router)."""
     from app.sections.config import ALL_SECTIONS
 
     sd = next((s for s in ALL_SECTIONS if s.key == section_key), None)
@@ -157,26 +340,29 @@ async def run_single_section(
             error_message=f"Unknown section key: {section_key}",
         )
 
-    refs = load_references(
-        "li_profile", "resume", "mnookin_rubric", "role_analysis_template",
-        "deep_analysis_reference", "quality_checklist", "hours_drivers",
-        "research_checklist", "hm_research_checklist", "strategy_checklist",
-        "glassdoor_method", "cover_letter_template", "approach", "cl_best_practices",
-    )
+    refs = _load_all_references()
 
-    completed = _load_completed_sections(job.id)
+    completed = await _load_completed_sections(job.id)
+    fingerprint = _input_fingerprint(sd, job, refs.digest, completed)
 
     _update_section_status(job.id, sd, "running")
+    event_bus.publish(job.id, PipelineEvent(section_key=section_key, status="running"))
 
     try:
-        result = await _run_section(sd, job, refs, completed)
-        _save_section_result(job.id, sd, result)
+        # Interactive regenerations go ahead of queued pipeline sections
+        result = await _run_scheduled_section(
+            sd, float("inf"), job, refs, completed,
+            lambda event: event_bus.publish(job.id, event),
+            bypass_cache,
+        )
+        await _save_section_result(job.id, sd, result, fingerprint)
+        await section_writes.flush(job.id)
 
         if section_key == "evidence_cleanup":
-            _set_jd_cleaned(job.id, result.content_md)
+            await _set_jd_cleaned(job.id, result.content_md)
 
         if section_key == "hours_estimate":
-            _extract_hours(job.id, result.content_md)
+            await _extract_hours(job.id, result.content_md)
 
         return PipelineEvent(
             section_key=section_key,
@@ -186,6 +372,7 @@ async def run_single_section(
     except Exception as exc:
         logger.exception("Section %s failed", section_key)
         _update_section_status(job.id, sd, "failed", str(exc))
+        await section_writes.flush(job.id)
         return PipelineEvent(
             section_key=section_key,
             status="failed",
@@ -193,56 +380,324 @@ async def run_single_section(
         )
 
 
+async def run_cascade(
+    job: JobResponse,
+    section_key: str,
+    bypass_cache: bool = False,
+) -> AsyncIterator[PipelineEvent]:
+    """Regenerate a section, then everything downstream of it.
+
+    Dependents (transitively, by ``depends_on``) run as the DAG allows, in
+    parallel where it can. Locked sections keep their content and the
+    cascade doesn't continue through them: sections that depend only on
+    them have unchanged inputs. Events are also published to the event bus.
+    """
+    event_bus.begin_run(job.id)
+    try:
+        async for event in _execute_cascade(job, section_key, bypass_cache):
+            yield event_bus.publish(job.id, event)
+    finally:
+        event_bus.end_run(job.id)
+
+
+async def _execute_cascade(
+    job: JobResponse,
+    section_key: str,
+    bypass_cache: bool,
+) -> AsyncIterator[PipelineEvent]:
+    from app.sections.config import ALL_SECTIONS
+
+    if not any(sd.key == section_key for sd in ALL_SECTIONS):
+        yield PipelineEvent(
+            section_key=section_key,
+            status="failed",
+            error_message=f"Unknown section key: {section_key}",
+        )
+        return
+
+    locked_keys = await _get_locked_keys(job.id) - {section_key}
+    targets, kept = _downstream_sections(section_key, locked_keys)
+    for key in kept:
+        yield PipelineEvent(section_key=key, status="complete")
+
+    completed = await _load_completed_sections(job.id)
+    async for event in _run_sections(
+        job, targets, _load_all_references(), completed,
+        priority_boost=INTERACTIVE_PRIORITY_BOOST,
+        bypass_cache=bypass_cache,
+    ):
+        yield event
+
+    if any(sd.key == "final_verdict" for sd in targets) and "final_verdict" in completed:
+        await _extract_verdict_metadata(job.id, completed["final_verdict"])
+
+
 # ── Internal helpers ─────────────────────────────────────────────
 
-async def _run_section(
+# Historical generation times used to prioritise the critical path
+section_durations = SectionDurations()
+
+# Added to the critical-path priority of interactively requested sections so
+# they go ahead of queued pipeline sections
+INTERACTIVE_PRIORITY_BOOST = 1e12
+
+# Caps executing sections across all runs; created lazily so it binds to
+# the running event loop.
+_section_slots: Optional[PrioritySlots] = None
+
+
+def _downstream_sections(
+    section_key: str, locked_keys: set[str]
+) -> tuple[list[SectionDef], list[str]]:
+    """A section and its transitive dependents, in definition order.
+
+    Returns the sections to regenerate and the locked dependents left as
+    they are (the walk stops at those).
+    """
+    from app.sections.config import ALL_SECTIONS
+
+    dependents: dict[str, list[str]] = {}
+    for sd in ALL_SECTIONS:
+        for dep in sd.depends_on:
+            dependents.setdefault(dep, []).append(sd.key)
+
+    selected, kept = {section_key}, set()
+    frontier = [section_key]
+    while frontier:
+        for key in dependents.get(frontier.pop(), ()):
+            if key in locked_keys:
+                kept.add(key)
+            elif key not in selected:
+                selected.add(key)
+                frontier.append(key)
+    order = [sd.key for sd in ALL_SECTIONS]
+    return (
+        [sd for sd in ALL_SECTIONS if sd.key in selected],
+        sorted(kept, key=order.index),
+    )
+
+
+def _load_all_references() -> ReferenceSnapshot:
+    """The current snapshot of every reference file a section may use."""
+    return get_reference_store().snapshot()
+
+
+def _coalesce_deltas(events: list[PipelineEvent]) -> list[PipelineEvent]:
+    """Merge consecutive ``delta`` events for the same section into one."""
+    merged: list[PipelineEvent] = []
+    for event in events:
+        last = merged[-1] if merged else None
+        if (
+            last is not None
+            and event.status == "delta" == last.status
+            and event.section_key == last.section_key
+        ):
+            merged[-1] = PipelineEvent(
+                section_key=event.section_key,
+                status="delta",
+                content_md=(last.content_md or "") + (event.content_md or ""),
+            )
+        else:
+            merged.append(event)
+    return merged
+
+
+def _skip_reason(sd: SectionDef, unavailable: set[str]) -> Optional[str]:
+    """Return why a ready section should be skipped, or None to run it.
+
+    A section is skipped when a dependency failed or was skipped, unless it
+    allows partial context and at least one dependency is still available.
+    """
+    missing = [dep for dep in sd.depends_on if dep in unavailable]
+    if not missing:
+        return None
+    if sd.allow_partial_context and len(missing) < len(sd.depends_on):
+        return None
+    return f"Skipped: {', '.join(missing)} did not complete"
+
+
+def _get_section_slots() -> PrioritySlots:
+    global _section_slots
+    if _section_slots is None:
+        _section_slots = PrioritySlots(settings.process_share(settings.PIPELINE_MAX_CONCURRENCY))
+    return _section_slots
+
+
+async def _load_duration_history() -> None:
+    """Seed duration estimates from recently completed sections (once per process)."""
+    if section_durations.seeded:
+        return
+    try:
+        page = await apb.collection("sections").get_list(
+            1, 500,
+            query_params={
+                "filter": "status = 'complete' && generation_time_ms > 0",
+                "sort": "-updated",
+                "fields": "section_key,generation_time_ms",
+            },
+        )
+    except Exception:
+        logger.warning("Could not load section duration history", exc_info=True)
+        section_durations.seeded = True
+        return
+    section_durations.seed(
+        (d["section_key"], d.get("generation_time_ms") or 0)
+        for d in map(record_to_dict, page["items"])
+    )
+
+
+class _SectionStream(StreamSink):
+    """Turns streamed LLM output into ``delta`` events and periodic checkpoints.
+
+    Partial output is staged in the section write buffer at most once every
+    ``STREAM_CHECKPOINT_SECONDS``, never per chunk.
+    """
+
+    def __init__(self, job_id: str, sd: SectionDef, emit: Callable[[PipelineEvent], None]) -> None:
+        self.job_id = job_id
+        self.sd = sd
+        self.emit = emit
+        self.parts: list[str] = []
+        self._last_checkpoint = time.monotonic()
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+        self.emit(PipelineEvent(section_key=self.sd.key, status="delta", content_md=text))
+        now = time.monotonic()
+        if now - self._last_checkpoint >= settings.STREAM_CHECKPOINT_SECONDS:
+            self._last_checkpoint = now
+            section_writes.stage(self.job_id, self.sd.key, {
+                "phase": self.sd.phase,
+                "status": "running",
+                "content_md": "".join(self.parts),
+                "is_locked": False,
+            })
+
+    def reset(self) -> None:
+        if self.parts:
+            self.parts.clear()
+            # A fresh "running" event tells clients to drop the partial output
+            self.emit(PipelineEvent(section_key=self.sd.key, status="running"))
+
+
+# ── Input fingerprints ───────────────────────────────────────────
+
+@functools.lru_cache(maxsize=None)
+def _prompt_version(fn: Callable) -> str:
+    """Hash of a section function's source and the module-level strings it uses.
+
+    Prompts live in the function body plus shared fragments such as
+    ``writing_style``, so editing either changes the version.
+    """
+    try:
+        parts = [inspect.getsource(fn)]
+    except (OSError, TypeError):
+        parts = [f"{fn.__module__}.{fn.__qualname__}"]
+    code = getattr(fn, "__code__", None)
+    names = sorted(set(code.co_names)) if code is not None else []
+    for name in names:
+        value = getattr(fn, "__globals__", {}).get(name)
+        if isinstance(value, str):
+            parts.append(value)
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def _input_fingerprint(
+    sd: SectionDef, job: JobResponse, refs_digest: str, completed: dict[str, str]
+) -> str:
+    """Fingerprint everything a section's output depends on: prompt, refs,
+    JD, and the completed outputs it is given (``sd.inputs``)."""
+    digest = hashlib.sha256()
+    digest.update(f"prompt\0{_prompt_version(SECTION_FUNCTIONS[sd.key])}\0".encode())
+    digest.update(f"refs\0{refs_digest}\0".encode())
+    digest.update(f"jd\0{job.jd_text or ''}\0".encode())
+    for key in sorted(set(sd.inputs) & completed.keys()):
+        digest.update(f"dep:{key}\0{completed[key]}\0".encode())
+    return digest.hexdigest()
+
+
+async def _run_scheduled_section(
     sd: SectionDef,
+    priority: float,
     job: JobResponse,
-    refs: dict[str, str],
+    refs: Mapping[str, str],
     completed: dict[str, str],
+    emit: Optional[Callable[[PipelineEvent], None]] = None,
+    bypass_cache: bool = False,
 ) -> "GenerationResult":
-    """Run a section function in a thread (they are synchronous)."""
-    from app.services.llm_service import GenerationResult
+    """Run a section once a global execution slot is free.
 
-    dep_context = {
-        dep_key: completed[dep_key]
-        for dep_key in sd.depends_on
-        if dep_key in completed
-    }
+    With ``emit``, LLM output is streamed and reported as ``delta`` events;
+    with ``bypass_cache`` the LLM response cache is skipped.
+    """
+    from app.services.llm_service import bypass_response_cache
 
-    # For cover letter phase, pass all analysis sections as context too
-    if sd.phase == "cover_letter":
-        for k, v in completed.items():
-            if k not in dep_context:
-                dep_context[k] = v
+    async with _get_section_slots().slot(priority):
+        bypass_token = bypass_response_cache.set(bypass_cache) if bypass_cache else None
+        token = stream_sink.set(_SectionStream(job.id, sd, emit)) if emit is not None else None
+        try:
+            return await _run_section(sd, job, refs, completed)
+        finally:
+            if token is not None:
+                stream_sink.reset(token)
+            if bypass_token is not None:
+                bypass_response_cache.reset(bypass_token)
 
-    fn = SECTION_FUNCTIONS[sd.key]
-    # Section functions are synchronous (they call the Anthropic SDK which is sync),
-    # so run in a thread to avoid blocking the event loop.
-    result = await asyncio.to_thread(fn, job, refs, dep_context)
-    return result
 
+async def _run_section(
+    sd: SectionDef,
+    job: JobResponse,
+    refs: Mapping[str, str],
+    completed: dict[str, str],
+) -> "GenerationResult":
+    """Run a section function within its ``timeout_seconds`` and
+    ``input_token_budget`` budgets, awaiting it directly when it is a coroutine."""
+    from app.services.llm_service import GenerationResult, deadline
+    from app.services.prompt_builder import prompt_budget
 
-def _load_completed_sections(job_id: str) -> dict[str, str]:
-    """Load all completed sections for a job from the DB."""
+    # Only the outputs the section declares (depends_on + reads)
+    dep_context = {key: completed[key] for key in sd.inputs if key in completed}
+
+    fn = SECTION_FUNCTIONS[sd.key]
+    if inspect.iscoroutinefunction(fn):
+        call = fn(job, refs, dep_context)
+    else:
+        # Synchronous section functions still run in a thread to avoid
+        # blocking the event loop.
+        call = asyncio.to_thread(fn, job, refs, dep_context)
+
+    # The deadline stops LLM retries that could not finish in time; wait_for
+    # enforces the budget on the section as a whole. Prompts built with
+    # PromptBuilder are trimmed to the section's input budget.
+    with deadline(sd.timeout_seconds), prompt_budget(sd.input_token_budget):
+        try:
+            return await asyncio.wait_for(call, sd.timeout_seconds)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Section {sd.key} timed out after {sd.timeout_seconds:g}s"
+            ) from None
+
+
+async def _load_completed_records(job_id: str) -> list[dict]:
+    """Load all completed sections (with content) for a job from the DB."""
     safe_id = sanitize_pb_value(job_id)
-    records = pb.collection("sections").get_full_list(
+    records = await apb.collection("sections").get_full_list(
         query_params={
             "filter": f"job = '{safe_id}' && status = 'complete'",
         }
     )
-    result = {}
-    for r in records:
-        d = record_to_dict(r)
-        if d.get("content_md"):
-            result[d["section_key"]] = d["content_md"]
-    return result
+    return [d for d in map(record_to_dict, records) if d.get("content_md")]
+
 
+async def _load_completed_sections(job_id: str) -> dict[str, str]:
+    """Load all completed sections for a job from the DB as {key: content}."""
+    return {d["section_key"]: d["content_md"] for d in await _load_completed_records(job_id)}
 
-def _get_locked_keys(job_id: str) -> set[str]:
+
+async def _get_locked_keys(job_id: str) -> set[str]:
     """Get section keys that are locked."""
     safe_id = sanitize_pb_value(job_id)
-    records = pb.collection("sections").get_full_list(
+    records = await apb.collection("sections").get_full_list(
         query_params={
             "filter": f"job = '{safe_id}' && is_locked = true",
         }
@@ -256,7 +711,7 @@ def _update_section_status(
     status: str,
     error_message: Optional[str] = None,
 ) -> None:
-    """Upsert a section row with the given status."""
+    """Stage a section upsert with the given status (flushed write-behind)."""
     data = {
         "phase": sd.phase,
         "status": status,
@@ -265,43 +720,49 @@ def _update_section_status(
     if error_message:
         data["error_message"] = error_message
 
-    upsert_section(job_id, sd.key, data)
+    section_writes.stage(job_id, sd.key, data)
 
 
-def _save_section_result(job_id: str, sd: SectionDef, result) -> None:
-    """Save a completed section result to the DB."""
-    upsert_section(job_id, sd.key, {
+async def _save_section_result(
+    job_id: str, sd: SectionDef, result, input_fingerprint: str = ""
+) -> None:
+    """Stage a completed section result (flushed write-behind)."""
+    section_writes.stage(job_id, sd.key, {
         "phase": sd.phase,
         "status": "complete",
         "content_md": result.content_md,
         "model": result.model,
         "tokens_used": result.tokens_used,
+        "prompt_tokens": result.prompt_tokens,
         "generation_time_ms": result.generation_time_ms,
+        "input_fingerprint": input_fingerprint,
         "error_message": "",
         "is_locked": False,
     })
+    await search_index.index_section(job_id, sd.key, result.content_md)
 
 
-def _set_jd_cleaned(job_id: str, content: str) -> None:
+async def _set_jd_cleaned(job_id: str, content: str) -> None:
     """Set the jd_cleaned field on the job (from evidence_cleanup output)."""
-    pb.collection("jobs").update(job_id, {"jd_cleaned": content})
+    await apb.collection("jobs").update(job_id, {"jd_cleaned": content})
+    await search_index.index_job({"id": job_id, "jd_cleaned": content})
 
 
-def _set_pipeline_stage(job_id: str, stage: str) -> None:
+async def _set_pipeline_stage(job_id: str, stage: str) -> None:
     """Update the pipeline_stage on the job."""
-    pb.collection("jobs").update(job_id, {"pipeline_stage": stage})
+    await apb.collection("jobs").update(job_id, {"pipeline_stage": stage})
 
 
-def _extract_hours(job_id: str, hours_content: str) -> None:
+async def _extract_hours(job_id: str, hours_content: str) -> None:
     """Use Claude to extract a single average weekly-hours number from hours_estimate."""
     from pydantic import BaseModel
-    from app.services.llm_service import call_llm
+    from app.services.llm_service import call_llm_async
 
     class HoursResult(BaseModel):
         hours: int
 
     try:
-        result = call_llm(
+        result = await call_llm_async(
             system="Extract the hours as a single integer.", # Fixing prompt context too as it looked broken/missing in read?
             user=hours_content,
             use_web_search=False,
@@ -310,12 +771,12 @@ def _extract_hours(job_id: str, hours_content: str) -> None:
         json_str = re.search(r"\{.*\}", text, flags=re.DOTALL)
         if json_str:
             result_obj = HoursResult.model_validate_json(json_str.group(0))
-            pb.collection("jobs").update(job_id, {"hours": result_obj.hours})
+            await apb.collection("jobs").update(job_id, {"hours": result_obj.hours})
     except Exception:
         logger.warning("Failed to extract hours for job %s", job_id, exc_info=True)
 
 
-def _extract_verdict_metadata(job_id: str, verdict_content: str) -> None:
+async def _extract_verdict_metadata(job_id: str, verdict_content: str) -> None:
     """Parse score, hours, and verdict from final_verdict content and update job."""
     update: dict = {}
 
@@ -331,4 +792,4 @@ def _extract_verdict_metadata(job_id: str, verdict_content: str) -> None:
             break
 
     if update:
-        pb.collection("jobs").update(job_id, update)
+        await apb.collection("jobs").update(job_id, update)
@@ -0,0 +1,155 @@
+"""Token-budgeted prompt assembly for context-heavy sections.
+
+Section prompts are built from labelled context blocks (JD, dependency
+outputs, reference files) around fixed instructions. ``PromptBuilder``
+counts tokens locally and, when the blocks exceed the section's input
+budget, trims them lowest priority first: each block is cut back at a line
+boundary (never below its ``min_tokens``) and marked as trimmed, and a block
+left with nothing is dropped. Fixed text is never trimmed.
+
+The budget comes from ``SectionDef.input_token_budget`` via the
+``prompt_budget`` context manager, which the executor enters around each
+section call, so section functions only declare what matters most.
+Under budget the rendered prompt is identical to the equivalent f-string.
+"""
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional, Union
+
+from app.services.rate_limiter import CHARS_PER_TOKEN, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Input token budget for prompts built in the current context (None: unbounded)
+input_token_budget: ContextVar[Optional[int]] = ContextVar("input_token_budget", default=None)
+
+TRIMMED_MARKER = "[… trimmed to fit the prompt budget]"
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Local token count, using the same estimate as the rate limiter."""
+    return estimate_tokens(text)
+
+
+@contextmanager
+def prompt_budget(tokens: Optional[int]) -> Iterator[None]:
+    """Bound the prompts built with ``PromptBuilder`` in this context to ``tokens``."""
+    token = input_token_budget.set(tokens)
+    try:
+        yield
+    finally:
+        input_token_budget.reset(token)
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut ``text`` to roughly ``tokens`` tokens, at a line boundary when one
+    falls in the second half of the kept text."""
+    limit = max(tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n", 0, limit)
+    if cut < limit // 2:
+        cut = limit
+    return text[:cut].rstrip()
+
+
+@dataclass
+class ContextBlock:
+    """A labelled, trimmable piece of prompt context.
+
+    Higher ``priority`` blocks are trimmed later; ``min_tokens`` is the
+    size a block is not trimmed below, give or take the partial line cut
+    off at the boundary (0 lets it be dropped).
+    """
+    label: str
+    text: str
+    priority: int = 0
+    min_tokens: int = 0
+
+
+class PromptBuilder:
+    """Assemble a user prompt from fixed text and prioritized context blocks.
+
+    Segments render in the order they were added, separated by blank lines.
+    """
+
+    def __init__(self, header: str, budget: Optional[int] = None) -> None:
+        self.budget = budget
+        self.segments: list[Union[str, ContextBlock]] = [header]
+        self.tokens = 0
+        self.trimmed: dict[str, int] = {}  # label -> tokens removed by the last build()
+
+    def add(
+        self, label: str, text: Optional[str], priority: int = 0, min_tokens: int = 0
+    ) -> "PromptBuilder":
+        """Append a context block; empty text renders as ``N/A``."""
+        self.segments.append(ContextBlock(label, text or "N/A", priority, min_tokens))
+        return self
+
+    def text(self, text: str) -> "PromptBuilder":
+        """Append fixed text (instructions, examples) that is never trimmed."""
+        self.segments.append(text)
+        return self
+
+    def build(self) -> str:
+        """Render the prompt, trimming context blocks to the current budget."""
+        budget = self.budget if self.budget is not None else input_token_budget.get()
+        texts = {
+            i: s.text for i, s in enumerate(self.segments) if isinstance(s, ContextBlock)
+        }
+        self.trimmed = {}
+        if budget is not None:
+            self._trim(texts, budget)
+
+        prompt = self._render(texts)
+        self.tokens = count_tokens(prompt)
+        if self.trimmed:
+            logger.info(
+                "Trimmed prompt %r to %d tokens (budget %d): %s",
+                self.segments[0], self.tokens, budget,
+                ", ".join(f"{label} -{n}" for label, n in self.trimmed.items()),
+            )
+        if budget is not None and self.tokens > budget:
+            logger.warning(
+                "Prompt %r is %d tokens, over its %d budget after trimming",
+                self.segments[0], self.tokens, budget,
+            )
+        return prompt
+
+    def _render(self, texts: dict[int, Optional[str]]) -> str:
+        parts = []
+        for i, segment in enumerate(self.segments):
+            if not isinstance(segment, ContextBlock):
+                parts.append(segment)
+            elif texts[i] is not None:
+                parts.append(f"{segment.label}:\n{texts[i]}")
+        return "\n\n".join(parts) + "\n"
+
+    def _trim(self, texts: dict[int, Optional[str]], budget: int) -> None:
+        """Shrink block texts in ``texts``, lowest priority (then latest added) first.
+
+        A block that would keep no more than the marker is dropped (None).
+        """
+        excess = count_tokens(self._render(texts)) - budget
+        marker = count_tokens(TRIMMED_MARKER) + 1
+        order = sorted(reversed(list(texts)), key=lambda i: self.segments[i].priority)
+        for i in order:
+            if excess <= 0:
+                break
+            block = self.segments[i]
+            size = count_tokens(block.text)
+            keep = max(size - excess, block.min_tokens)
+            if keep >= size:
+                continue
+            if keep <= marker:
+                texts[i] = None
+                removed = count_tokens(f"{block.label}:\n{block.text}\n\n")
+            else:
+                texts[i] = f"{truncate_to_tokens(block.text, keep - marker)}\n{TRIMMED_MARKER}"
+                removed = size - count_tokens(texts[i])
+            excess -= removed
+            self.trimmed[block.label] = removed
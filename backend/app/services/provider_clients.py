@@ -0,0 +1,53 @@
+"""Shared LLM provider clients.
+
+One ``AsyncAnthropic`` client per process, over a pooled keep-alive HTTP
+transport with tunable limits, instead of a fresh client (and fresh TLS
+connections) per request. The app lifespan starts the clients on startup
+and closes their connection pools on shutdown; ``get_anthropic`` also
+creates the client on first use for scripts and tests.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import anthropic
+import httpx
+
+from app.config import settings
+
+_anthropic: Optional[anthropic.AsyncAnthropic] = None
+
+
+def get_anthropic() -> anthropic.AsyncAnthropic:
+    """Return the shared async Anthropic client."""
+    global _anthropic
+    if _anthropic is None:
+        _anthropic = anthropic.AsyncAnthropic(
+            api_key=settings.ANTHROPIC_API_KEY,
+            http_client=anthropic.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.ANTHROPIC_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.ANTHROPIC_MAX_KEEPALIVE,
+                ),
+                timeout=settings.ANTHROPIC_TIMEOUT,
+            ),
+        )
+    return _anthropic
+
+
+def start_clients() -> None:
+    """Create the shared clients (called on app startup)."""
+    get_anthropic()
+
+
+async def close_clients() -> None:
+    """Close every shared client's connection pool (called on app shutdown)."""
+    global _anthropic
+    if _anthropic is not None:
+        await _anthropic.close()
+        _anthropic = None
+
+    from app.services import llm_service
+
+    if llm_service.client is not None:
+        await llm_service.client.aio.aclose()
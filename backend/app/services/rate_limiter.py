@@ -0,0 +1,242 @@
+"""Process-wide rate limiting for LLM providers.
+
+Every Gemini and Anthropic call goes through ``rate_limiter`` so bursts
+(batch imports, parallel pipeline sections) queue locally instead of drawing
+429s. Each (provider, model) pair gets two token buckets: one for requests
+per minute and one for tokens per minute.
+
+The buckets live in memory, so the API and each pipeline worker process
+enforce their own. The configured limits are for the whole deployment: each
+process takes ``settings.process_share`` of them.
+
+Token usage is not known until a call finishes, so callers reserve an
+estimate up front (``estimate_tokens``) and report the real count from the
+response's usage metadata afterwards; the difference is charged or refunded.
+A call that raises reports no usage, so its reservation is reconciled to the
+prompt alone: the output budget it never produced is refunded.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for English prompts
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(*texts: Optional[str], max_output: int = 0) -> int:
+    """Estimate the tokens a call will use: prompt length plus the output budget."""
+    chars = sum(len(t) for t in texts if t)
+    return chars // CHARS_PER_TOKEN + max_output
+
+
+def anthropic_usage_tokens(message) -> Optional[int]:
+    """Total input + output tokens from an Anthropic message, if reported."""
+    usage = getattr(message, "usage", None)
+    input_tokens = getattr(usage, "input_tokens", None)
+    output_tokens = getattr(usage, "output_tokens", None)
+    if isinstance(input_tokens, int) and isinstance(output_tokens, int):
+        return input_tokens + output_tokens
+    return None
+
+
+class TokenBucket:
+    """Bucket refilled continuously at ``per_minute / 60`` units per second.
+
+    The level may go negative when a reservation is reconciled upwards; the
+    deficit is paid back by refill before further calls are admitted.
+    """
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+@dataclass
+class Limits:
+    rpm: int
+    tpm: int
+
+
+class Usage:
+    """Handle for one admitted call; report actual tokens with ``record``."""
+
+    def __init__(
+        self, limiter: "RateLimiter", key: tuple[str, str], estimated: int, max_output: int = 0
+    ) -> None:
+        self._limiter = limiter
+        self._key = key
+        self.estimated = estimated
+        self.max_output = max_output
+        self.actual: Optional[int] = None
+
+    def record(self, tokens) -> None:
+        """Reconcile the reservation with the tokens the provider reported.
+
+        Ignored when the provider reported no usage, keeping the estimate.
+        """
+        if not isinstance(tokens, int) or tokens <= 0 or self.actual is not None:
+            return
+        self.actual = tokens
+        self._limiter._adjust(self._key, tokens - self.estimated)
+
+    def fail(self) -> None:
+        """Reconcile a call that raised to its prompt tokens (no output)."""
+        if self.actual is not None:
+            return
+        self.actual = max(self.estimated - self.max_output, 0)
+        self._limiter._adjust(self._key, self.actual - self.estimated)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets per (provider, model)."""
+
+    def __init__(
+        self,
+        provider_limits: dict[str, Limits],
+        model_limits: Optional[dict[tuple[str, str], Limits]] = None,
+    ) -> None:
+        self.provider_limits = provider_limits
+        self.model_limits = model_limits or {}
+        self._buckets: dict[tuple[str, str], tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "RateLimiter":
+        """Limits from settings, scaled to this process's share of them."""
+        model_limits = {}
+        if settings.LLM_RATE_LIMITS:
+            try:
+                for name, value in json.loads(settings.LLM_RATE_LIMITS).items():
+                    provider, _, model = name.partition(":")
+                    model_limits[(provider, model)] = Limits(
+                        rpm=settings.process_share(int(value.get("rpm", 0))),
+                        tpm=settings.process_share(int(value.get("tpm", 0))),
+                    )
+            except (ValueError, AttributeError):
+                logger.warning("Ignoring malformed LLM_RATE_LIMITS", exc_info=True)
+        return cls(
+            {
+                "gemini": Limits(
+                    settings.process_share(settings.GEMINI_RPM),
+                    settings.process_share(settings.GEMINI_TPM),
+                ),
+                "anthropic": Limits(
+                    settings.process_share(settings.ANTHROPIC_RPM),
+                    settings.process_share(settings.ANTHROPIC_TPM),
+                ),
+            },
+            model_limits,
+        )
+
+    # ── Public API ──────────────────────────────────────────────
+
+    @asynccontextmanager
+    async def limit(
+        self, provider: str, model: str, estimated_tokens: int, max_output: int = 0
+    ) -> AsyncIterator[Usage]:
+        """Wait for budget, then admit one call. Sleeps without blocking the loop.
+
+        ``max_output`` is the part of ``estimated_tokens`` that is output
+        budget; it is refunded if the call raises.
+        """
+        key = (provider, model)
+        while True:
+            wait = self._try_admit(key, estimated_tokens)
+            if wait == 0:
+                break
+            await asyncio.sleep(wait)
+        usage = Usage(self, key, estimated_tokens, max_output)
+        try:
+            yield usage
+        except BaseException:
+            usage.fail()
+            raise
+
+    @contextmanager
+    def limit_sync(
+        self, provider: str, model: str, estimated_tokens: int, max_output: int = 0
+    ) -> Iterator[Usage]:
+        """Blocking variant of ``limit`` for synchronous callers."""
+        key = (provider, model)
+        while True:
+            wait = self._try_admit(key, estimated_tokens)
+            if wait == 0:
+                break
+            time.sleep(wait)
+        usage = Usage(self, key, estimated_tokens, max_output)
+        try:
+            yield usage
+        except BaseException:
+            usage.fail()
+            raise
+
+    # ── Internals ───────────────────────────────────────────────
+
+    def _get_buckets(self, key: tuple[str, str]) -> tuple[Optional[TokenBucket], Optional[TokenBucket]]:
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            limits = self.model_limits.get(key) or self.provider_limits.get(key[0])
+            if limits is None:
+                buckets = (None, None)
+            else:
+                buckets = (
+                    TokenBucket(limits.rpm) if limits.rpm > 0 else None,
+                    TokenBucket(limits.tpm) if limits.tpm > 0 else None,
+                )
+            self._buckets[key] = buckets
+        return buckets
+
+    def _try_admit(self, key: tuple[str, str], tokens: int) -> float:
+        """Take budget for one call and return 0, or return seconds to wait."""
+        with self._lock:
+            requests, token_bucket = self._get_buckets(key)
+            now = time.monotonic()
+            wait = max(
+                requests.wait_time(1, now) if requests else 0.0,
+                token_bucket.wait_time(tokens, now) if token_bucket else 0.0,
+            )
+            if wait > 0:
+                return wait
+            if requests:
+                requests.take(1, now)
+            if token_bucket:
+                token_bucket.take(tokens, now)
+            return 0.0
+
+    def _adjust(self, key: tuple[str, str], delta: int) -> None:
+        with self._lock:
+            _, token_bucket = self._get_buckets(key)
+            if token_bucket:
+                token_bucket.take(delta, time.monotonic())
+
+
+rate_limiter = RateLimiter.from_settings()
@@ -0,0 +1,99 @@
+"""PocketBase realtime subscriptions.
+
+Used by the status stream when a job's pipeline is running in another
+process, so the in-process event bus never sees its events. PocketBase's
+realtime API is an SSE stream: the server first sends ``PB_CONNECT`` with a
+client id, the client registers its topics with ``POST /api/realtime``, and
+record changes then arrive as ``<collection>/*`` events.
+
+Each subscription holds its connection for as long as the stream is open, so
+streams get their own connection pool: open status streams can't use up the
+shared ``apb`` pool that every other database call goes through.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
+
+import httpx
+
+from app.async_database import apb
+from app.config import settings
+from app.database import record_to_dict, sanitize_pb_value
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_realtime_client() -> httpx.AsyncClient:
+    """Lazy-init the client realtime streams are opened on."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=settings.POCKETBASE_URL.rstrip("/"),
+            # No read timeout: the stream stays quiet between section updates.
+            timeout=httpx.Timeout(settings.POCKETBASE_TIMEOUT, read=None),
+            limits=httpx.Limits(
+                max_connections=settings.POCKETBASE_REALTIME_MAX_STREAMS,
+                # A closed stream's connection isn't worth keeping
+                max_keepalive_connections=0,
+            ),
+        )
+    return _client
+
+
+async def close_realtime() -> None:
+    """Close the realtime connection pool (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _sse_events(lines: AsyncIterator[str]) -> AsyncIterator[tuple[str, dict]]:
+    """Parse an SSE line stream into (event name, decoded JSON data) pairs."""
+    name = "message"
+    data: list[str] = []
+    async for line in lines:
+        if line:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                name = value
+            elif field == "data":
+                data.append(value)
+            continue
+        if data:
+            try:
+                yield name, json.loads("\n".join(data))
+            except ValueError:
+                logger.warning("Ignoring malformed realtime event %r", name)
+        name, data = "message", []
+
+
+async def section_changes(job_id: str) -> AsyncIterator[Optional[dict]]:
+    """Yield each section record of ``job_id`` as PocketBase creates or updates it.
+
+    Yields ``None`` once, right after the subscription is registered, so the
+    caller can take a snapshot without missing changes. Runs until the caller
+    stops iterating or the server closes the stream.
+    """
+    options = json.dumps({"query": {"filter": f"job = '{sanitize_pb_value(job_id)}'"}})
+    topic = f"sections/*?options={quote(options)}"
+
+    async with get_realtime_client().stream("GET", "/api/realtime") as response:
+        response.raise_for_status()
+        events = _sse_events(response.aiter_lines())
+        async for name, data in events:
+            if name == "PB_CONNECT":
+                await apb.send(
+                    "/api/realtime",
+                    method="POST",
+                    json={"clientId": data["clientId"], "subscriptions": [topic]},
+                )
+                yield None
+            elif name.startswith("sections") and data.get("action") in ("create", "update"):
+                yield record_to_dict(data["record"])
@@ -1,8 +1,30 @@
+"""Reference markdowns from ``references/``, served from an in-memory snapshot.
+
+``ReferenceStore`` reads every reference file once into an immutable
+``ReferenceSnapshot`` (``{key: text}`` plus a sha256 per file and a digest
+over all of them). Pipeline runs take the current snapshot and pass it to
+section functions as ``refs``, so one run sees one consistent set of files.
+
+While the app or a worker is running, the store polls file mtimes every
+``REFERENCE_RELOAD_SECONDS`` in a worker thread and swaps in a new snapshot
+when a file changed, so edited references apply without a restart.
+Readers only ever pick up the current snapshot and never wait on a reload.
+"""
 from __future__ import annotations
 
-import os
-from functools import lru_cache
+import asyncio
+import hashlib
+import logging
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
+from typing import Iterator, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
 
 REFERENCES_DIR = Path(__file__).resolve().parents[3] / "references"
 
@@ -25,14 +47,157 @@ _FILE_MAP = {
 }
 
 
-@lru_cache(maxsize=None)
+@dataclass(frozen=True)
+class ReferenceFile:
+    text: str
+    sha256: str
+    mtime_ns: int = 0
+
+
+class ReferenceSnapshot(Mapping):
+    """Immutable ``{key: text}`` view of the reference files at one point in time."""
+
+    def __init__(self, files: Mapping[str, ReferenceFile]) -> None:
+        self._files = MappingProxyType(dict(files))
+        digest = hashlib.sha256()
+        for key in sorted(self._files):
+            digest.update(f"{key}\0{self._files[key].sha256}\0".encode())
+        self.digest = digest.hexdigest()
+
+    @classmethod
+    def from_texts(cls, texts: Mapping[str, str]) -> "ReferenceSnapshot":
+        return cls({key: ReferenceFile(text, _sha256(text)) for key, text in texts.items()})
+
+    def __getitem__(self, key: str) -> str:
+        try:
+            return self._files[key].text
+        except KeyError:
+            raise KeyError(
+                f"Reference {key!r} is not loaded. Available: {sorted(self._files)}"
+            ) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._files)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @property
+    def hashes(self) -> Mapping[str, str]:
+        """sha256 of each file's text, by key."""
+        return MappingProxyType({key: f.sha256 for key, f in self._files.items()})
+
+    def file(self, key: str) -> Optional[ReferenceFile]:
+        return self._files.get(key)
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ReferenceStore:
+    """Holds the current ``ReferenceSnapshot`` and reloads it when files change."""
+
+    def __init__(
+        self,
+        directory: Path = REFERENCES_DIR,
+        files: Optional[Mapping[str, str]] = None,
+        poll_seconds: Optional[float] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.files = dict(files if files is not None else _FILE_MAP)
+        self.poll_seconds = (
+            settings.REFERENCE_RELOAD_SECONDS if poll_seconds is None else poll_seconds
+        )
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        # Serializes loads; readers of an existing snapshot never take it
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def snapshot(self) -> ReferenceSnapshot:
+        """The current snapshot, loading the files on first use."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.reload_if_changed()
+            snapshot = self._snapshot
+        return snapshot
+
+    def reload_if_changed(self) -> list[str]:
+        """Re-read files whose mtime changed; return the keys whose content changed.
+
+        Unchanged files are carried over from the current snapshot without
+        being read. A missing file is left out (and logged).
+        """
+        with self._lock:
+            current = self._snapshot
+            loaded: dict[str, ReferenceFile] = {}
+            changed: list[str] = []
+            for key, filename in self.files.items():
+                previous = current.file(key) if current is not None else None
+                path = self.directory / filename
+                try:
+                    mtime_ns = path.stat().st_mtime_ns
+                    if previous is not None and previous.mtime_ns == mtime_ns:
+                        loaded[key] = previous
+                        continue
+                    text = path.read_text(encoding="utf-8")
+                except FileNotFoundError:
+                    logger.warning("Reference file missing: %s", path)
+                    if previous is not None:
+                        changed.append(key)
+                    continue
+                loaded[key] = ReferenceFile(text, _sha256(text), mtime_ns)
+                if previous is None or previous.sha256 != loaded[key].sha256:
+                    changed.append(key)
+
+            if current is None or changed or any(
+                current.file(k) is not f for k, f in loaded.items()
+            ):
+                self._snapshot = ReferenceSnapshot(loaded)
+            if current is not None and changed:
+                logger.info("Reloaded reference files: %s", ", ".join(changed))
+            return changed
+
+    async def start(self) -> None:
+        """Load the snapshot and start polling for changes (if enabled)."""
+        await asyncio.to_thread(self.snapshot)
+        if self.poll_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception:
+                logger.warning("Reloading reference files failed", exc_info=True)
+
+
+_reference_store: Optional[ReferenceStore] = None
+
+
+def get_reference_store() -> ReferenceStore:
+    global _reference_store
+    if _reference_store is None:
+        _reference_store = ReferenceStore()
+    return _reference_store
+
+
 def load_reference(key: str) -> str:
-    """Load a reference file by short key. Cached after first read."""
-    filename = _FILE_MAP.get(key)
-    if filename is None:
+    """Load a reference file by short key from the current snapshot."""
+    if key not in _FILE_MAP:
         raise KeyError(f"Unknown reference key: {key!r}. Valid keys: {sorted(_FILE_MAP)}")
-    path = REFERENCES_DIR / filename
-    return path.read_text(encoding="utf-8")
+    return get_reference_store().snapshot()[key]
 
 
 def load_references(*keys: str) -> dict[str, str]:
@@ -0,0 +1,156 @@
+"""Content-addressed cache for LLM responses.
+
+Responses are keyed by a SHA-256 of every input that affects generation
+(model, system, user, temperature, max_tokens, tools), so identical prompts
+return the stored output instead of calling the provider again. Entries live
+in a local SQLite file, expire after a TTL, and the least recently used
+entries are evicted once the stored content exceeds a byte budget.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+
+@dataclass
+class CachedResponse:
+    content_md: str
+    model: str
+    tokens_used: int
+    generation_time_ms: int
+
+
+def make_cache_key(
+    *,
+    model: str,
+    system: str,
+    user: str,
+    temperature: float,
+    max_tokens: int,
+    tools: Any = None,
+) -> str:
+    """Return a stable hash of every input that affects an LLM response."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "system": system,
+            "user": user,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "tools": tools,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response store with TTL expiry and size-based LRU eviction."""
+
+    def __init__(self, path: str | Path, ttl_seconds: int, max_bytes: int) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        if str(self.path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                content_md TEXT NOT NULL,
+                model TEXT NOT NULL,
+                tokens_used INTEGER NOT NULL,
+                generation_time_ms INTEGER NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached response for ``key``, or None if missing/expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_md, model, tokens_used, generation_time_ms, created_at "
+                "FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[4] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return CachedResponse(
+            content_md=row[0],
+            model=row[1],
+            tokens_used=row[2],
+            generation_time_ms=row[3],
+        )
+
+    def set(self, key: str, response: CachedResponse) -> None:
+        """Store a response and evict old entries if over budget."""
+        now = time.time()
+        size = len(response.content_md.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, content_md, model, tokens_used, generation_time_ms, "
+                "size_bytes, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.content_md,
+                    response.model,
+                    response.tokens_used,
+                    response.generation_time_ms,
+                    size,
+                    now,
+                    now,
+                ),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used until under max_bytes."""
+        self._conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size_bytes FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
@@ -0,0 +1,193 @@
+"""Critical-path scheduling for the section DAG.
+
+``DagScheduler`` precomputes the dependency graph of a run once: each section
+keeps a count of unfinished dependencies, and finishing a section only touches
+its direct dependents. Ready sections are ordered by critical-path length —
+their own expected generation time plus the longest chain of work that waits
+on them — so the sections gating the most downstream work start first.
+
+Expected times come from ``SectionDurations`` (historical
+``generation_time_ms``). ``PrioritySlots`` caps how many sections execute at
+once across all runs and hands freed slots to the highest-priority waiter.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Iterable
+
+from app.sections.config import SectionDef
+
+# Assumed generation time for sections with no history yet
+DEFAULT_DURATION_MS = 30_000.0
+
+
+class SectionDurations:
+    """Per-section estimates of generation time, in milliseconds.
+
+    Seeded from stored sections, then updated with an exponentially weighted
+    moving average as sections complete in this process.
+    """
+
+    def __init__(self, alpha: float = 0.3, default_ms: float = DEFAULT_DURATION_MS) -> None:
+        self.alpha = alpha
+        self.default_ms = default_ms
+        self.seeded = False
+        self._estimates: dict[str, float] = {}
+
+    def seed(self, samples: Iterable[tuple[str, int]]) -> None:
+        """Set estimates to the mean of historical (section_key, ms) samples."""
+        totals: dict[str, list[int]] = {}
+        for key, ms in samples:
+            if ms and ms > 0:
+                totals.setdefault(key, []).append(ms)
+        for key, values in totals.items():
+            self._estimates.setdefault(key, sum(values) / len(values))
+        self.seeded = True
+
+    def record(self, key: str, ms: int) -> None:
+        if ms <= 0:
+            return
+        previous = self._estimates.get(key)
+        if previous is None:
+            self._estimates[key] = float(ms)
+        else:
+            self._estimates[key] = previous + self.alpha * (ms - previous)
+
+    def estimate(self, key: str) -> float:
+        return self._estimates.get(key, self.default_ms)
+
+
+class DagScheduler:
+    """Ready queue over a section DAG, ordered by critical-path length.
+
+    ``done_keys`` are sections already satisfied before the run starts.
+    Dependencies that are neither done nor part of ``section_defs`` can never
+    be satisfied, so their dependents are not returned as ready until the
+    caller gives up on them with ``release_missing``.
+    """
+
+    def __init__(
+        self,
+        section_defs: list[SectionDef],
+        done_keys: Iterable[str],
+        duration: Callable[[str], float],
+    ) -> None:
+        done = set(done_keys)
+        self._defs = {sd.key: sd for sd in section_defs}
+        self._position = {sd.key: i for i, sd in enumerate(section_defs)}
+        self._dependents: dict[str, list[str]] = {sd.key: [] for sd in section_defs}
+        self._waiting_on: dict[str, int] = {}
+        # Dependencies outside the run that aren't done -> sections waiting on them
+        self._missing: dict[str, list[str]] = {}
+
+        for sd in section_defs:
+            deps = [dep for dep in sd.depends_on if dep not in done]
+            self._waiting_on[sd.key] = len(deps)
+            for dep in deps:
+                if dep in self._dependents:
+                    self._dependents[dep].append(sd.key)
+                else:
+                    self._missing.setdefault(dep, []).append(sd.key)
+
+        self.priority = self._critical_paths(duration)
+
+        self._ready: list[tuple[float, int, str]] = []
+        for key, waiting in self._waiting_on.items():
+            if waiting == 0:
+                self._push(key)
+
+    def pop_ready(self) -> list[SectionDef]:
+        """Return every section that is ready to run, highest priority first."""
+        ready = []
+        while self._ready:
+            _, _, key = heapq.heappop(self._ready)
+            ready.append(self._defs[key])
+        return ready
+
+    def mark_done(self, key: str) -> None:
+        """Record that a section finished (successfully or not)."""
+        for dependent in self._dependents.get(key, ()):
+            self._waiting_on[dependent] -= 1
+            if self._waiting_on[dependent] == 0:
+                self._push(dependent)
+
+    def release_missing(self) -> list[str]:
+        """Stop waiting on dependencies outside the run; return their keys.
+
+        Sections waiting only on them become ready, so the caller can skip
+        them (or run them on partial context) instead of leaving them pending.
+        """
+        missing, self._missing = self._missing, {}
+        for dependents in missing.values():
+            for dependent in dependents:
+                self._waiting_on[dependent] -= 1
+                if self._waiting_on[dependent] == 0:
+                    self._push(dependent)
+        return list(missing)
+
+    def _push(self, key: str) -> None:
+        heapq.heappush(self._ready, (-self.priority[key], self._position[key], key))
+
+    def _critical_paths(self, duration: Callable[[str], float]) -> dict[str, float]:
+        """Expected time from each section's start to the end of its longest chain."""
+        # Topological order over the edges inside this run (Kahn's algorithm)
+        waiting = {key: 0 for key in self._defs}
+        for dependents in self._dependents.values():
+            for dependent in dependents:
+                waiting[dependent] += 1
+        order = [key for key, count in waiting.items() if count == 0]
+        for key in order:
+            for dependent in self._dependents[key]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    order.append(dependent)
+
+        paths = {key: duration(key) for key in self._defs}
+        for key in reversed(order):
+            downstream = max((paths[d] for d in self._dependents[key]), default=0.0)
+            paths[key] = duration(key) + downstream
+        return paths
+
+
+class PrioritySlots:
+    """Concurrency limit that hands each freed slot to the highest-priority waiter."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._in_use = 0
+        self._waiters: list[tuple[float, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, priority: float) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: float) -> None:
+        if self._in_use < self.limit and not self._waiters:
+            self._in_use += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (-priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Hand the slot straight to the waiter; _in_use is unchanged
+                future.set_result(None)
+                return
+        self._in_use -= 1
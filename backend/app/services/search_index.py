@@ -0,0 +1,319 @@
+"""Local full-text index over jobs and section content.
+
+PocketBase only offers ``LIKE`` filters, so searching section text means
+scanning every record. Instead, every job (company, role, cleaned JD) and
+section (``content_md``) is mirrored into a SQLite FTS5 index, kept current
+by the code paths that write them (``index_job`` / ``index_section``), and
+queried by ``/api/search`` with bm25 ranking and highlighted snippets.
+
+The index is derived data: ``reindex_all`` rebuilds it from PocketBase, and
+the API does so at startup when it is empty.
+
+SQLite calls block (and may wait out another process's write lock), so the
+async hooks below run them in a worker thread, off the event loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from app.async_database import apb
+from app.config import settings
+from app.database import record_to_dict
+
+logger = logging.getLogger(__name__)
+
+# bm25 column weights: company, role, body
+COLUMN_WEIGHTS = (10.0, 5.0, 1.0)
+SNIPPET_TOKENS = 12
+# Documents inserted per statement while rebuilding
+REBUILD_BATCH_SIZE = 500
+
+
+@dataclass
+class SearchHit:
+    job_id: str
+    company: str
+    role: str
+    section_key: Optional[str]  # None for a match in the job itself
+    snippet: str
+    score: float
+
+
+def to_match_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word must match (as a prefix).
+
+    Quoting each word keeps FTS5 operators and punctuation in user input from
+    being parsed as query syntax.
+    """
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{w}"*' for w in words)
+
+
+class SearchIndex:
+    """SQLite FTS5 index of job and section documents."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+        if str(self.path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        if str(self.path) != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                doc_key TEXT NOT NULL UNIQUE,
+                job_id TEXT NOT NULL,
+                section_key TEXT,
+                company TEXT NOT NULL DEFAULT '',
+                role TEXT NOT NULL DEFAULT '',
+                body TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS idx_docs_job ON docs (job_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+                company, role, body,
+                content='docs', content_rowid='id',
+                tokenize='porter unicode61'
+            );
+            -- Keep the FTS index in step with the docs table
+            CREATE TRIGGER IF NOT EXISTS docs_ai AFTER INSERT ON docs BEGIN
+                INSERT INTO docs_fts (rowid, company, role, body)
+                VALUES (new.id, new.company, new.role, new.body);
+            END;
+            CREATE TRIGGER IF NOT EXISTS docs_ad AFTER DELETE ON docs BEGIN
+                INSERT INTO docs_fts (docs_fts, rowid, company, role, body)
+                VALUES ('delete', old.id, old.company, old.role, old.body);
+            END;
+            CREATE TRIGGER IF NOT EXISTS docs_au AFTER UPDATE ON docs BEGIN
+                INSERT INTO docs_fts (docs_fts, rowid, company, role, body)
+                VALUES ('delete', old.id, old.company, old.role, old.body);
+                INSERT INTO docs_fts (rowid, company, role, body)
+                VALUES (new.id, new.company, new.role, new.body);
+            END;
+            """
+        )
+        self._conn.commit()
+
+    # ── Writes ──────────────────────────────────────────────────
+
+    def index_job(
+        self,
+        job_id: str,
+        company: Optional[str] = None,
+        role: Optional[str] = None,
+        body: Optional[str] = None,
+    ) -> None:
+        """Upsert a job document; fields left as None keep their indexed value.
+
+        Company and role are copied onto the job's section documents so a
+        search for the company name finds its sections too.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT company, role, body FROM docs WHERE doc_key = ?", (f"job:{job_id}",)
+            ).fetchone()
+            current = row or ("", "", "")
+            company = current[0] if company is None else company
+            role = current[1] if role is None else role
+            body = current[2] if body is None else body
+            self._conn.execute(
+                "INSERT INTO docs (doc_key, job_id, company, role, body) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (doc_key) DO UPDATE SET "
+                "company = excluded.company, role = excluded.role, body = excluded.body",
+                (f"job:{job_id}", job_id, company, role, body),
+            )
+            if row is None or (company, role) != (row[0], row[1]):
+                self._conn.execute(
+                    "UPDATE docs SET company = ?, role = ? "
+                    "WHERE job_id = ? AND section_key IS NOT NULL",
+                    (company, role, job_id),
+                )
+            self._conn.commit()
+
+    def index_section(self, job_id: str, section_key: str, content: Optional[str]) -> None:
+        """Upsert a section document (an empty body removes it)."""
+        key = f"section:{job_id}:{section_key}"
+        with self._lock:
+            if not content:
+                self._conn.execute("DELETE FROM docs WHERE doc_key = ?", (key,))
+            else:
+                self._conn.execute(
+                    "INSERT INTO docs (doc_key, job_id, section_key, company, role, body) "
+                    "SELECT ?, ?, ?, COALESCE(j.company, ''), COALESCE(j.role, ''), ? "
+                    "FROM (SELECT 1) LEFT JOIN docs j ON j.doc_key = ? "
+                    "ON CONFLICT (doc_key) DO UPDATE SET body = excluded.body",
+                    (key, job_id, section_key, content, f"job:{job_id}"),
+                )
+            self._conn.commit()
+
+    def rebuild(
+        self,
+        jobs: list[tuple[str, str, str, str]],
+        sections: list[tuple[str, str, str]],
+    ) -> None:
+        """Replace every document in one transaction.
+
+        ``jobs`` are (job_id, company, role, body) and ``sections`` are
+        (job_id, section_key, content). Searches see the old index until the
+        single commit at the end.
+        """
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM docs")
+                for i in range(0, len(jobs), REBUILD_BATCH_SIZE):
+                    self._conn.executemany(
+                        "INSERT INTO docs (doc_key, job_id, company, role, body) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (doc_key) DO UPDATE SET "
+                        "company = excluded.company, role = excluded.role, body = excluded.body",
+                        [(f"job:{job[0]}", *job) for job in jobs[i:i + REBUILD_BATCH_SIZE]],
+                    )
+                for i in range(0, len(sections), REBUILD_BATCH_SIZE):
+                    self._conn.executemany(
+                        "INSERT INTO docs (doc_key, job_id, section_key, company, role, body) "
+                        "SELECT ?, ?, ?, COALESCE(j.company, ''), COALESCE(j.role, ''), ? "
+                        "FROM (SELECT 1) LEFT JOIN docs j ON j.doc_key = ? "
+                        "ON CONFLICT (doc_key) DO UPDATE SET body = excluded.body",
+                        [
+                            (f"section:{job_id}:{key}", job_id, key, content, f"job:{job_id}")
+                            for job_id, key, content in sections[i:i + REBUILD_BATCH_SIZE]
+                            if content
+                        ],
+                    )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def remove_job(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM docs WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+    # ── Reads ───────────────────────────────────────────────────
+
+    def search(self, text: str, limit: int = 20) -> list[SearchHit]:
+        """Best-ranked documents matching every word of ``text``."""
+        query = to_match_query(text)
+        if not query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.job_id, d.company, d.role, d.section_key, "
+                "snippet(docs_fts, -1, '<mark>', '</mark>', '…', ?), "
+                "bm25(docs_fts, ?, ?, ?) AS rank "
+                "FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid "
+                "WHERE docs_fts MATCH ? ORDER BY rank LIMIT ?",
+                (SNIPPET_TOKENS, *COLUMN_WEIGHTS, query, limit),
+            ).fetchall()
+        return [
+            SearchHit(
+                job_id=row[0],
+                company=row[1],
+                role=row[2],
+                section_key=row[3],
+                snippet=row[4],
+                # bm25 is lower-is-better; expose higher-is-better
+                score=round(-row[5], 4),
+            )
+            for row in rows
+        ]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_search_index: Optional[SearchIndex] = None
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    """Shared index, or None when disabled (``SEARCH_INDEX_PATH=""``)."""
+    global _search_index
+    if _search_index is None and settings.SEARCH_INDEX_PATH:
+        _search_index = SearchIndex(settings.SEARCH_INDEX_PATH)
+    return _search_index
+
+
+# ── Update hooks ─────────────────────────────────────────────────
+# Called by the code paths that write jobs and sections. Indexing is best
+# effort: a failure is logged and never fails the write itself.
+
+async def index_job(job: dict) -> None:
+    index = get_search_index()
+    if index is None:
+        return
+    try:
+        await asyncio.to_thread(
+            index.index_job,
+            job["id"],
+            company=job.get("company"),
+            role=job.get("role"),
+            body=job.get("jd_cleaned") or job.get("jd_text"),
+        )
+    except Exception:
+        logger.warning("Failed to index job %s", job.get("id"), exc_info=True)
+
+
+async def index_section(job_id: str, section_key: str, content: Optional[str]) -> None:
+    index = get_search_index()
+    if index is None:
+        return
+    try:
+        await asyncio.to_thread(index.index_section, job_id, section_key, content)
+    except Exception:
+        logger.warning("Failed to index section %s/%s", job_id, section_key, exc_info=True)
+
+
+async def remove_job(job_id: str) -> None:
+    index = get_search_index()
+    if index is not None:
+        try:
+            await asyncio.to_thread(index.remove_job, job_id)
+        except Exception:
+            logger.warning("Failed to remove job %s from the index", job_id, exc_info=True)
+
+
+async def reindex_all(index: Optional[SearchIndex] = None) -> int:
+    """Rebuild the index from PocketBase; returns the number of documents."""
+    index = index or get_search_index()
+    if index is None:
+        return 0
+    start = time.perf_counter()
+    jobs = await apb.collection("jobs").get_full_list(
+        query_params={"fields": "id,company,role,jd_cleaned,jd_text"}
+    )
+    sections = await apb.collection("sections").get_full_list(
+        query_params={"filter": "content_md != ''", "fields": "job,section_key,content_md"}
+    )
+    job_docs = []
+    for record in jobs:
+        job = record_to_dict(record)
+        job_docs.append((
+            job["id"], job.get("company") or "", job.get("role") or "",
+            job.get("jd_cleaned") or job.get("jd_text") or "",
+        ))
+    section_docs = []
+    for record in sections:
+        section = record_to_dict(record)
+        section_docs.append((section["job"], section["section_key"], section.get("content_md")))
+    await asyncio.to_thread(index.rebuild, job_docs, section_docs)
+    count = await asyncio.to_thread(index.count)
+    logger.info(
+        "Search index rebuilt: %d documents in %.1fs", count, time.perf_counter() - start
+    )
+    return count
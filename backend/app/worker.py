@@ -0,0 +1,72 @@
+"""Pipeline worker process.
+
+Drains the pipeline run queue outside the API process, so section execution
+(prompt building, response parsing, DB writes) never competes with request
+handling. Start as many as the machine has cores to spare:
+
+    python -m app.worker --concurrency 2
+
+Each process leases the runs it claims and renews the leases with
+heartbeats; if a worker dies, its runs are picked up by another once the
+lease expires. Progress reaches API clients through PocketBase realtime.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.async_database import close_apb
+from app.config import settings
+from app.database import section_writes
+from app.services.job_queue import JobQueue
+from app.services.provider_clients import close_clients, start_clients
+from app.services.reference_loader import get_reference_store
+
+logger = logging.getLogger("app.worker")
+
+
+async def run_worker(concurrency: int) -> None:
+    start_clients()
+    queue = JobQueue(
+        settings.PIPELINE_QUEUE_PATH,
+        workers=concurrency,
+        lease_seconds=settings.PIPELINE_LEASE_SECONDS,
+        max_attempts=settings.PIPELINE_MAX_ATTEMPTS,
+    )
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await get_reference_store().start()
+    await queue.start()
+    logger.info("Worker %s running %d pipeline run(s) at a time", queue.worker_id, concurrency)
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Worker %s stopping; unfinished runs return to the queue", queue.worker_id)
+        await queue.stop()
+        queue.close()
+        await get_reference_store().stop()
+        await section_writes.flush()
+        await close_apb()
+        await close_clients()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run queued pipeline runs.")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.PIPELINE_WORKER_CONCURRENCY,
+        help="pipeline runs to execute at once (default: %(default)s)",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run_worker(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,571 @@
+"""Backfill historical role analyses and cover letters into PocketBase.
+
+Walks the role-analyses, cover-letters and evidence directories described in
+``plans/backfill-existing-data.md``, splits each monolithic markdown file into
+``section_key`` rows and creates the jobs and sections with batched writes.
+
+    cd backend
+    python -m scripts.backfill                    # dry run (print what would be created)
+    python -m scripts.backfill --commit           # actually write to PocketBase
+    python -m scripts.backfill --commit --clear   # wipe existing data first, then import
+
+Files are parsed one at a time and written in batches, so memory stays flat
+however many files there are. Imported files are recorded in a checkpoint
+file after every batch; a rerun skips them (and any job whose slug already
+exists), so an interrupted import resumes where it stopped.
+
+``jd_url`` and ``jd_text`` are required on jobs and come from the evidence
+file, so an analysis without one is reported as failed instead of written.
+It stays out of the checkpoint and is imported once its evidence is added.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from pocketbase.utils import ClientResponseError  # type: ignore[import-untyped]
+
+from app.async_database import apb, close_apb
+from app.database import record_to_dict, sanitize_pb_value
+from app.models import VERDICTS
+from app.services.job_import import make_slug
+
+logger = logging.getLogger("scripts.backfill")
+
+DEFAULT_ROOT = Path.home() / "Next"
+DEFAULT_CHECKPOINT = Path(__file__).resolve().parents[1] / ".cache" / "backfill_checkpoint.json"
+
+# PocketBase's batch API accepts 50 requests per call by default
+MAX_BATCH_REQUESTS = 50
+
+STAGE_BY_FOLDER = {"Applied": "applied", "Not Interested": "ignored"}
+
+# Job fields PocketBase requires that only the evidence file provides
+REQUIRED_JOB_FIELDS = ("jd_url", "jd_text")
+
+
+# ── Filename parsing ─────────────────────────────────────────────
+
+FILENAME_RE = re.compile(
+    r"score-(?P<score>[^_]+)__hours-(?P<hours>[^_]+)__(?P<status>[^_]+)__"
+    r"(?P<company>.+?)__(?P<role>.+?)__(?P<date_added>\d{4}-\d{2}-\d{2})"
+    r"(?:__posted-(?P<date_posted>[\w-]+))?$"
+)
+EVIDENCE_RE = re.compile(
+    r"^jd-evidence__(?P<company>.+?)__(?P<role>.+?)__(?P<date>\d{4}-\d{2}-\d{2})$"
+)
+
+
+@dataclass
+class FileMeta:
+    company: str
+    role: str
+    date_added: str
+    date_posted: Optional[str]
+    score: Optional[int]
+    hours: Optional[int]
+    draft: bool
+
+    @property
+    def match_key(self) -> tuple[str, str]:
+        return _match_key(self.company, self.role)
+
+
+def _display(name: str) -> str:
+    return name.replace("-", " ").strip()
+
+
+def _match_key(company: str, role: str) -> tuple[str, str]:
+    return (company.lower(), role.lower())
+
+
+def _int_or_none(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def parse_filename(stem: str) -> Optional[FileMeta]:
+    """Parse ``score-N__hours-H__Status__Company__Role__date[__posted-date]``.
+
+    Anything before ``score-`` (``Draft__``, ``Applied_Jan8_Waiting_``) is a
+    status prefix; a ``Draft`` prefix or status marks the analysis incomplete.
+    """
+    start = stem.find("score-")
+    if start < 0:
+        return None
+    match = FILENAME_RE.search(stem[start:])
+    if not match:
+        return None
+    prefix = stem[:start]
+    posted = match["date_posted"]
+    return FileMeta(
+        company=_display(match["company"]),
+        role=_display(match["role"]),
+        date_added=match["date_added"],
+        date_posted=None if posted in (None, "unknown") else posted,
+        score=_int_or_none(match["score"]),
+        hours=_int_or_none(match["hours"]),
+        draft="draft" in prefix.lower() or match["status"].lower() == "draft",
+    )
+
+
+# ── Markdown splitting ───────────────────────────────────────────
+
+# (heading pattern, section key); the first matching rule wins
+ANALYSIS_H2 = [
+    (r"PART 1\b|IMMEDIATE DISQUALIFIERS", "gate_check"),
+    (r"FINAL VERDICT", "final_verdict"),
+]
+# H3 rules, applied inside each H2 block whose heading matches the parent pattern
+ANALYSIS_H3 = [
+    (r"PART 2\b|SCORECARD", [
+        (r"SECTION 1\b|HEALTH", "scorecard_health"),
+        (r"SECTION 2\b|ROLE FIT", "scorecard_role_fit"),
+        (r"SECTION 3\b|SKILL MATCH|PERSONAL", "scorecard_personal"),
+    ]),
+    (r"PART 3\b|RESEARCH", [
+        (r"LEADERSHIP", "leadership_research"),
+        (r"STRATEG", "strategy_research"),
+        (r"GLASSDOOR|WLB", "glassdoor_research"),
+        (r"COMPANY", "company_research"),
+    ]),
+    (r"FINAL VERDICT", [
+        (r"GLASSDOOR|WLB", "glassdoor_research"),
+        (r"BETWEEN THE LINES", "between_the_lines"),
+        (r"HOURS", "hours_estimate"),
+    ]),
+]
+COVER_LETTER_H2 = [
+    (r"RESUME HEADLINE", "cl_resume_headlines"),
+    (r"PEP TALK", "cl_pep_talk"),
+    (r"SECTION 1\b|INTRO", "cl_intro"),
+    (r"SECTION 2\b|PROBLEM", "cl_problem"),
+    (r"SECTION 3\b|PROOF", "cl_proof"),
+    (r"SECTION 4\b|WHY THIS COMPANY", "cl_why_now"),
+    (r"SECTION 5\b|CLOSING", "cl_closing"),
+]
+# Everything from this heading to the end of the file is the assembled letter
+COVER_LETTER_ASSEMBLED = r"JUST SHIP IT|FINAL VERSION"
+
+
+def split_headings(text: str, level: int) -> list[tuple[str, str]]:
+    """Split markdown into (heading, block) pairs at headings of ``level``.
+
+    Each block includes its heading line; text before the first heading is
+    returned with an empty heading.
+    """
+    marker = re.compile(rf"^{'#' * level} (.+)$", re.MULTILINE)
+    blocks: list[tuple[str, str]] = []
+    last_heading, last_start = "", 0
+    for match in marker.finditer(text):
+        blocks.append((last_heading, text[last_start:match.start()]))
+        last_heading, last_start = match.group(1).strip(), match.start()
+    blocks.append((last_heading, text[last_start:]))
+    return [(h, b.strip()) for h, b in blocks if b.strip()]
+
+
+def _first_match(heading: str, rules: list[tuple[str, str]]) -> Optional[str]:
+    for pattern, key in rules:
+        if re.search(pattern, heading, re.IGNORECASE):
+            return key
+    return None
+
+
+def split_analysis(text: str) -> dict[str, str]:
+    sections: dict[str, str] = {}
+    for heading, block in split_headings(text, 2):
+        key = _first_match(heading, ANALYSIS_H2)
+        if key:
+            sections.setdefault(key, block)
+        for parent, rules in ANALYSIS_H3:
+            if re.search(parent, heading, re.IGNORECASE):
+                for sub_heading, sub_block in split_headings(block, 3):
+                    sub_key = _first_match(sub_heading, rules)
+                    if sub_key:
+                        sections.setdefault(sub_key, sub_block)
+                break
+    return sections
+
+
+def split_cover_letter(text: str) -> dict[str, str]:
+    sections: dict[str, str] = {}
+    assembled = re.search(rf"^## .*(?:{COVER_LETTER_ASSEMBLED}).*$", text, re.MULTILINE | re.IGNORECASE)
+    if assembled:
+        sections["cl_assembled"] = text[assembled.start():].strip()
+        text = text[:assembled.start()]
+    for heading, block in split_headings(text, 2):
+        key = _first_match(heading, COVER_LETTER_H2)
+        if key:
+            sections.setdefault(key, block)
+    return sections
+
+
+def parse_evidence(text: str) -> tuple[str, str]:
+    """Return (jd_url, jd_text) from an evidence file."""
+    url = re.search(r"\*\*URL:\*\*\s*<?(\S+?)>?\s*$", text, re.MULTILINE)
+    jd = re.search(r"^## Full JD Text\s*$", text, re.MULTILINE)
+    return (url.group(1) if url else "", text[jd.end():].strip() if jd else "")
+
+
+def parse_verdict(text: str) -> Optional[str]:
+    upper = text.upper()
+    # Longest first so "STRONG PURSUE" isn't read as "PURSUE"
+    for verdict in sorted(VERDICTS, key=len, reverse=True):
+        if verdict in upper:
+            return verdict
+    return None
+
+
+# ── Scanning ─────────────────────────────────────────────────────
+
+@dataclass
+class ParsedJob:
+    source: str  # analysis path relative to the root (checkpoint key)
+    mtime: float
+    job: dict
+    sections: dict[str, tuple[str, str]] = field(default_factory=dict)  # key -> (phase, content)
+
+    @property
+    def missing_fields(self) -> list[str]:
+        return [name for name in REQUIRED_JOB_FIELDS if not self.job.get(name)]
+
+
+def _folder_files(directory: Path) -> Iterator[tuple[Path, Optional[str]]]:
+    """Markdown files in ``directory`` and its status subfolders, with their stage."""
+    if not directory.is_dir():
+        return
+    for path in sorted(directory.glob("*.md")):
+        yield path, None
+    for folder, stage in STAGE_BY_FOLDER.items():
+        for path in sorted((directory / folder).glob("*.md")):
+            yield path, stage
+
+
+def _index_by_role(paths: Iterator[Path], key) -> dict[tuple[str, str], Path]:
+    """Map each (company, role) match key to the first file that has it."""
+    index = {}
+    for path in paths:
+        k = key(path.stem)
+        if k is not None:
+            index.setdefault(k, path)
+    return index
+
+
+def scan(root: Path) -> Iterator[ParsedJob]:
+    """Yield one parsed job per role analysis file, reading files lazily."""
+    analyses_dir = root / "role-analyses"
+
+    # Only paths are indexed up front; contents are read per analysis
+    def evidence_key(stem: str) -> Optional[tuple[str, str]]:
+        match = EVIDENCE_RE.match(stem)
+        return _match_key(_display(match["company"]), _display(match["role"])) if match else None
+
+    def letter_key(stem: str) -> Optional[tuple[str, str]]:
+        meta = parse_filename(stem)
+        return meta.match_key if meta else None
+
+    evidence = _index_by_role(iter(sorted((analyses_dir / "evidence").glob("*.md"))), evidence_key)
+    letters = _index_by_role(
+        (path for path, _ in _folder_files(root / "cover-letters")), letter_key
+    )
+
+    for path, folder_stage in _folder_files(analyses_dir):
+        meta = parse_filename(path.stem)
+        if meta is None:
+            logger.warning("Skipping %s: unrecognised filename", path.name)
+            continue
+
+        text = path.read_text(encoding="utf-8")
+        sections = {key: ("analysis", body) for key, body in split_analysis(text).items()}
+
+        jd_url = jd_text = ""
+        evidence_path = evidence.get(meta.match_key)
+        if evidence_path:
+            evidence_text = evidence_path.read_text(encoding="utf-8")
+            jd_url, jd_text = parse_evidence(evidence_text)
+            sections["evidence_cleanup"] = ("analysis", evidence_text.strip())
+
+        letter_path = letters.get(meta.match_key)
+        if letter_path:
+            letter = letter_path.read_text(encoding="utf-8")
+            sections.update(
+                (key, ("cover_letter", body)) for key, body in split_cover_letter(letter).items()
+            )
+
+        if meta.draft:
+            stage = "analyzing"
+        elif folder_stage:
+            stage = folder_stage
+        else:
+            stage = "ready" if letter_path else "analyzed"
+
+        job = {
+            "slug": make_slug(meta.company, meta.role, meta.date_added),
+            "company": meta.company,
+            "role": meta.role,
+            "jd_url": jd_url,
+            "jd_text": jd_text,
+            "jd_cleaned": sections["evidence_cleanup"][1] if "evidence_cleanup" in sections else "",
+            "pipeline_stage": stage,
+            "date_added": meta.date_added,
+            "date_posted": meta.date_posted or "",
+            "extraction_status": "complete",
+        }
+        if meta.score is not None:
+            job["score"] = meta.score
+        if meta.hours is not None:
+            job["hours"] = meta.hours
+        verdict = parse_verdict(sections.get("final_verdict", ("", ""))[1])
+        if verdict:
+            job["verdict"] = verdict
+
+        yield ParsedJob(
+            source=str(path.relative_to(root)),
+            mtime=path.stat().st_mtime,
+            job=job,
+            sections=sections,
+        )
+
+
+# ── Checkpoint ───────────────────────────────────────────────────
+
+class Checkpoint:
+    """Source files already imported, keyed by relative path with their mtime."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.done: dict[str, float] = {}
+        if path.exists():
+            self.done = json.loads(path.read_text()).get("done", {})
+
+    def is_done(self, item: ParsedJob) -> bool:
+        return self.done.get(item.source) == item.mtime
+
+    def mark(self, items: list[ParsedJob]) -> None:
+        for item in items:
+            self.done[item.source] = item.mtime
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"done": self.done}, indent=1))
+        tmp.replace(self.path)
+
+    def clear(self) -> None:
+        self.done = {}
+        self.path.unlink(missing_ok=True)
+
+
+# ── Import ───────────────────────────────────────────────────────
+
+@dataclass
+class Stats:
+    scanned: int = 0
+    jobs: int = 0
+    sections: int = 0
+    skipped: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def report(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (
+            f"{self.scanned} files scanned, {self.jobs} jobs and {self.sections} sections "
+            f"created, {self.skipped} skipped, {self.failed} failed in {elapsed:.1f}s "
+            f"({self.scanned / elapsed:.1f} files/s, {self.sections / elapsed:.1f} sections/s)"
+        )
+
+
+async def _existing_slugs(slugs: list[str]) -> set[str]:
+    records = await apb.collection("jobs").get_full_list(
+        query_params={
+            "filter": " || ".join(f"slug = '{sanitize_pb_value(s)}'" for s in slugs),
+            "fields": "slug",
+        }
+    )
+    return {record_to_dict(r)["slug"] for r in records}
+
+
+async def _create_jobs(items: list[ParsedJob]) -> list[tuple[ParsedJob, str]]:
+    """Create the items' jobs; returns (item, job id) for each one created.
+
+    One batch request when possible. A rejected row rolls back the whole
+    batch, so on failure the rows are created one by one and only the bad
+    ones are left out.
+    """
+    try:
+        records = await apb.collection("jobs").create_many([item.job for item in items])
+        return [(item, record_to_dict(r)["id"]) for item, r in zip(items, records)]
+    except ClientResponseError as exc:
+        logger.warning("Batch job insert failed, creating jobs one by one: %s", exc)
+
+    created = []
+    for item in items:
+        try:
+            record = await apb.collection("jobs").create(item.job)
+        except ClientResponseError as exc:
+            logger.error("Failed to import %s: %s", item.source, exc)
+            continue
+        created.append((item, record_to_dict(record)["id"]))
+    return created
+
+
+async def _write_batch(batch: list[ParsedJob], stats: Stats) -> list[ParsedJob]:
+    """Create one batch of jobs, then their sections; returns the items done.
+
+    Done items were created or already exist. Items missing a required field,
+    or whose job PocketBase rejects, are left out. If the sections can't be
+    written the batch's jobs are deleted again (sections cascade), so a job
+    never exists without its sections and the batch is retried on the next run.
+    """
+    existing = await _existing_slugs([item.job["slug"] for item in batch])
+    new = [item for item in batch if item.job["slug"] not in existing]
+    stats.skipped += len(batch) - len(new)
+    done = [item for item in batch if item.job["slug"] in existing]
+
+    valid = []
+    for item in new:
+        if item.missing_fields:
+            logger.error(
+                "Failed to import %s: no %s (no matching evidence file)",
+                item.source, " or ".join(item.missing_fields),
+            )
+        else:
+            valid.append(item)
+    if not valid:
+        return done
+
+    created = await _create_jobs(valid)
+    job_ids = [job_id for _, job_id in created]
+    rows = [
+        {
+            "job": job_id,
+            "section_key": key,
+            "phase": phase,
+            "status": "complete",
+            "content_md": content,
+            "is_locked": False,
+        }
+        for item, job_id in created
+        for key, (phase, content) in item.sections.items()
+    ]
+    try:
+        for i in range(0, len(rows), MAX_BATCH_REQUESTS):
+            await apb.collection("sections").create_many(rows[i:i + MAX_BATCH_REQUESTS])
+    except Exception:
+        await asyncio.gather(
+            *(apb.collection("jobs").delete(job_id) for job_id in job_ids),
+            return_exceptions=True,
+        )
+        raise
+    stats.jobs += len(created)
+    stats.sections += len(rows)
+    return done + [item for item, _ in created]
+
+
+async def _clear_jobs() -> int:
+    records = await apb.collection("jobs").get_full_list(query_params={"fields": "id"})
+    for i in range(0, len(records), MAX_BATCH_REQUESTS):
+        await asyncio.gather(
+            *(apb.collection("jobs").delete(r.id) for r in records[i:i + MAX_BATCH_REQUESTS])
+        )
+    return len(records)
+
+
+async def backfill(
+    root: Path,
+    commit: bool = False,
+    clear: bool = False,
+    checkpoint_path: Path = DEFAULT_CHECKPOINT,
+    batch_size: int = 25,
+) -> Stats:
+    stats = Stats()
+    checkpoint = Checkpoint(checkpoint_path)
+    batch_size = max(1, min(batch_size, MAX_BATCH_REQUESTS))
+
+    if commit and clear:
+        deleted = await _clear_jobs()
+        checkpoint.clear()
+        logger.info("Deleted %d existing jobs", deleted)
+
+    batch: list[ParsedJob] = []
+
+    async def flush() -> None:
+        nonlocal batch
+        if not batch:
+            return
+        try:
+            done = await _write_batch(batch, stats)
+        except Exception:
+            logger.exception("Failed to import batch starting at %s", batch[0].source)
+            stats.failed += len(batch)
+        else:
+            stats.failed += len(batch) - len(done)
+            checkpoint.mark(done)
+            checkpoint.save()
+        batch = []
+        logger.info("Progress: %s", stats.report())
+
+    for item in scan(root):
+        stats.scanned += 1
+        if checkpoint.is_done(item):
+            stats.skipped += 1
+            continue
+        if not commit:
+            if item.missing_fields:
+                print(f"[dry run] {item.job['slug']}: no {' or '.join(item.missing_fields)}, would fail")
+                stats.failed += 1
+                continue
+            print(
+                f"[dry run] {item.job['slug']} ({item.job['pipeline_stage']}): "
+                f"{len(item.sections)} sections — {', '.join(sorted(item.sections))}"
+            )
+            stats.jobs += 1
+            stats.sections += len(item.sections)
+            continue
+        batch.append(item)
+        if len(batch) >= batch_size:
+            await flush()
+    await flush()
+    return stats
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        stats = await backfill(
+            Path(args.root).expanduser(),
+            commit=args.commit,
+            clear=args.clear,
+            checkpoint_path=Path(args.checkpoint),
+            batch_size=args.batch_size,
+        )
+    finally:
+        await close_apb()
+    print(("Would import: " if not args.commit else "Imported: ") + stats.report())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill historical analyses into PocketBase.")
+    parser.add_argument("--root", default=str(DEFAULT_ROOT), help="folder holding role-analyses/ and cover-letters/")
+    parser.add_argument("--commit", action="store_true", help="write to PocketBase (default: dry run)")
+    parser.add_argument("--clear", action="store_true", help="with --commit: delete all jobs first")
+    parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT), help="progress file for resuming")
+    parser.add_argument("--batch-size", type=int, default=25, help="jobs per batched write")
+    args = parser.parse_args()
+    if args.clear and not args.commit:
+        parser.error("--clear requires --commit")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -66,13 +66,87 @@ def _make_section_record(**overrides):
     return _make_mock_record(**defaults)
 
 
+class _AsyncCollection:
+    """Awaitable view of a sync collection mock (``await c.get_one(...)``)."""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+class _AsyncPB:
+    """Async client stand-in that delegates to a sync PocketBase mock, so tests
+    configure and assert on one MagicMock whichever client the code uses."""
+
+    def __init__(self, mock):
+        self._mock = mock
+
+    def collection(self, name):
+        return _AsyncCollection(self._mock.collection(name))
+
+
+def _async_pb(mock):
+    return _AsyncPB(mock)
+
+
 # ── Fixtures ─────────────────────────────────────────────────────
 
+@pytest.fixture(autouse=True)
+def disable_response_cache(monkeypatch):
+    """Keep the on-disk LLM response cache out of tests."""
+    from app.config import settings
+    from app.services import llm_service
+
+    monkeypatch.setattr(settings, "LLM_CACHE_PATH", "")
+    monkeypatch.setattr(llm_service, "_response_cache", None)
+
+
+@pytest.fixture(autouse=True)
+def job_queue(monkeypatch):
+    """In-memory pipeline queue; workers only run when a test starts them."""
+    from app.services import job_queue as job_queue_module
+
+    queue = job_queue_module.JobQueue(":memory:", workers=1)
+    monkeypatch.setattr(job_queue_module, "_job_queue", queue)
+    yield queue
+    queue.close()
+
+
+@pytest.fixture(autouse=True)
+def search_index(monkeypatch):
+    """In-memory full-text index in place of the on-disk one."""
+    from app.services import search_index as search_index_module
+
+    index = search_index_module.SearchIndex(":memory:")
+    monkeypatch.setattr(search_index_module, "_search_index", index)
+    yield index
+    index.close()
+
+
+@pytest.fixture(autouse=True)
+def reset_section_writes():
+    """Drop any section writes or cached section ids a test left behind."""
+    from app.database import section_ids, section_writes
+
+    section_writes.clear()
+    section_ids.clear()
+    yield
+    section_writes.clear()
+    section_ids.clear()
+
+
 @pytest.fixture
 def mock_pb():
     """Mock PocketBase client — patches at every import site so the mock
-    actually reaches router code (each module binds `pb` at import time
-    via `from app.database import pb`)."""
+    actually reaches router code (each module binds `pb`/`apb` at import
+    time). The async client is an adapter over the same mock."""
     mock = MagicMock()
 
     # Default collection mock
@@ -92,11 +166,17 @@ def mock_pb():
 
     patches = [
         patch("app.database.pb", mock),
-        patch("app.routers.jobs.pb", mock),
-        patch("app.routers.sections.pb", mock),
-        patch("app.routers.pipeline.pb", mock),
-        patch("app.routers.chat.pb", mock),
-        patch("app.services.pipeline_executor.pb", mock),
+    ]
+    async_mock = _async_pb(mock)
+    patches += [
+        patch("app.database.apb", async_mock),
+        patch("app.routers.jobs.apb", async_mock),
+        patch("app.routers.sections.apb", async_mock),
+        patch("app.routers.pipeline.apb", async_mock),
+        patch("app.routers.chat.apb", async_mock),
+        patch("app.services.pipeline_executor.apb", async_mock),
+        patch("app.services.job_import.apb", async_mock),
+        patch("app.services.search_index.apb", async_mock),
     ]
 
     for p in patches:
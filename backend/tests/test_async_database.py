@@ -0,0 +1,96 @@
+"""Tests for the async PocketBase client."""
+import json
+
+import httpx
+import pytest
+from pocketbase.utils import ClientResponseError
+
+from app.async_database import AsyncPocketBase
+from app.database import record_to_dict
+
+
+def _client(handler) -> AsyncPocketBase:
+    pb = AsyncPocketBase("http://pb.test")
+    pb.http = httpx.AsyncClient(base_url=pb.base_url, transport=httpx.MockTransport(handler))
+    return pb
+
+
+async def test_get_one_decodes_record():
+    """Records come back as SDK Records that record_to_dict understands."""
+    def handler(request):
+        assert request.url.path == "/api/collections/jobs/records/abc"
+        return httpx.Response(200, json={"id": "abc", "company": "Acme"})
+
+    record = await _client(handler).collection("jobs").get_one("abc")
+
+    d = record_to_dict(record)
+    assert d["id"] == "abc"
+    assert d["company"] == "Acme"
+
+
+async def test_get_full_list_pages_until_short_page():
+    """get_full_list keeps requesting pages until one is not full."""
+    pages = []
+
+    def handler(request):
+        page = int(request.url.params["page"])
+        pages.append(page)
+        assert request.url.params["skipTotal"] == "1"
+        count = 2 if page == 1 else 1
+        items = [{"id": f"r{page}{i}"} for i in range(count)]
+        return httpx.Response(200, json={"page": page, "perPage": 2, "items": items})
+
+    records = await _client(handler).collection("sections").get_full_list(batch=2)
+
+    assert pages == [1, 2]
+    assert [r.id for r in records] == ["r10", "r11", "r20"]
+
+
+async def test_get_first_list_item_raises_404_when_empty():
+    def handler(request):
+        return httpx.Response(200, json={"page": 1, "perPage": 1, "items": []})
+
+    with pytest.raises(ClientResponseError) as exc:
+        await _client(handler).collection("jobs").get_first_list_item("slug = 'x'")
+
+    assert exc.value.status == 404
+
+
+async def test_error_status_raises_client_response_error():
+    def handler(request):
+        return httpx.Response(400, json={"message": "Failed to create record."})
+
+    with pytest.raises(ClientResponseError) as exc:
+        await _client(handler).collection("jobs").create({"company": ""})
+
+    assert exc.value.status == 400
+    assert exc.value.data == {"message": "Failed to create record."}
+
+
+async def test_update_sends_patch_with_body():
+    def handler(request):
+        assert request.method == "PATCH"
+        assert request.url.path == "/api/collections/jobs/records/abc"
+        assert request.content == b'{"pipeline_stage":"ready"}'
+        return httpx.Response(200, json={"id": "abc", "pipeline_stage": "ready"})
+
+    record = await _client(handler).collection("jobs").update("abc", {"pipeline_stage": "ready"})
+
+    assert record.pipeline_stage == "ready"
+
+
+async def test_create_many_sends_one_batch_request():
+    def handler(request):
+        assert request.method == "POST"
+        assert request.url.path == "/api/batch"
+        body = json.loads(request.content)
+        assert [r["body"]["slug"] for r in body["requests"]] == ["a", "b"]
+        assert body["requests"][0]["url"] == "/api/collections/jobs/records"
+        return httpx.Response(200, json=[
+            {"status": 200, "body": {"id": "1", "slug": "a"}},
+            {"status": 200, "body": {"id": "2", "slug": "b"}},
+        ])
+
+    records = await _client(handler).collection("jobs").create_many([{"slug": "a"}, {"slug": "b"}])
+
+    assert [r.id for r in records] == ["1", "2"]
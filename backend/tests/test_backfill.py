@@ -0,0 +1,222 @@
+"""Tests for the historical data backfill script."""
+from unittest.mock import patch
+
+from scripts import backfill
+from tests.conftest import _async_pb, _make_mock_record
+
+ANALYSIS = """# UpCodes — Product Manager
+
+## PART 1: IMMEDIATE DISQUALIFIERS
+None found.
+
+## PART 2: SCORECARD
+### SECTION 1: HEALTH & MATURITY
+Healthy.
+### SECTION 2: ROLE FIT
+Good fit.
+### SECTION 3: PERSONAL
+Fine.
+
+## PART 3: RESEARCH
+### Company Research
+Series B.
+### Leadership Experience & Stance
+Strong CPO.
+
+## FINAL VERDICT
+**STRONG PURSUE** — Total Score: 82/100
+### Between the Lines
+Fast pace.
+### Glassdoor & WLB Signal
+3.9 stars.
+### Hours Estimate
+40 hours.
+"""
+
+COVER_LETTER = """## RESUME HEADLINE OPTIONS
+Headline.
+## SECTION 1 — INTRO
+Hello.
+## SECTION 5 — CLOSING
+Thanks.
+## JUST SHIP IT
+Final letter.
+## FINAL NOTES
+Appendix.
+"""
+
+EVIDENCE = """# Evidence
+**URL:** https://example.com/upcodes-pm
+
+## Full JD Text
+We are hiring a PM.
+"""
+
+NAME = "score-82__hours-40__Complete__UpCodes__Product-Manager-Core__2026-01-26__posted-2026-01-11"
+
+
+def _tree(root, acme_evidence=True):
+    analyses = root / "role-analyses"
+    (analyses / "evidence").mkdir(parents=True)
+    (analyses / "Applied").mkdir()
+    (root / "cover-letters").mkdir()
+    (analyses / f"{NAME}.md").write_text(ANALYSIS)
+    (analyses / "evidence" / "jd-evidence__UpCodes__Product-Manager-Core__2026-01-26.md").write_text(EVIDENCE)
+    (root / "cover-letters" / f"{NAME}.md").write_text(COVER_LETTER)
+    (analyses / "Applied" / "Applied_Jan8_Waiting_score-70__hours-50__Complete__Acme__Engineer__2026-01-02__posted-unknown.md").write_text(ANALYSIS)
+    if acme_evidence:
+        (analyses / "evidence" / "jd-evidence__Acme__Engineer__2026-01-02.md").write_text(EVIDENCE)
+
+
+def test_parse_filename():
+    meta = backfill.parse_filename(NAME)
+    assert (meta.company, meta.role) == ("UpCodes", "Product Manager Core")
+    assert (meta.score, meta.hours) == (82, 40)
+    assert (meta.date_added, meta.date_posted) == ("2026-01-26", "2026-01-11")
+    assert not meta.draft
+
+    draft = backfill.parse_filename("Draft__score-TBD__hours-TBD__Draft__Acme__PM__2026-01-02__posted-unknown")
+    assert draft.draft and draft.score is None and draft.date_posted is None
+
+    assert backfill.parse_filename("notes") is None
+
+
+def test_split_analysis_maps_headings_to_section_keys():
+    sections = backfill.split_analysis(ANALYSIS)
+
+    assert set(sections) == {
+        "gate_check", "scorecard_health", "scorecard_role_fit", "scorecard_personal",
+        "company_research", "leadership_research", "final_verdict",
+        "between_the_lines", "glassdoor_research", "hours_estimate",
+    }
+    assert sections["scorecard_role_fit"] == "### SECTION 2: ROLE FIT\nGood fit."
+    # The verdict keeps its embedded subsections
+    assert "### Hours Estimate" in sections["final_verdict"]
+
+
+def test_split_cover_letter_assembled_runs_to_end():
+    sections = backfill.split_cover_letter(COVER_LETTER)
+
+    assert set(sections) == {"cl_resume_headlines", "cl_intro", "cl_closing", "cl_assembled"}
+    assert sections["cl_assembled"].endswith("Appendix.")
+
+
+def test_scan_matches_files_and_derives_stage(tmp_path):
+    _tree(tmp_path, acme_evidence=False)
+
+    jobs = {item.job["company"]: item for item in backfill.scan(tmp_path)}
+
+    upcodes = jobs["UpCodes"].job
+    assert upcodes["slug"] == "upcodes-product-manager-core-2026-01-26"
+    assert upcodes["pipeline_stage"] == "ready"
+    assert upcodes["jd_url"] == "https://example.com/upcodes-pm"
+    assert upcodes["jd_text"] == "We are hiring a PM."
+    assert (upcodes["score"], upcodes["verdict"]) == (82, "STRONG PURSUE")
+    assert jobs["UpCodes"].sections["cl_intro"][0] == "cover_letter"
+    assert "evidence_cleanup" in jobs["UpCodes"].sections
+
+    assert jobs["Acme"].job["pipeline_stage"] == "applied"
+    assert "evidence_cleanup" not in jobs["Acme"].sections
+    assert jobs["Acme"].missing_fields == ["jd_url", "jd_text"]
+
+
+async def test_dry_run_writes_nothing(tmp_path, mock_pb):
+    _tree(tmp_path)
+    checkpoint = tmp_path / "checkpoint.json"
+
+    with patch.object(backfill, "apb", _async_pb(mock_pb)):
+        stats = await backfill.backfill(tmp_path, checkpoint_path=checkpoint)
+
+    assert (stats.scanned, stats.jobs) == (2, 2)
+    mock_pb.collection().create_many.assert_not_called()
+    assert not checkpoint.exists()
+
+
+async def test_commit_batches_writes_and_resumes_from_checkpoint(tmp_path, mock_pb):
+    _tree(tmp_path)
+    checkpoint = tmp_path / "checkpoint.json"
+    collection = mock_pb.collection()
+    collection.create_many.side_effect = lambda rows: [
+        _make_mock_record(id=f"id{i}", **row) for i, row in enumerate(rows)
+    ]
+
+    with patch.object(backfill, "apb", _async_pb(mock_pb)):
+        stats = await backfill.backfill(tmp_path, commit=True, checkpoint_path=checkpoint)
+        # One jobs batch, then the sections of both jobs in one batch
+        assert collection.create_many.call_count == 2
+        assert stats.jobs == 2
+        assert stats.sections == len(collection.create_many.call_args.args[0])
+
+        rerun = await backfill.backfill(tmp_path, commit=True, checkpoint_path=checkpoint)
+
+    assert (rerun.jobs, rerun.skipped) == (0, 2)
+    assert collection.create_many.call_count == 2
+
+
+async def test_failed_section_write_removes_batch_jobs(tmp_path, mock_pb):
+    _tree(tmp_path)
+    collection = mock_pb.collection()
+    collection.create_many.side_effect = [
+        [_make_mock_record(id="j1"), _make_mock_record(id="j2")],
+        Exception("batch rejected"),
+    ]
+
+    with patch.object(backfill, "apb", _async_pb(mock_pb)):
+        stats = await backfill.backfill(tmp_path, commit=True, checkpoint_path=tmp_path / "cp.json")
+
+    assert stats.failed == 2
+    deleted = {c.args[0] for c in collection.delete.call_args_list}
+    assert deleted == {"j1", "j2"}
+    assert not (tmp_path / "cp.json").exists()
+
+
+async def test_rows_missing_required_fields_fail_without_blocking_the_batch(tmp_path, mock_pb):
+    _tree(tmp_path, acme_evidence=False)
+    checkpoint = tmp_path / "checkpoint.json"
+    collection = mock_pb.collection()
+
+    def create_many(rows):
+        # Like PocketBase: one invalid row rolls back the whole batch
+        if any(not row.get("jd_url") or not row.get("jd_text") for row in rows if "slug" in row):
+            raise backfill.ClientResponseError(status=400)
+        return [_make_mock_record(id=f"id{i}", **row) for i, row in enumerate(rows)]
+
+    collection.create_many.side_effect = create_many
+
+    with patch.object(backfill, "apb", _async_pb(mock_pb)):
+        stats = await backfill.backfill(tmp_path, commit=True, checkpoint_path=checkpoint)
+        assert (stats.jobs, stats.failed) == (1, 1)
+        jobs_rows = collection.create_many.call_args_list[0].args[0]
+        assert [row["company"] for row in jobs_rows] == ["UpCodes"]
+
+        # Acme stays out of the checkpoint and is retried once its evidence exists
+        (tmp_path / "role-analyses" / "evidence" / "jd-evidence__Acme__Engineer__2026-01-02.md").write_text(EVIDENCE)
+        rerun = await backfill.backfill(tmp_path, commit=True, checkpoint_path=checkpoint)
+
+    assert (rerun.jobs, rerun.skipped, rerun.failed) == (1, 1, 0)
+
+
+async def test_rejected_job_batch_falls_back_to_single_creates(tmp_path, mock_pb):
+    _tree(tmp_path)
+    collection = mock_pb.collection()
+    calls = []
+
+    def create_many(rows):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise backfill.ClientResponseError(status=400)
+        return [_make_mock_record(id=f"s{i}") for i, _ in enumerate(rows)]
+
+    def create(row):
+        if row["company"] == "Acme":
+            raise backfill.ClientResponseError(status=400)
+        return _make_mock_record(id="j1", **row)
+
+    collection.create_many.side_effect = create_many
+    collection.create.side_effect = create
+
+    with patch.object(backfill, "apb", _async_pb(mock_pb)):
+        stats = await backfill.backfill(tmp_path, commit=True, checkpoint_path=tmp_path / "cp.json")
+
+    assert (stats.jobs, stats.failed) == (1, 1)
+    assert {row["job"] for row in calls[1]} == {"j1"}
@@ -23,7 +23,7 @@ def test_chat_returns_sse_stream(client, mock_pb):
         _make_section_record(content_md="Analysis content here"),
     ]
 
-    # Mock AsyncAnthropic
+    # Mock the shared AsyncAnthropic client
     mock_stream_ctx = AsyncMock()
     mock_stream = AsyncMock()
     mock_stream.text_stream = AsyncMock()
@@ -34,8 +34,7 @@ def test_chat_returns_sse_stream(client, mock_pb):
     mock_async_client = MagicMock()
     mock_async_client.messages.stream.return_value = mock_stream_ctx
 
-    with patch("app.routers.chat.anthropic") as mock_anthropic:
-        mock_anthropic.AsyncAnthropic.return_value = mock_async_client
+    with patch("app.routers.chat.get_anthropic", return_value=mock_async_client):
         response = client.post(
             "/api/chat/test_job_id",
             json={"message": "Tell me about this role", "history": []},
@@ -60,8 +59,7 @@ def test_chat_passes_history(client, mock_pb):
     mock_async_client = MagicMock()
     mock_async_client.messages.stream.return_value = mock_stream_ctx
 
-    with patch("app.routers.chat.anthropic") as mock_anthropic:
-        mock_anthropic.AsyncAnthropic.return_value = mock_async_client
+    with patch("app.routers.chat.get_anthropic", return_value=mock_async_client):
         response = client.post(
             "/api/chat/test_job_id",
             json={
@@ -0,0 +1,172 @@
+"""Tests for Gemini context caching of shared reference bundles."""
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.context_cache import ContextCacheManager
+
+
+class FakeApiError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeCaches:
+    """Local stand-in for ``client.caches`` / ``client.aio.caches``."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.created = []
+        self.deleted = []
+
+    def create(self, *, model, config):
+        if isinstance(self.fail, Exception):
+            raise self.fail
+        if self.fail:
+            raise FakeApiError(400, "Cached content is too small")
+        name = f"cachedContents/{len(self.created) + 1}"
+        self.created.append((name, model, config))
+        return SimpleNamespace(name=name, expire_time=None)
+
+    def delete(self, *, name):
+        self.deleted.append(name)
+
+
+class FakeAsyncCaches:
+    def __init__(self, sync):
+        self.sync = sync
+
+    async def create(self, *, model, config):
+        return self.sync.create(model=model, config=config)
+
+    async def delete(self, *, name):
+        self.sync.delete(name=name)
+
+
+class FakeGenaiClient:
+    def __init__(self, fail=False):
+        self.caches = FakeCaches(fail=fail)
+        self.aio = SimpleNamespace(caches=FakeAsyncCaches(self.caches))
+
+
+def test_creates_once_and_reuses_by_hash():
+    client = FakeGenaiClient()
+    manager = ContextCacheManager(client, ttl_seconds=3600)
+
+    first = manager.get_or_create(model="m", system="sys", cached_content="RUBRIC")
+    second = manager.get_or_create(model="m", system="sys", cached_content="RUBRIC")
+
+    assert first == second
+    assert len(client.caches.created) == 1
+    config = client.caches.created[0][2]
+    assert config["system_instruction"] == "sys"
+    assert "RUBRIC" in config["contents"][0]["parts"][0]["text"]
+
+
+def test_changed_reference_recreates_and_deletes_old():
+    client = FakeGenaiClient()
+    manager = ContextCacheManager(client)
+
+    old = manager.get_or_create(model="m", system="sys", cached_content="RUBRIC v1")
+    new = manager.get_or_create(model="m", system="sys", cached_content="RUBRIC v2")
+
+    assert old != new
+    assert client.caches.deleted == [old]
+
+
+def test_different_systems_get_separate_caches():
+    client = FakeGenaiClient()
+    manager = ContextCacheManager(client)
+
+    a = manager.get_or_create(model="m", system="health", cached_content="RUBRIC")
+    b = manager.get_or_create(model="m", system="role_fit", cached_content="RUBRIC")
+
+    assert a != b
+    assert client.caches.deleted == []
+
+
+def test_expiring_entry_is_recreated():
+    client = FakeGenaiClient()
+    manager = ContextCacheManager(client, ttl_seconds=100, refresh_margin_seconds=10)
+
+    now = time.time()
+    with patch("app.services.context_cache.time.time", return_value=now):
+        first = manager.get_or_create(model="m", system="s", cached_content="R")
+    with patch("app.services.context_cache.time.time", return_value=now + 95):
+        second = manager.get_or_create(model="m", system="s", cached_content="R")
+
+    assert first != second
+    # Expired server-side already, so nothing to delete
+    assert client.caches.deleted == []
+
+
+def test_creation_failure_falls_back_and_is_remembered():
+    client = FakeGenaiClient(fail=True)
+    manager = ContextCacheManager(client)
+
+    assert manager.get_or_create(model="m", system="s", cached_content="tiny") is None
+    client.caches.fail = False
+    assert manager.get_or_create(model="m", system="s", cached_content="tiny") is None
+    assert client.caches.created == []
+
+
+def test_transient_creation_failure_is_retried_later():
+    """A 429/5xx only pauses creation for this bundle instead of disabling it."""
+    client = FakeGenaiClient(fail=FakeApiError(503, "unavailable"))
+    manager = ContextCacheManager(client, retry_after_seconds=30)
+
+    assert manager.get_or_create(model="m", system="s", cached_content="R") is None
+    client.caches.fail = False
+    assert manager.get_or_create(model="m", system="s", cached_content="R") is None
+    assert client.caches.created == []
+
+    with patch("app.services.context_cache.time.time", return_value=time.time() + 31):
+        assert manager.get_or_create(model="m", system="s", cached_content="R") is not None
+    assert len(client.caches.created) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_get_or_create_reuses():
+    client = FakeGenaiClient()
+    manager = ContextCacheManager(client)
+
+    first = await manager.get_or_create_async(model="m", system="s", cached_content="R")
+    second = await manager.get_or_create_async(model="m", system="s", cached_content="R")
+
+    assert first == second
+    assert len(client.caches.created) == 1
+
+
+@pytest.mark.asyncio
+async def test_call_llm_with_cache_async_uses_cached_content():
+    """The request references the cached content instead of inlining it."""
+    from app.services import llm_service
+
+    response = MagicMock()
+    response.text = "# Score"
+    response.usage_metadata.prompt_token_count = 5000
+    response.usage_metadata.candidates_token_count = 100
+    response.usage_metadata.cached_content_input_token_count = 4800
+    calls = []
+
+    async def fake_generate(**kwargs):
+        calls.append(kwargs)
+        return response
+
+    fake = FakeGenaiClient()
+    fake.aio.models = SimpleNamespace(generate_content=fake_generate)
+    manager = ContextCacheManager(fake)
+
+    with patch.object(llm_service, "client", fake), \
+            patch.object(llm_service, "context_cache", manager):
+        result = await llm_service.call_llm_with_cache_async(
+            system="sys", user="score this", cached_content="RUBRIC"
+        )
+
+    config = calls[0]["config"]
+    assert config["cached_content"] == "cachedContents/1"
+    assert "system_instruction" not in config
+    assert result.cached_tokens == 4800
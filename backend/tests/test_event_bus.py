@@ -0,0 +1,63 @@
+"""Tests for the in-process pipeline event bus."""
+from app.models import PipelineEvent
+from app.services.event_bus import RUN_FINISHED, EventBus
+
+
+async def test_publish_reaches_job_subscribers_only():
+    bus = EventBus()
+    event = PipelineEvent(section_key="gate_check", status="running")
+
+    with bus.subscribe("job1") as q1, bus.subscribe("job2") as q2:
+        assert bus.publish("job1", event) is event
+        assert q1.get_nowait() is event
+        assert q2.empty()
+
+
+async def test_run_finished_sent_after_last_active_run():
+    bus = EventBus()
+
+    with bus.subscribe("job1") as queue:
+        bus.begin_run("job1")
+        bus.begin_run("job1")
+        bus.end_run("job1")
+        assert bus.is_running("job1")
+        assert queue.empty()
+
+        bus.end_run("job1")
+        assert not bus.is_running("job1")
+        assert queue.get_nowait() is RUN_FINISHED
+
+
+async def test_subscription_removed_on_exit():
+    bus = EventBus()
+
+    with bus.subscribe("job1"):
+        pass
+
+    assert "job1" not in bus._subscribers
+    bus.publish("job1", PipelineEvent(section_key="gate_check", status="running"))
+
+
+async def test_run_pipeline_publishes_events():
+    """Events yielded by run_pipeline are also published to the bus."""
+    from unittest.mock import patch
+
+    from app.database import record_to_dict
+    from app.models import JobResponse
+    from app.services import pipeline_executor
+    from app.services.event_bus import event_bus
+    from tests.conftest import _make_job_record
+
+    job = JobResponse(**record_to_dict(_make_job_record()))
+
+    async def fake_phase(job, phase, mode):
+        assert event_bus.is_running(job.id)
+        yield PipelineEvent(section_key="gate_check", status="running")
+
+    with patch.object(pipeline_executor, "_execute_phase", fake_phase), \
+            event_bus.subscribe(job.id) as queue:
+        events = [e async for e in pipeline_executor.run_pipeline(job, "analysis")]
+
+    assert queue.get_nowait() is events[0]
+    assert queue.get_nowait() is RUN_FINISHED
+    assert not event_bus.is_running(job.id)
@@ -6,6 +6,13 @@ from unittest.mock import AsyncMock, Mock, patch
 from app.extraction import ExtractionError, extract_company_role
 
 
+def _mock_client(**create_kwargs):
+    """Shared async Anthropic client stand-in with messages.create mocked."""
+    client = Mock()
+    client.messages.create = AsyncMock(**create_kwargs)
+    return patch("app.extraction.get_anthropic", return_value=client)
+
+
 @pytest.mark.asyncio
 async def test_extract_parses_valid_json():
     """Extracts company and role from valid JSON response."""
@@ -15,7 +22,7 @@ async def test_extract_parses_valid_json():
     mock_block.text = '{"company": "Test Corp", "role": "Engineer"}'
     mock_response.content = [mock_block]
 
-    with patch("app.extraction.client.messages.create", return_value=mock_response):
+    with _mock_client(return_value=mock_response):
         result = await extract_company_role("Sample JD text")
         assert result == {"company": "Test Corp", "role": "Engineer"}
 
@@ -29,7 +36,7 @@ async def test_extract_raises_on_invalid_json():
     mock_block.text = "not valid json"
     mock_response.content = [mock_block]
 
-    with patch("app.extraction.client.messages.create", return_value=mock_response):
+    with _mock_client(return_value=mock_response):
         with pytest.raises(ExtractionError, match="JSON"):
             await extract_company_role("Sample JD text")
 
@@ -43,7 +50,7 @@ async def test_extract_raises_on_missing_fields():
     mock_block.text = '{"company": "Test Corp"}'
     mock_response.content = [mock_block]
 
-    with patch("app.extraction.client.messages.create", return_value=mock_response):
+    with _mock_client(return_value=mock_response):
         with pytest.raises(ExtractionError, match="Invalid"):
             await extract_company_role("Sample JD text")
 
@@ -51,10 +58,7 @@ async def test_extract_raises_on_missing_fields():
 @pytest.mark.asyncio
 async def test_extract_raises_on_api_error():
     """Raises ExtractionError when API call fails."""
-    with patch(
-        "app.extraction.client.messages.create",
-        side_effect=Exception("API error"),
-    ):
+    with _mock_client(side_effect=Exception("API error")):
         with pytest.raises(ExtractionError, match="Extraction failed"):
             await extract_company_role("Sample JD text")
 
@@ -0,0 +1,218 @@
+"""Tests for the durable pipeline run queue."""
+import asyncio
+import sqlite3
+
+from app.services.event_bus import RUN_FINISHED, event_bus
+from app.services.job_queue import JobQueue
+
+
+def _attempts(path, run_id):
+    queue = JobQueue(path)
+    try:
+        return queue.get(run_id).attempts
+    finally:
+        queue.close()
+
+
+def test_enqueue_dedups_active_runs_and_raises_priority():
+    queue = JobQueue(":memory:")
+
+    first = queue.enqueue("job1", "analysis", priority=0)
+    again = queue.enqueue("job1", "analysis", priority=5)
+    other_phase = queue.enqueue("job1", "cover_letter")
+
+    assert again.id == first.id
+    assert again.priority == 5
+    assert other_phase.id != first.id
+    assert [r.phase for r in queue.active("job1")] == ["analysis", "cover_letter"]
+
+
+async def test_enqueue_many_queues_in_one_transaction():
+    queue = JobQueue(":memory:")
+    existing = queue.enqueue("job1", "analysis", priority=0)
+
+    runs = await queue.aenqueue_many(["job1", "job2", "job3"], "analysis", priority=5)
+
+    assert runs[0].id == existing.id and runs[0].priority == 5
+    assert [r.job_id for r in runs] == ["job1", "job2", "job3"]
+    assert len({r.id for r in runs}) == 3
+    assert [queue._claim().job_id for _ in range(3)] == ["job1", "job2", "job3"]
+
+
+def test_full_request_upgrades_queued_incremental_run():
+    queue = JobQueue(":memory:")
+
+    run = queue.enqueue("job1", "analysis", mode="incremental")
+    assert queue.enqueue("job1", "analysis", mode="incremental").mode == "incremental"
+    assert queue.enqueue("job1", "analysis").mode == "full"
+    # Never downgraded
+    assert queue.enqueue("job1", "analysis", mode="incremental").mode == "full"
+    assert queue._claim().id == run.id and queue.get(run.id).mode == "full"
+
+
+def test_claim_orders_by_priority_then_age():
+    queue = JobQueue(":memory:")
+    low = queue.enqueue("a", "analysis", priority=0)
+    high = queue.enqueue("b", "analysis", priority=10)
+    low2 = queue.enqueue("c", "analysis", priority=0)
+
+    assert queue.position(low2.id) == 2
+    assert [queue._claim().id for _ in range(3)] == [high.id, low.id, low2.id]
+    assert queue._claim() is None
+
+
+async def test_runs_survive_restart(tmp_path):
+    """A run whose worker died is claimed again once its lease expires."""
+    path = tmp_path / "queue.sqlite3"
+    crashed = JobQueue(path, worker_id="dead", lease_seconds=0)
+    run = crashed.enqueue("job1", "analysis")
+    crashed._claim()
+    crashed.close()
+
+    executed = []
+
+    async def runner(job_id, phase, mode):
+        executed.append((job_id, phase))
+
+    queue = JobQueue(path, workers=1, runner=runner)
+    await queue.start()
+    try:
+        while queue.get(run.id).status != "done":
+            await asyncio.sleep(0.01)
+    finally:
+        await queue.stop()
+        queue.close()
+
+    assert executed == [("job1", "analysis")]
+    assert _attempts(path, run.id) == 2
+
+
+async def test_workers_limit_concurrency_and_record_failures():
+    running = 0
+    peak = 0
+
+    async def runner(job_id, phase, mode):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        if job_id == "bad":
+            raise RuntimeError("boom")
+
+    queue = JobQueue(":memory:", workers=2, runner=runner)
+    runs = [queue.enqueue(job_id, "analysis") for job_id in ("a", "b", "c", "bad")]
+    await queue.start()
+    try:
+        while any(queue.get(r.id).status in ("queued", "running") for r in runs):
+            await asyncio.sleep(0.01)
+    finally:
+        await queue.stop()
+
+    assert peak == 2
+    assert [queue.get(r.id).status for r in runs] == ["done", "done", "done", "failed"]
+    assert queue.get(runs[-1].id).error == "boom"
+
+
+async def test_cancel_running_run_cancels_its_task():
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def runner(job_id, phase, mode):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    queue = JobQueue(":memory:", workers=1, runner=runner)
+    run = queue.enqueue("job1", "analysis")
+    await queue.start()
+    try:
+        await asyncio.wait_for(started.wait(), 1)
+        assert [r.id for r in queue.cancel("job1")] == [run.id]
+        await asyncio.wait_for(cancelled.wait(), 1)
+    finally:
+        await queue.stop()
+
+    assert queue.get(run.id).status == "cancelled"
+
+
+def test_cancel_queued_run_releases_stream_subscribers():
+    queue = JobQueue(":memory:")
+    queue.enqueue("job1", "analysis")
+
+    with event_bus.subscribe("job1") as events:
+        queue.cancel("job1")
+        assert events.get_nowait() is RUN_FINISHED
+
+
+async def test_heartbeat_stops_run_cancelled_by_another_process(tmp_path):
+    """Cancelling from the API process reaches the worker on its next heartbeat."""
+    path = tmp_path / "queue.sqlite3"
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def runner(job_id, phase, mode):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    api = JobQueue(path, workers=0)
+    worker = JobQueue(path, workers=1, runner=runner, worker_id="w1", lease_seconds=0.3)
+    run = api.enqueue("job1", "analysis")
+    await worker.start()
+    try:
+        await asyncio.wait_for(started.wait(), 1)
+        assert api.get(run.id).worker_id == "w1"
+        api.cancel("job1")
+        await asyncio.wait_for(cancelled.wait(), 1)
+    finally:
+        await worker.stop()
+        worker.close()
+        api.close()
+
+
+def test_run_that_keeps_losing_its_lease_is_marked_failed(tmp_path):
+    path = tmp_path / "queue.sqlite3"
+    queue = JobQueue(path, lease_seconds=0, max_attempts=2)
+    run = queue.enqueue("job1", "analysis")
+    try:
+        assert queue._claim().id == run.id
+        assert queue._claim().id == run.id  # lease expired: reclaimed
+        assert queue._claim() is None
+        failed = queue.get(run.id)
+        assert failed.status == "failed"
+        assert failed.error == "Gave up after 2 attempts"
+    finally:
+        queue.close()
+
+
+async def test_worker_retries_after_database_errors(monkeypatch):
+    executed = asyncio.Event()
+
+    async def runner(job_id, phase, mode):
+        executed.set()
+
+    queue = JobQueue(":memory:", workers=1, runner=runner, poll_seconds=0.01)
+    claim = queue._claim
+    failures = iter([sqlite3.OperationalError("database is locked")])
+
+    def flaky_claim():
+        for exc in failures:
+            raise exc
+        return claim()
+
+    monkeypatch.setattr(queue, "_claim", flaky_claim)
+    run = await queue.aenqueue("job1", "analysis")
+    await queue.start()
+    try:
+        await asyncio.wait_for(executed.wait(), 1)
+    finally:
+        await queue.stop()
+
+    assert (await queue.aget(run.id)).attempts == 1
@@ -2,10 +2,10 @@
 import pytest
 from unittest.mock import AsyncMock, Mock
 
-from tests.conftest import _make_job_record
+from tests.conftest import _make_job_record, _make_mock_record, _make_section_record
 
 
-def test_create_job_saves_and_extracts(client, mock_pb, mock_extraction):
+def test_create_job_saves_and_extracts(client, mock_pb, mock_extraction, job_queue):
     """Job is created and extraction runs successfully."""
     # After extraction, get_one returns the fully-populated job
     mock_pb.collection().get_one.return_value = _make_job_record()
@@ -28,6 +28,10 @@ def test_create_job_saves_and_extracts(client, mock_pb, mock_extraction):
     # Verify extraction was called
     mock_extraction.assert_called_once()
 
+    # Analysis is queued rather than started inline
+    [run] = job_queue.active("test_job_id")
+    assert (run.phase, run.status) == ("analysis", "queued")
+
 
 def test_create_job_extraction_failure_still_saves(client, mock_pb, mock_extraction):
     """Job is created even if extraction fails."""
@@ -181,8 +185,15 @@ def test_update_job_company_role(client, mock_pb):
     assert response.status_code == 200
 
 
+def _list_probe(total=2, updated="2026-01-30T12:00:00.000Z"):
+    """get_list result for list_jobs' count/latest-update probe."""
+    return {"page": 1, "perPage": 1, "totalItems": total,
+            "items": [_make_job_record(updated=updated)] if total else []}
+
+
 def test_list_jobs(client, mock_pb):
     """GET /api/jobs returns list of jobs."""
+    mock_pb.collection().get_list.return_value = _list_probe()
     mock_pb.collection().get_full_list.return_value = [
         _make_job_record(),
         _make_job_record(id="test_job_id_2", company="Beta Inc"),
@@ -198,6 +209,67 @@ def test_list_jobs(client, mock_pb):
     assert query_params["sort"] == "-date_added"
 
 
+def test_list_jobs_excludes_large_text_by_default(client, mock_pb):
+    mock_pb.collection().get_list.return_value = _list_probe(total=1)
+    mock_pb.collection().get_full_list.return_value = [
+        _make_mock_record(id="j1", company="Acme", role="PM", date_added="2026-01-30",
+                          pipeline_stage="queue", created="", updated=""),
+    ]
+
+    response = client.get("/api/jobs")
+
+    fields = mock_pb.collection().get_full_list.call_args.kwargs["query_params"]["fields"].split(",")
+    assert "jd_text" not in fields and "jd_cleaned" not in fields
+    assert "score" in fields
+    assert "jd_text" not in response.json()[0]
+    assert response.headers["X-Total-Count"] == "1"
+
+
+def test_list_jobs_fields_projection(client, mock_pb):
+    mock_pb.collection().get_list.return_value = _list_probe()
+    mock_pb.collection().get_full_list.return_value = []
+
+    client.get("/api/jobs?fields=jd_text,score")
+    fields = mock_pb.collection().get_full_list.call_args.kwargs["query_params"]["fields"]
+    assert fields.split(",")[-2:] == ["jd_text", "score"]
+    assert "id" in fields.split(",")
+
+    assert client.get("/api/jobs?fields=password").status_code == 400
+
+
+def test_list_jobs_paginates(client, mock_pb):
+    page = {"page": 2, "perPage": 10, "items": [_make_job_record()]}
+    mock_pb.collection().get_list.side_effect = [_list_probe(total=11), page]
+
+    response = client.get("/api/jobs?page=2&per_page=10")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert response.headers["X-Total-Count"] == "11"
+    assert response.headers["X-Page"] == "2"
+    page_call = mock_pb.collection().get_list.call_args_list[1]
+    assert page_call.args[:2] == (2, 10)
+    mock_pb.collection().get_full_list.assert_not_called()
+
+
+def test_list_jobs_etag_short_circuits(client, mock_pb):
+    """A matching If-None-Match gets 304 without fetching the list."""
+    mock_pb.collection().get_list.return_value = _list_probe()
+    mock_pb.collection().get_full_list.return_value = [_make_job_record()]
+
+    first = client.get("/api/jobs")
+    etag = first.headers["ETag"]
+    second = client.get("/api/jobs", headers={"If-None-Match": etag})
+
+    assert second.status_code == 304
+    assert mock_pb.collection().get_full_list.call_count == 1
+
+    # Any change to the matching jobs changes the tag
+    mock_pb.collection().get_list.return_value = _list_probe(updated="2026-02-01T00:00:00.000Z")
+    third = client.get("/api/jobs", headers={"If-None-Match": etag})
+    assert third.status_code == 200
+
+
 def test_get_job_detail(client, mock_pb):
     """GET /api/jobs/{id} returns job with sections."""
     mock_pb.collection().get_one.return_value = _make_job_record()
@@ -210,6 +282,53 @@ def test_get_job_detail(client, mock_pb):
     assert data["sections"] == []
 
 
+def _job_with_sections(*sections):
+    return _make_job_record(expand={"sections_via_job": list(sections)})
+
+
+def test_get_job_detail_single_request(client, mock_pb):
+    """Sections arrive expanded on the job record — no second query."""
+    mock_pb.collection().get_one.return_value = _job_with_sections(
+        _make_section_record(id="s2", section_key="fit_assessment", created="2026-01-30T12:05:00.000Z"),
+        _make_section_record(id="s1", section_key="evidence_cleanup", created="2026-01-30T12:01:00.000Z"),
+    )
+
+    response = client.get("/api/jobs/test_job_id")
+    assert response.status_code == 200
+    data = response.json()
+    assert [s["section_key"] for s in data["sections"]] == ["evidence_cleanup", "fit_assessment"]
+    assert data["sections"][0]["content_md"].startswith("# Test Content")
+    assert "expand" not in data
+    mock_pb.collection().get_one.assert_called_once_with(
+        "test_job_id", {"expand": "sections_via_job"}
+    )
+    mock_pb.collection().get_full_list.assert_not_called()
+
+
+def test_get_job_detail_content_for_selected_sections(client, mock_pb):
+    mock_pb.collection().get_one.return_value = _job_with_sections(
+        _make_section_record(id="s1", section_key="evidence_cleanup"),
+        _make_section_record(id="s2", section_key="fit_assessment"),
+    )
+
+    response = client.get("/api/jobs/test_job_id", params={"content": "fit_assessment"})
+    sections = {s["section_key"]: s for s in response.json()["sections"]}
+    assert "content_md" not in sections["evidence_cleanup"]
+    assert sections["fit_assessment"]["content_md"].startswith("# Test Content")
+
+
+def test_get_job_detail_without_content(client, mock_pb):
+    """content= asks PocketBase to leave content_md out of the expanded sections."""
+    mock_pb.collection().get_one.return_value = _job_with_sections()
+
+    response = client.get("/api/jobs/test_job_id", params={"content": ""})
+    assert response.status_code == 200
+    fields = mock_pb.collection().get_one.call_args.args[1]["fields"].split(",")
+    assert "*" in fields
+    assert "expand.sections_via_job.section_key" in fields
+    assert "expand.sections_via_job.content_md" not in fields
+
+
 def test_delete_job(client, mock_pb):
     """DELETE /api/jobs/{id} succeeds."""
     response = client.delete("/api/jobs/test_job_id")
@@ -237,3 +356,122 @@ def test_update_stage_invalid(client, mock_pb):
         json={"stage": "invalid_stage"},
     )
     assert response.status_code == 400
+
+
+def test_bulk_create_jobs_streams_progress(client, mock_pb, job_queue):
+    """Bulk import dedupes, fetches missing JDs, batch-creates and queues analysis."""
+    import json
+    from unittest.mock import patch
+
+    from app.services.jd_fetcher import FetchResult
+    from tests.conftest import _make_mock_record
+
+    jd = "Looking for a Senior Engineer at Acme Corp. " * 3
+
+    def full_list(query_params=None, **kwargs):
+        if "jd_url" in query_params["filter"]:
+            return [_make_mock_record(id="old_job", jd_url="https://example.com/old")]
+        # Slug lookup: one Acme slug is already taken
+        return [_make_mock_record(slug="acme-senior-engineer-2026-01-30")]
+
+    collection = mock_pb.collection()
+    collection.get_full_list.side_effect = full_list
+    collection.create_many.side_effect = lambda rows: [
+        _make_mock_record(id=f"new{i}", **row) for i, row in enumerate(rows)
+    ]
+
+    fetched = FetchResult(
+        success=True, jd_text=jd, is_complete=True, confidence=0.9, word_count=30,
+        html_word_count=40, section_headings=[], error_message=None, method_used="httpx",
+    )
+    with patch("app.services.job_import.fetch_jd_from_url", AsyncMock(return_value=fetched)) as fetch, \
+         patch("app.services.job_import.extract_company_role", AsyncMock(
+             return_value={"company": "Acme", "role": "Senior Engineer"})), \
+         patch("app.services.job_import.make_slug", return_value="acme-senior-engineer-2026-01-30"):
+        response = client.post("/api/jobs/bulk", json={"items": [
+            {"jd_url": "https://example.com/a", "jd_text": jd},
+            {"jd_url": "https://example.com/old"},
+            {"jd_url": "https://example.com/b"},
+            {"jd_url": "https://example.com/a"},
+        ]})
+
+    assert response.status_code == 200
+    events = [json.loads(l[6:]) for l in response.text.splitlines() if l.startswith("data: ")]
+    by_status = {}
+    for e in events[:-1]:
+        by_status.setdefault(e["status"], []).append(e)
+
+    assert {e["index"] for e in by_status["duplicate"]} == {1, 3}
+    assert [e["index"] for e in by_status["fetched"]] == [2]
+    fetch.assert_awaited_once_with("https://example.com/b")
+    assert sorted(e["index"] for e in by_status["created"]) == [0, 2]
+    assert all(e["analysis_queued"] for e in by_status["created"])
+    assert events[-1] == {"done": True, "duplicate": 2, "created": 2}
+
+    # One batch insert, with unique slugs past the taken one
+    [rows], _ = collection.create_many.call_args
+    assert sorted(r["slug"] for r in rows) == [
+        "acme-senior-engineer-2026-01-30-2", "acme-senior-engineer-2026-01-30-3",
+    ]
+    assert {r.job_id for r in job_queue.active("new0") + job_queue.active("new1")} == {"new0", "new1"}
+
+
+def test_bulk_create_rejects_empty_items(client):
+    response = client.post("/api/jobs/bulk", json={"items": []})
+    assert response.status_code == 422
+
+
+def test_bulk_create_falls_back_to_single_creates(client, mock_pb, job_queue):
+    """When the batch insert is rejected, each job is created on its own."""
+    from unittest.mock import patch
+
+    from pocketbase.utils import ClientResponseError
+
+    collection = mock_pb.collection()
+    collection.create_many.side_effect = ClientResponseError("batch disabled", status=403)
+    collection.create.side_effect = [_make_job_record(id="j1"), Exception("slug taken")]
+
+    with patch("app.services.job_import.extract_company_role", AsyncMock(
+            return_value={"company": "Acme", "role": "Engineer"})):
+        response = client.post("/api/jobs/bulk", json={"analyze": False, "items": [
+            {"jd_url": "https://example.com/a", "jd_text": "x" * 60},
+            {"jd_url": "https://example.com/b", "jd_text": "y" * 60},
+        ]})
+
+    assert '"status": "created"' in response.text
+    assert '"error": "slug taken"' in response.text
+    assert collection.create.call_count == 2
+    assert job_queue.active("j1") == []
+
+
+def test_bulk_create_reports_fetch_failures_without_inserting(client, mock_pb, job_queue):
+    """A posting whose JD can't be fetched fails on its own and stays out of the batch."""
+    import json
+    from unittest.mock import patch
+
+    from app.services.jd_fetcher import FetchResult
+
+    collection = mock_pb.collection()
+    collection.create_many.side_effect = lambda rows: [
+        _make_mock_record(id=f"new{i}", **row) for i, row in enumerate(rows)
+    ]
+    failed_fetch = FetchResult(
+        success=False, jd_text="", is_complete=False, confidence=0.0, word_count=0,
+        html_word_count=0, section_headings=[], error_message="HTTP 404", method_used="httpx",
+    )
+
+    with patch("app.services.job_import.fetch_jd_from_url", AsyncMock(return_value=failed_fetch)), \
+         patch("app.services.job_import.extract_company_role", AsyncMock(
+             return_value={"company": "Acme", "role": "Engineer"})):
+        response = client.post("/api/jobs/bulk", json={"items": [
+            {"jd_url": "https://example.com/a", "jd_text": "x" * 60},
+            {"jd_url": "https://example.com/gone"},
+        ]})
+
+    events = [json.loads(l[6:]) for l in response.text.splitlines() if l.startswith("data: ")]
+    assert {"index": 1, "jd_url": "https://example.com/gone", "status": "failed", "error": "HTTP 404"} in events
+    assert events[-1] == {"done": True, "created": 1, "failed": 1}
+    [rows], _ = collection.create_many.call_args
+    assert [r["jd_url"] for r in rows] == ["https://example.com/a"]
+    collection.create.assert_not_called()
+    assert [r.job_id for r in job_queue.active("new0")] == ["new0"]
@@ -0,0 +1,235 @@
+"""Tests for the LLM service."""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _make_response(text="# Output", prompt_tokens=10, candidate_tokens=5):
+    response = MagicMock()
+    response.text = text
+    response.usage_metadata.prompt_token_count = prompt_tokens
+    response.usage_metadata.candidates_token_count = candidate_tokens
+    response.usage_metadata.cached_content_input_token_count = 0
+    return response
+
+
+@pytest.mark.asyncio
+async def test_call_llm_async_uses_async_client():
+    """call_llm_async awaits client.aio instead of the blocking client."""
+    from app.services import llm_service
+
+    calls = []
+
+    async def fake_generate(**kwargs):
+        calls.append(kwargs)
+        return _make_response()
+
+    mock_client = MagicMock()
+    mock_client.aio.models.generate_content = fake_generate
+
+    with patch.object(llm_service, "client", mock_client):
+        result = await llm_service.call_llm_async(
+            system="sys", user="hello", use_web_search=False
+        )
+
+    assert result.content_md == "# Output"
+    assert result.tokens_used == 15
+    assert result.prompt_tokens == 10
+    assert calls[0]["config"]["system_instruction"] == "sys"
+    assert "tools" not in calls[0]["config"]
+    mock_client.models.generate_content.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_call_llm_with_cache_async_appends_reference():
+    """Cached reference material is included in the system instruction."""
+    from app.services import llm_service
+
+    calls = []
+
+    async def fake_generate(**kwargs):
+        calls.append(kwargs)
+        return _make_response()
+
+    mock_client = MagicMock()
+    mock_client.aio.models.generate_content = fake_generate
+
+    with patch.object(llm_service, "client", mock_client):
+        await llm_service.call_llm_with_cache_async(
+            system="sys", user="hello", cached_content="RUBRIC"
+        )
+
+    assert "RUBRIC" in calls[0]["config"]["system_instruction"]
+
+
+@pytest.mark.asyncio
+async def test_call_llm_async_bounded_concurrency():
+    """No more than LLM_MAX_CONCURRENCY calls are in flight at once."""
+    from app.services import llm_service
+
+    in_flight = 0
+    peak = 0
+
+    async def fake_generate(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _make_response()
+
+    mock_client = MagicMock()
+    mock_client.aio.models.generate_content = fake_generate
+
+    with patch.object(llm_service, "client", mock_client), \
+            patch.object(llm_service, "_llm_semaphore", asyncio.BoundedSemaphore(2)):
+        await asyncio.gather(*[
+            llm_service.call_llm_async(system="s", user=str(i)) for i in range(6)
+        ])
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_call_llm_async_requires_api_key():
+    """Raises when no Gemini client is configured."""
+    from app.services import llm_service
+
+    with patch.object(llm_service, "client", None):
+        with pytest.raises(RuntimeError, match="GEMINI_API_KEY"):
+            await llm_service.call_llm_async(system="s", user="u")
+
+
+def _api_error(code, details=None, headers=None):
+    import httpx
+    from google.genai import errors
+
+    response = httpx.Response(code, headers=headers or {})
+    return errors.APIError(code, details or {"error": {"code": code}}, response)
+
+
+@pytest.mark.asyncio
+async def test_call_llm_async_retries_transient_errors():
+    """429/503 are retried with backoff and the retries are counted."""
+    from app.services import llm_service
+
+    attempts = []
+
+    async def fake_generate(**kwargs):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise _api_error(429)
+        if len(attempts) == 2:
+            raise _api_error(503)
+        return _make_response()
+
+    mock_client = MagicMock()
+    mock_client.aio.models.generate_content = fake_generate
+    policy = llm_service.RetryPolicy(max_attempts=4, base_delay=0.001, max_delay=0.001)
+
+    with patch.object(llm_service, "client", mock_client):
+        result = await llm_service.call_llm_async(
+            system="s", user="u", use_web_search=False, retry_policy=policy
+        )
+
+    assert len(attempts) == 3
+    assert result.retries == 2
+
+
+@pytest.mark.asyncio
+async def test_call_llm_async_does_not_retry_client_errors():
+    from app.services import llm_service
+
+    attempts = []
+
+    async def fake_generate(**kwargs):
+        attempts.append(1)
+        raise _api_error(400)
+
+    mock_client = MagicMock()
+    mock_client.aio.models.generate_content = fake_generate
+
+    with patch.object(llm_service, "client", mock_client):
+        with pytest.raises(Exception):
+            await llm_service.call_llm_async(system="s", user="u")
+
+    assert len(attempts) == 1
+
+
+@pytest.mark.asyncio
+async def test_call_llm_async_gives_up_after_max_attempts():
+    from app.services import llm_service
+
+    attempts = []
+
+    async def fake_generate(**kwargs):
+        attempts.append(1)
+        raise _api_error(503)
+
+    mock_client = MagicMock()
+    mock_client.aio.models.generate_content = fake_generate
+    policy = llm_service.RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.001)
+
+    with patch.object(llm_service, "client", mock_client):
+        with pytest.raises(Exception):
+            await llm_service.call_llm_async(system="s", user="u", retry_policy=policy)
+
+    assert len(attempts) == 3
+
+
+def test_retry_delay_honors_retry_after_and_deadline():
+    """Server-specified waits win over backoff; retries past the deadline are dropped."""
+    from app.services import llm_service
+
+    policy = llm_service.RetryPolicy(max_attempts=5, base_delay=100, max_delay=100)
+
+    assert llm_service._retry_delay(_api_error(429, headers={"retry-after": "2"}), 0, policy) == 2
+    retry_info = {"error": {"code": 429, "details": [{"retryDelay": "7s"}]}}
+    assert llm_service._retry_delay(_api_error(429, details=retry_info), 0, policy) == 7
+
+    with llm_service.deadline(1):
+        assert llm_service._retry_delay(_api_error(429, headers={"retry-after": "2"}), 0, policy) is None
+
+
+@pytest.mark.asyncio
+async def test_call_llm_async_streams_into_sink():
+    """With a stream sink set, chunks are forwarded as they arrive."""
+    from app.services import llm_service
+
+    chunks = [_make_response("Hello "), _make_response("world", 10, 7)]
+    chunks[0].usage_metadata = None
+
+    async def fake_stream(**kwargs):
+        async def gen():
+            for chunk in chunks:
+                yield chunk
+        return gen()
+
+    class Sink(llm_service.StreamSink):
+        def __init__(self):
+            self.written = []
+            self.resets = 0
+
+        def write(self, text):
+            self.written.append(text)
+
+        def reset(self):
+            self.resets += 1
+
+    mock_client = MagicMock()
+    mock_client.aio.models.generate_content_stream = fake_stream
+    sink = Sink()
+
+    token = llm_service.stream_sink.set(sink)
+    try:
+        with patch.object(llm_service, "client", mock_client):
+            result = await llm_service.call_llm_async(system="s", user="u")
+    finally:
+        llm_service.stream_sink.reset(token)
+
+    assert sink.written == ["Hello ", "world"]
+    assert sink.resets == 1
+    assert result.content_md == "Hello world"
+    assert result.tokens_used == 17
+    mock_client.aio.models.generate_content.assert_not_called()
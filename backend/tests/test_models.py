@@ -4,7 +4,7 @@ from datetime import date, datetime
 import pytest
 from pydantic import ValidationError
 
-from app.models import JobCreate, JobResponse, SectionResponse
+from app.models import JobBulkItem, JobCreate, JobResponse, SectionResponse
 
 
 # ── JobCreate validation ─────────────────────────────────────────
@@ -40,6 +40,22 @@ class TestJobCreate:
         )
         assert job.jd_url == "https://example.com/job"
 
+    def test_text_or_fetch_required(self):
+        with pytest.raises(ValidationError, match="Must provide jd_text"):
+            JobCreate(jd_url="https://example.com/job")
+
+
+class TestJobBulkItem:
+    def test_url_only_allowed(self):
+        item = JobBulkItem(jd_url="https://example.com/job")
+        assert item.jd_text is None
+
+    def test_shares_field_validation(self):
+        with pytest.raises(ValidationError):
+            JobBulkItem(jd_url="ftp://example.com/job")
+        with pytest.raises(ValidationError):
+            JobBulkItem(jd_url="https://example.com/job", jd_text="Too short")
+
 
 # ── JobResponse validation ───────────────────────────────────────
 
@@ -1,63 +1,67 @@
 """Tests for pipeline executor internals."""
+import asyncio
 import re
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from tests.conftest import _make_section_record
+import pytest
 
+from app.services.reference_loader import ReferenceSnapshot
+from tests.conftest import _async_pb, _make_section_record
 
-def test_extract_verdict_score():
+
+async def test_extract_verdict_score():
     """Extracts score from verdict content."""
     from app.services.pipeline_executor import _extract_verdict_metadata
 
     mock_pb = MagicMock()
-    with patch("app.services.pipeline_executor.pb", mock_pb):
-        _extract_verdict_metadata("job1", "Total Score: 72/100")
+    with patch("app.services.pipeline_executor.apb", _async_pb(mock_pb)):
+        await _extract_verdict_metadata("job1", "Total Score: 72/100")
         mock_pb.collection().update.assert_called_once()
         call_data = mock_pb.collection().update.call_args[0][1]
         assert call_data["score"] == 72
 
 
-def test_extract_verdict_hours_range():
+async def test_extract_verdict_hours_range():
     """Extracts hours from a range (takes midpoint)."""
     from app.services.pipeline_executor import _extract_verdict_metadata
 
     mock_pb = MagicMock()
-    with patch("app.services.pipeline_executor.pb", mock_pb):
-        _extract_verdict_metadata("job1", "Expected Hours: 40-50")
+    with patch("app.services.pipeline_executor.apb", _async_pb(mock_pb)):
+        await _extract_verdict_metadata("job1", "Expected Hours: 40-50")
         call_data = mock_pb.collection().update.call_args[0][1]
         assert call_data["hours"] == 45
 
 
-def test_extract_verdict_hours_single():
+async def test_extract_verdict_hours_single():
     """Extracts hours from a single value."""
     from app.services.pipeline_executor import _extract_verdict_metadata
 
     mock_pb = MagicMock()
-    with patch("app.services.pipeline_executor.pb", mock_pb):
-        _extract_verdict_metadata("job1", "Expected Hours: 35")
+    with patch("app.services.pipeline_executor.apb", _async_pb(mock_pb)):
+        await _extract_verdict_metadata("job1", "Expected Hours: 35")
         call_data = mock_pb.collection().update.call_args[0][1]
         assert call_data["hours"] == 35
 
 
-def test_extract_verdict_string():
+async def test_extract_verdict_string():
     """Extracts verdict string (STRONG PURSUE, etc)."""
     from app.services.pipeline_executor import _extract_verdict_metadata
 
     for verdict in ["STRONG PURSUE", "PURSUE", "PASS", "HARD PASS"]:
         mock_pb = MagicMock()
-        with patch("app.services.pipeline_executor.pb", mock_pb):
-            _extract_verdict_metadata("job1", f"Verdict: {verdict}")
+        with patch("app.services.pipeline_executor.apb", _async_pb(mock_pb)):
+            await _extract_verdict_metadata("job1", f"Verdict: {verdict}")
             call_data = mock_pb.collection().update.call_args[0][1]
             assert call_data["verdict"] == verdict
 
 
-def test_extract_verdict_no_match():
+async def test_extract_verdict_no_match():
     """No update when verdict content has no recognized patterns."""
     from app.services.pipeline_executor import _extract_verdict_metadata
 
     mock_pb = MagicMock()
-    with patch("app.services.pipeline_executor.pb", mock_pb):
-        _extract_verdict_metadata("job1", "Nothing useful here")
+    with patch("app.services.pipeline_executor.apb", _async_pb(mock_pb)):
+        await _extract_verdict_metadata("job1", "Nothing useful here")
         mock_pb.collection().update.assert_not_called()
 
 
@@ -68,15 +72,15 @@ def test_update_section_status_includes_is_locked():
 
     sd = SectionDef("test_key", "Test", 1, [], "analysis")
 
-    mock_upsert = MagicMock()
-    with patch("app.services.pipeline_executor.upsert_section", mock_upsert):
+    mock_writes = MagicMock()
+    with patch("app.services.pipeline_executor.section_writes", mock_writes):
         _update_section_status("job1", sd, "running")
 
-    call_data = mock_upsert.call_args[0][2]
+    call_data = mock_writes.stage.call_args[0][2]
     assert call_data["is_locked"] is False
 
 
-def test_save_section_result_includes_is_locked():
+async def test_save_section_result_includes_is_locked():
     """_save_section_result passes is_locked: False."""
     from app.services.pipeline_executor import _save_section_result
     from app.sections.config import SectionDef
@@ -87,18 +91,20 @@ def test_save_section_result_includes_is_locked():
         content_md = "# Result"
         model = "test-model"
         tokens_used = 100
+        prompt_tokens = 80
         generation_time_ms = 500
 
-    mock_upsert = MagicMock()
-    with patch("app.services.pipeline_executor.upsert_section", mock_upsert):
-        _save_section_result("job1", sd, FakeResult())
+    mock_writes = MagicMock()
+    with patch("app.services.pipeline_executor.section_writes", mock_writes):
+        await _save_section_result("job1", sd, FakeResult())
 
-    call_data = mock_upsert.call_args[0][2]
+    call_data = mock_writes.stage.call_args[0][2]
     assert call_data["is_locked"] is False
     assert call_data["content_md"] == "# Result"
+    assert call_data["prompt_tokens"] == 80
 
 
-def test_load_completed_sections():
+async def test_load_completed_sections():
     """_load_completed_sections returns {key: content} dict."""
     from app.services.pipeline_executor import _load_completed_sections
 
@@ -108,14 +114,14 @@ def test_load_completed_sections():
         _make_section_record(section_key="gate_check", content_md="content2"),
     ]
 
-    with patch("app.services.pipeline_executor.pb", mock_pb):
-        result = _load_completed_sections("job1")
+    with patch("app.services.pipeline_executor.apb", _async_pb(mock_pb)):
+        result = await _load_completed_sections("job1")
 
     assert result["evidence_cleanup"] == "content1"
     assert result["gate_check"] == "content2"
 
 
-def test_get_locked_keys():
+async def test_get_locked_keys():
     """_get_locked_keys returns set of locked section keys."""
     from app.services.pipeline_executor import _get_locked_keys
 
@@ -124,7 +130,485 @@ def test_get_locked_keys():
         _make_section_record(section_key="evidence_cleanup", is_locked=True),
     ]
 
-    with patch("app.services.pipeline_executor.pb", mock_pb):
-        result = _get_locked_keys("job1")
+    with patch("app.services.pipeline_executor.apb", _async_pb(mock_pb)):
+        result = await _get_locked_keys("job1")
 
     assert result == {"evidence_cleanup"}
+
+
+async def test_run_section_awaits_coroutine_functions():
+    """Coroutine section functions are awaited directly, not sent to a thread."""
+    from app.services import pipeline_executor
+    from app.sections.config import SectionDef
+    from app.services.llm_service import GenerationResult
+
+    sd = SectionDef("gate_check", "Gate Check", 1, ["evidence_cleanup"], "analysis")
+    seen = {}
+
+    async def fake_section(job, refs, dep_context):
+        seen["dep_context"] = dep_context
+        return GenerationResult("# Gate", "m", 1, 1)
+
+    with patch.dict(pipeline_executor.SECTION_FUNCTIONS, {"gate_check": fake_section}), \
+            patch("app.services.pipeline_executor.asyncio.to_thread") as mock_to_thread:
+        result = await pipeline_executor._run_section(
+            sd, MagicMock(), {}, {"evidence_cleanup": "clean"}
+        )
+
+    assert result.content_md == "# Gate"
+    assert seen["dep_context"] == {"evidence_cleanup": "clean"}
+    mock_to_thread.assert_not_called()
+
+
+async def test_run_section_passes_only_declared_inputs():
+    """Cover-letter sections get their declared reads, not every completed section."""
+    from app.services import pipeline_executor
+    from app.sections.config import SectionDef
+    from app.services.llm_service import GenerationResult
+
+    sd = SectionDef("cl_closing", "Closing", 1, [], "cover_letter", reads=["between_the_lines"])
+    completed = {"between_the_lines": "btl", "company_research": "cr", "final_verdict": "fv"}
+    seen = {}
+
+    async def fake_section(job, refs, dep_context):
+        seen["dep_context"] = dep_context
+        return GenerationResult("# Closing", "m", 1, 1)
+
+    with patch.dict(pipeline_executor.SECTION_FUNCTIONS, {"cl_closing": fake_section}):
+        await pipeline_executor._run_section(sd, MagicMock(), {}, completed)
+
+    assert seen["dep_context"] == {"between_the_lines": "btl"}
+
+
+async def test_run_pipeline_respects_global_concurrency(mock_pb):
+    """With one execution slot, sections run one at a time in dependency order."""
+    from app.database import record_to_dict
+    from app.models import JobResponse
+    from app.sections.config import ANALYSIS_SECTIONS
+    from app.services import pipeline_executor
+    from app.services.llm_service import GenerationResult
+    from app.services.scheduler import PrioritySlots
+    from tests.conftest import _make_job_record
+
+    job = JobResponse(**record_to_dict(_make_job_record()))
+    active = []
+    started = []
+
+    def fake(key):
+        async def section(job, refs, dep_context):
+            active.append(key)
+            assert len(active) == 1
+            started.append(key)
+            await asyncio.sleep(0)
+            active.remove(key)
+            return GenerationResult(f"# {key}", "m", 1, 1)
+        return section
+
+    functions = {sd.key: fake(sd.key) for sd in ANALYSIS_SECTIONS}
+    with patch.dict(pipeline_executor.SECTION_FUNCTIONS, functions), \
+            patch.object(pipeline_executor, "_section_slots", PrioritySlots(1)), \
+            patch.object(pipeline_executor, "_extract_hours", AsyncMock()), \
+            patch.object(pipeline_executor, "_load_all_references", return_value=ReferenceSnapshot.from_texts({})):
+        events = [e async for e in pipeline_executor.run_pipeline(job, "analysis")]
+
+    completed = [e.section_key for e in events if e.status == "complete"]
+    assert sorted(completed) == sorted(sd.key for sd in ANALYSIS_SECTIONS)
+    assert started[0] == "evidence_cleanup"
+    assert started[-1] == "final_verdict"
+
+
+async def test_hours_extraction_does_not_block_the_dag(mock_pb):
+    """Dependents of hours_estimate start while its hours extraction is still running."""
+    from app.database import record_to_dict
+    from app.models import JobResponse
+    from app.sections.config import ANALYSIS_SECTIONS
+    from app.services import pipeline_executor
+    from app.services.llm_service import GenerationResult
+    from tests.conftest import _make_job_record
+
+    job = JobResponse(**record_to_dict(_make_job_record()))
+    verdict_started = asyncio.Event()
+    extracted = []
+
+    def fake(key):
+        async def section(job, refs, dep_context):
+            if key == "final_verdict":
+                verdict_started.set()
+            return GenerationResult(f"# {key}", "m", 1, 1)
+        return section
+
+    async def slow_extract(job_id, content):
+        # Would deadlock if awaited inline: final_verdict waits on hours_estimate
+        await asyncio.wait_for(verdict_started.wait(), 1)
+        extracted.append(content)
+
+    functions = {sd.key: fake(sd.key) for sd in ANALYSIS_SECTIONS}
+    with patch.dict(pipeline_executor.SECTION_FUNCTIONS, functions), \
+            patch.object(pipeline_executor, "_extract_hours", slow_extract), \
+            patch.object(pipeline_executor, "_load_all_references", return_value=ReferenceSnapshot.from_texts({})):
+        events = [e async for e in pipeline_executor.run_pipeline(job, "analysis")]
+
+    assert not [e for e in events if e.status == "failed"]
+    # The run still waits for the extraction before it ends
+    assert extracted == ["# hours_estimate"]
+
+
+def test_skip_reason_policy():
+    """Strict sections skip on any missing dependency; partial ones need at least one."""
+    from app.sections.config import SectionDef
+    from app.services.pipeline_executor import _skip_reason
+
+    strict = SectionDef("strict", "Strict", 1, ["a", "b"], "analysis")
+    partial = SectionDef("partial", "Partial", 2, ["a", "b"], "analysis", allow_partial_context=True)
+
+    assert _skip_reason(strict, set()) is None
+    assert _skip_reason(strict, {"a"}) == "Skipped: a did not complete"
+    assert _skip_reason(partial, {"a"}) is None
+    assert _skip_reason(partial, {"a", "b"}) == "Skipped: a, b did not complete"
+
+
+async def test_run_pipeline_skips_dependents_of_failed_sections(mock_pb):
+    """Failures propagate: strict dependents are skipped, never called."""
+    from app.database import record_to_dict
+    from app.models import JobResponse
+    from app.sections.config import ANALYSIS_SECTIONS
+    from app.services import pipeline_executor
+    from app.services.llm_service import GenerationResult
+    from tests.conftest import _make_job_record
+
+    job = JobResponse(**record_to_dict(_make_job_record()))
+    called = []
+
+    def fake(key):
+        async def section(job, refs, dep_context):
+            called.append(key)
+            if key.startswith("scorecard_"):
+                raise RuntimeError("boom")
+            return GenerationResult(f"# {key}", "m", 1, 1)
+        return section
+
+    functions = {sd.key: fake(sd.key) for sd in ANALYSIS_SECTIONS}
+    writes = MagicMock()
+    writes.flush = AsyncMock()
+    with patch.dict(pipeline_executor.SECTION_FUNCTIONS, functions), \
+            patch.object(pipeline_executor, "section_writes", writes), \
+            patch.object(pipeline_executor, "_extract_hours", AsyncMock()), \
+            patch.object(pipeline_executor, "_load_all_references", return_value=ReferenceSnapshot.from_texts({})):
+        events = [e async for e in pipeline_executor.run_pipeline(job, "analysis")]
+
+    statuses = {e.section_key: e.status for e in events}
+    assert statuses["scorecard_health"] == "failed"
+    assert statuses["between_the_lines"] == "complete"
+    assert statuses["final_verdict"] == "skipped"
+    assert "final_verdict" not in called
+
+    staged = {c.args[1]: c.args[2] for c in writes.stage.call_args_list}
+    assert staged["final_verdict"]["status"] == "skipped"
+    assert "scorecard_health" in staged["final_verdict"]["error_message"]
+
+
+async def test_run_section_enforces_timeout():
+    """A section that overruns its timeout fails with a clear message."""
+    from app.sections.config import SectionDef
+    from app.services import pipeline_executor
+
+    sd = SectionDef("gate_check", "Gate Check", 1, [], "analysis", timeout_seconds=0.01)
+
+    async def slow_section(job, refs, dep_context):
+        await asyncio.sleep(1)
+
+    with patch.dict(pipeline_executor.SECTION_FUNCTIONS, {"gate_check": slow_section}):
+        with pytest.raises(TimeoutError, match="timed out after 0.01s"):
+            await pipeline_executor._run_section(sd, MagicMock(), {}, {})
+
+
+def test_coalesce_deltas_merges_runs_per_section():
+    from app.models import PipelineEvent
+    from app.services.pipeline_executor import _coalesce_deltas
+
+    events = [
+        PipelineEvent(section_key="a", status="delta", content_md="He"),
+        PipelineEvent(section_key="a", status="delta", content_md="llo"),
+        PipelineEvent(section_key="b", status="delta", content_md="x"),
+        PipelineEvent(section_key="a", status="running"),
+        PipelineEvent(section_key="a", status="delta", content_md="!"),
+    ]
+
+    merged = _coalesce_deltas(events)
+
+    assert [(e.section_key, e.status, e.content_md) for e in merged] == [
+        ("a", "delta", "Hello"),
+        ("b", "delta", "x"),
+        ("a", "running", None),
+        ("a", "delta", "!"),
+    ]
+
+
+async def test_run_pipeline_emits_deltas_before_complete(mock_pb):
+    """Streamed chunks reach the SSE stream ahead of the complete event and are checkpointed."""
+    from app.config import settings
+    from app.database import record_to_dict
+    from app.models import JobResponse
+    from app.services import pipeline_executor
+    from app.services.llm_service import GenerationResult, stream_sink
+    from tests.conftest import _make_job_record
+
+    job = JobResponse(**record_to_dict(_make_job_record()))
+
+    async def streaming_section(job, refs, dep_context):
+        sink = stream_sink.get()
+        sink.reset()
+        sink.write("# Part ")
+        await asyncio.sleep(0)
+        sink.write("one")
+        return GenerationResult("# Part one", "m", 1, 1)
+
+    writes = MagicMock()
+    writes.flush = AsyncMock()
+    with patch.dict(pipeline_executor.SECTION_FUNCTIONS, {"cl_pep_talk": streaming_section}), \
+            patch.object(pipeline_executor, "COVER_LETTER_SECTIONS", [
+                pipeline_executor.SectionDef("cl_pep_talk", "Pep Talk", 1, [], "cover_letter"),
+            ]), \
+            patch.object(pipeline_executor, "section_writes", writes), \
+            patch.object(settings, "STREAM_CHECKPOINT_SECONDS", 0), \
+            patch.object(pipeline_executor, "_load_all_references", return_value=ReferenceSnapshot.from_texts({})):
+        events = [e async for e in pipeline_executor.run_pipeline(job, "cover_letter")]
+
+    statuses = [e.status for e in events]
+    assert statuses[0] == "running"
+    assert statuses[-1] == "complete"
+    deltas = "".join(e.content_md for e in events if e.status == "delta")
+    assert deltas == "# Part one"
+
+    checkpoints = [
+        c.args[2] for c in writes.stage.call_args_list
+        if c.args[2].get("status") == "running" and "content_md" in c.args[2]
+    ]
+    assert checkpoints[-1]["content_md"] == "# Part one"
+
+
+async def test_cancelled_run_flushes_cancelled_statuses(mock_pb):
+    """Cancelling a run mid-section still persists the "failed: Cancelled" status."""
+    from app.database import record_to_dict
+    from app.models import JobResponse
+    from app.services import pipeline_executor
+    from tests.conftest import _make_job_record
+
+    job = JobResponse(**record_to_dict(_make_job_record()))
+    started = asyncio.Event()
+
+    async def hang(job, refs, dep_context):
+        started.set()
+        await asyncio.sleep(10)
+
+    writes = MagicMock()
+    writes.flush = AsyncMock()
+
+    async def consume():
+        async for _ in pipeline_executor.run_pipeline(job, "analysis"):
+            pass
+
+    with patch.dict(pipeline_executor.SECTION_FUNCTIONS, {"evidence_cleanup": hang}), \
+            patch.object(pipeline_executor, "section_writes", writes), \
+            patch.object(pipeline_executor, "_load_all_references", return_value=ReferenceSnapshot.from_texts({})):
+        run = asyncio.create_task(consume())
+        await asyncio.wait_for(started.wait(), 1)
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+
+    staged = [c.args[2] for c in writes.stage.call_args_list if c.args[1] == "evidence_cleanup"]
+    assert staged[-1]["status"] == "failed" and staged[-1]["error_message"] == "Cancelled"
+    writes.flush.assert_awaited_with(job.id)
+
+
+async def _run_with_history(job, functions, history, locked=()):
+    """Run the analysis phase incrementally against stored section records."""
+    from app.services import pipeline_executor
+
+    writes = MagicMock()
+    writes.flush = AsyncMock()
+    with patch.dict(pipeline_executor.SECTION_FUNCTIONS, functions), \
+            patch.object(pipeline_executor, "section_writes", writes), \
+            patch.object(pipeline_executor, "_load_completed_records", AsyncMock(return_value=history)), \
+            patch.object(pipeline_executor, "_get_locked_keys", AsyncMock(return_value=set(locked))), \
+            patch.object(pipeline_executor, "_extract_hours", AsyncMock()), \
+            patch.object(pipeline_executor, "_load_all_references", return_value=ReferenceSnapshot.from_texts({"resume": "r"})):
+        events = [e async for e in pipeline_executor.run_pipeline(job, "analysis", "incremental")]
+    staged = {c.args[1]: c.args[2] for c in writes.stage.call_args_list}
+    return events, staged
+
+
+async def test_incremental_run_only_redoes_changed_sections(mock_pb):
+    """Unchanged sections are reused; an edited section's dependents are redone, transitively."""
+    from app.database import record_to_dict
+    from app.models import JobResponse
+    from app.sections.config import ANALYSIS_SECTIONS
+    from app.services.llm_service import GenerationResult
+    from tests.conftest import _make_job_record
+
+    job = JobResponse(**record_to_dict(_make_job_record()))
+    called = []
+
+    def fake(key):
+        async def section(job, refs, dep_context):
+            called.append(key)
+            return GenerationResult(f"# {key}", "m", 1, 1)
+        return section
+
+    functions = {sd.key: fake(sd.key) for sd in ANALYSIS_SECTIONS}
+
+    # First run: nothing stored yet, so everything is generated
+    _, staged = await _run_with_history(job, functions, [])
+    assert sorted(called) == sorted(sd.key for sd in ANALYSIS_SECTIONS)
+    history = [
+        {"section_key": key, "content_md": data["content_md"], "input_fingerprint": data["input_fingerprint"]}
+        for key, data in staged.items() if data.get("status") == "complete"
+    ]
+
+    # Same inputs: every section is reused
+    called.clear()
+    events, _ = await _run_with_history(job, functions, history)
+    assert called == []
+    assert {e.status for e in events} == {"complete"}
+
+    # Hand-edited (and so locked) gate_check: only what it feeds is redone
+    called.clear()
+    edited = [
+        {**d, "content_md": "# edited"} if d["section_key"] == "gate_check" else d
+        for d in history
+    ]
+    await _run_with_history(job, functions, edited, locked={"gate_check"})
+    assert "evidence_cleanup" not in called and "gate_check" not in called
+    assert sorted(called) == sorted(
+        sd.key for sd in ANALYSIS_SECTIONS if sd.key not in ("evidence_cleanup", "gate_check")
+    )
+
+
+async def test_incremental_run_redoes_sections_when_prompt_changes(mock_pb):
+    from app.database import record_to_dict
+    from app.models import JobResponse
+    from app.sections.config import ANALYSIS_SECTIONS
+    from app.services.llm_service import GenerationResult
+    from tests.conftest import _make_job_record
+
+    job = JobResponse(**record_to_dict(_make_job_record()))
+    called = []
+
+    def fake(key):
+        async def section(job, refs, dep_context):
+            called.append(key)
+            return GenerationResult(f"# {key}", "m", 1, 1)
+        return section
+
+    functions = {sd.key: fake(sd.key) for sd in ANALYSIS_SECTIONS}
+    _, staged = await _run_with_history(job, functions, [])
+    history = [
+        {"section_key": key, "content_md": data["content_md"], "input_fingerprint": data["input_fingerprint"]}
+        for key, data in staged.items()
+    ]
+
+    async def new_prompt(job, refs, dep_context):
+        called.append("hours_estimate")
+        return GenerationResult("# hours v2", "m", 1, 1)
+
+    called.clear()
+    await _run_with_history(job, {**functions, "hours_estimate": new_prompt}, history)
+    assert called == ["hours_estimate", "final_verdict"]
+
+
+def test_downstream_sections_stop_at_locked_sections():
+    from app.services.pipeline_executor import _downstream_sections
+
+    targets, kept = _downstream_sections("glassdoor_research", {"scorecard_health"})
+
+    assert [sd.key for sd in targets] == [
+        "glassdoor_research", "scorecard_personal", "between_the_lines", "hours_estimate",
+        "final_verdict",
+    ]
+    assert kept == ["scorecard_health"]
+
+
+async def test_run_cascade_regenerates_downstream_subgraph(mock_pb):
+    """The section runs first, then its unlocked dependents with fresh context."""
+    from app.database import record_to_dict
+    from app.models import JobResponse
+    from app.sections.config import ANALYSIS_SECTIONS
+    from app.services import pipeline_executor
+    from app.services.llm_service import GenerationResult
+    from tests.conftest import _make_job_record
+
+    job = JobResponse(**record_to_dict(_make_job_record()))
+    called = []
+    contexts = {}
+
+    def fake(key):
+        async def section(job, refs, dep_context):
+            called.append(key)
+            contexts[key] = dep_context
+            return GenerationResult(f"# new {key}", "m", 1, 1)
+        return section
+
+    stored = {sd.key: f"# old {sd.key}" for sd in ANALYSIS_SECTIONS}
+    writes = MagicMock()
+    writes.flush = AsyncMock()
+    with patch.dict(pipeline_executor.SECTION_FUNCTIONS, {sd.key: fake(sd.key) for sd in ANALYSIS_SECTIONS}), \
+            patch.object(pipeline_executor, "section_writes", writes), \
+            patch.object(pipeline_executor, "_load_completed_sections", AsyncMock(return_value=stored)), \
+            patch.object(pipeline_executor, "_get_locked_keys", AsyncMock(return_value={"scorecard_health"})), \
+            patch.object(pipeline_executor, "_extract_hours", AsyncMock()), \
+            patch.object(pipeline_executor, "_extract_verdict_metadata", AsyncMock()) as verdict, \
+            patch.object(pipeline_executor, "_load_all_references", return_value=ReferenceSnapshot.from_texts({})):
+        events = [e async for e in pipeline_executor.run_cascade(job, "company_research")]
+
+    assert called[0] == "company_research"
+    assert called[-1] == "final_verdict"
+    assert sorted(called) == sorted([
+        "company_research", "scorecard_role_fit", "scorecard_personal",
+        "between_the_lines", "hours_estimate", "final_verdict",
+    ])
+    # Dependents see the regenerated output; locked sections keep theirs
+    assert contexts["scorecard_role_fit"]["company_research"] == "# new company_research"
+    assert contexts["final_verdict"]["scorecard_health"] == "# old scorecard_health"
+    assert ("scorecard_health", "complete") in [(e.section_key, e.status) for e in events]
+    verdict.assert_awaited_once_with(job.id, "# new final_verdict")
+
+
+async def test_run_cascade_skips_targets_with_missing_dependencies(mock_pb):
+    """A target whose dependency is outside the cascade and never completed is skipped."""
+    from app.database import record_to_dict
+    from app.models import JobResponse
+    from app.sections.config import ANALYSIS_SECTIONS
+    from app.services import pipeline_executor
+    from app.services.llm_service import GenerationResult
+    from tests.conftest import _make_job_record
+
+    job = JobResponse(**record_to_dict(_make_job_record()))
+
+    def fake(key):
+        async def section(job, refs, dep_context):
+            return GenerationResult(f"# new {key}", "m", 1, 1)
+        return section
+
+    # scorecard_health is locked, so outside the cascade, but has no output
+    stored = {sd.key: f"# old {sd.key}" for sd in ANALYSIS_SECTIONS if sd.key != "scorecard_health"}
+    writes = MagicMock()
+    writes.flush = AsyncMock()
+    with patch.dict(pipeline_executor.SECTION_FUNCTIONS, {sd.key: fake(sd.key) for sd in ANALYSIS_SECTIONS}), \
+            patch.object(pipeline_executor, "section_writes", writes), \
+            patch.object(pipeline_executor, "_load_completed_sections", AsyncMock(return_value=stored)), \
+            patch.object(pipeline_executor, "_get_locked_keys", AsyncMock(return_value={"scorecard_health"})), \
+            patch.object(pipeline_executor, "_extract_hours", AsyncMock()), \
+            patch.object(pipeline_executor, "_extract_verdict_metadata", AsyncMock()), \
+            patch.object(pipeline_executor, "_load_all_references", return_value=ReferenceSnapshot.from_texts({})):
+        events = [e async for e in pipeline_executor.run_cascade(job, "company_research")]
+
+    [skipped] = [e for e in events if e.status == "skipped"]
+    assert skipped.section_key == "final_verdict"
+    assert skipped.error_message == "Skipped: scorecard_health did not complete"
+    writes.stage.assert_any_call(job.id, "final_verdict", {
+        "phase": "analysis",
+        "status": "skipped",
+        "is_locked": False,
+        "error_message": "Skipped: scorecard_health did not complete",
+    })
@@ -29,25 +29,240 @@ def test_pipeline_status_job_not_found(client, mock_pb):
     assert response.status_code == 404
 
 
-def test_analyze_starts_sse_stream(client, mock_pb):
-    """POST /api/pipeline/{job_id}/analyze returns SSE stream."""
-    mock_pb.collection().get_one.return_value = _make_job_record()
+async def test_analyze_starts_sse_stream(mock_pb, job_queue):
+    """POST /api/pipeline/{job_id}/analyze enqueues a run and streams its events."""
+    import httpx
 
+    from app.main import app
     from app.models import PipelineEvent
+    from app.services.event_bus import event_bus
+
+    mock_pb.collection().get_one.return_value = _make_job_record()
+    phases = []
 
-    async def mock_pipeline(job, phase):
-        yield PipelineEvent(section_key="evidence_cleanup", status="running")
-        yield PipelineEvent(
+    async def runner(job_id, phase, mode):
+        phases.append(phase)
+        event_bus.begin_run(job_id)
+        event_bus.publish(job_id, PipelineEvent(section_key="evidence_cleanup", status="running"))
+        event_bus.publish(job_id, PipelineEvent(
             section_key="evidence_cleanup",
             status="complete",
             content_md="# Cleaned",
-        )
+        ))
+        event_bus.end_run(job_id)
 
-    with patch("app.routers.pipeline.run_pipeline", side_effect=mock_pipeline):
-        response = client.post("/api/pipeline/test_job_id/analyze")
+    job_queue.runner = runner
+    await job_queue.start()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.post("/api/pipeline/test_job_id/analyze")
+    finally:
+        await job_queue.stop()
+        event_bus.clear()
 
     assert response.status_code == 200
     assert response.headers["content-type"].startswith("text/event-stream")
     body = response.text
     assert "evidence_cleanup" in body
     assert "complete" in body
+    assert body.rstrip().endswith('data: {"done": true}')
+    assert phases == ["analysis"]
+    assert job_queue.active("test_job_id") == []
+
+
+async def test_analyze_relays_worker_process_run(mock_pb, job_queue, monkeypatch):
+    """Without local workers, the stream follows the run through PocketBase realtime."""
+    import httpx
+
+    from app.main import app
+    from app.routers import pipeline
+
+    mock_pb.collection().get_one.return_value = _make_job_record()
+    job_queue.workers = 0
+    monkeypatch.setattr(pipeline, "RELAY_POLL_SECONDS", 0.01)
+
+    async def changes(job_id):
+        yield None
+        yield {"section_key": "evidence_cleanup", "status": "running", "content_md": ""}
+        yield {"section_key": "evidence_cleanup", "status": "running", "content_md": "# Cle"}
+        yield {"section_key": "evidence_cleanup", "status": "complete", "content_md": "# Cleaned"}
+        # The worker finishes the run
+        [run] = job_queue.active(job_id)
+        job_queue._claim()
+        job_queue._complete(run.id, "done", "")
+
+    monkeypatch.setattr(pipeline, "section_changes", changes)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/api/pipeline/test_job_id/analyze")
+
+    lines = [l for l in response.text.splitlines() if l.startswith("data:")]
+    assert len(lines) == 4
+    assert '"status":"running"' in lines[0]
+    # The checkpoint of streamed output is relayed as a delta
+    assert '"status":"delta","content_md":"# Cle"' in lines[1]
+    assert '"content_md":"# Cleaned"' in lines[2]
+    assert lines[3] == 'data: {"done": true}'
+
+
+async def test_analyze_follows_run_claimed_by_worker_process(mock_pb, tmp_path, monkeypatch):
+    """With local workers, a run another process claims is still relayed and ends."""
+    import asyncio
+
+    import httpx
+
+    from app.main import app
+    from app.routers import pipeline
+    from app.services import job_queue as job_queue_module
+
+    mock_pb.collection().get_one.return_value = _make_job_record()
+    monkeypatch.setattr(pipeline, "RELAY_POLL_SECONDS", 0.01)
+    path = tmp_path / "queue.sqlite3"
+    # This process has workers, but they are busy and never claim the run
+    local = job_queue_module.JobQueue(path, workers=1)
+    other = job_queue_module.JobQueue(path, worker_id="w2")
+    monkeypatch.setattr(job_queue_module, "_job_queue", local)
+
+    async def changes(job_id):
+        yield None
+        yield {"section_key": "evidence_cleanup", "status": "running", "content_md": "old"}
+        yield {"section_key": "evidence_cleanup", "status": "running", "content_md": "# Cl"}
+        yield {"section_key": "evidence_cleanup", "status": "running", "content_md": "# Clean"}
+        yield {"section_key": "evidence_cleanup", "status": "complete", "content_md": "# Cleaned"}
+        [run] = other.active(job_id)
+        other._complete(run.id, "done", "")
+
+    async def claim_elsewhere():
+        while (run := other._claim()) is None:
+            await asyncio.sleep(0.01)
+        return run
+
+    monkeypatch.setattr(pipeline, "section_changes", changes)
+    claimer = asyncio.create_task(claim_elsewhere())
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.post("/api/pipeline/test_job_id/analyze")
+        run = local.get((await claimer).id)
+    finally:
+        claimer.cancel()
+        local.close()
+        other.close()
+
+    lines = [l for l in response.text.splitlines() if l.startswith("data:")]
+    assert [l.split('"status":"')[1].split('"')[0] for l in lines[:-1]] == [
+        "running", "delta", "delta", "complete",
+    ]
+    assert '"content_md":"# Cl"' in lines[1]
+    assert '"content_md":"ean"' in lines[2]
+    assert lines[-1] == 'data: {"done": true}'
+    assert run.status == "done"
+
+
+def test_cancel_removes_queued_runs(client, mock_pb, job_queue):
+    """POST /api/pipeline/{job_id}/cancel cancels runs that have not started."""
+    mock_pb.collection().get_one.return_value = _make_job_record()
+    run = job_queue.enqueue("test_job_id", "analysis")
+
+    response = client.post("/api/pipeline/test_job_id/cancel")
+
+    assert response.status_code == 200
+    assert response.json() == {"cancelled": [{"id": run.id, "phase": "analysis"}]}
+    assert job_queue.get(run.id).status == "cancelled"
+
+
+def test_pipeline_status_idle_sends_snapshot_and_done(client, mock_pb):
+    """An idle job gets one snapshot, then done — a single sections query."""
+    from tests.conftest import _make_section_record
+
+    mock_pb.collection().get_one.return_value = _make_job_record()
+    mock_pb.collection().get_full_list.return_value = [
+        _make_section_record(section_key="evidence_cleanup", status="complete"),
+    ]
+
+    response = client.get("/api/pipeline/test_job_id/status")
+
+    assert response.status_code == 200
+    assert '"evidence_cleanup": "complete"' in response.text
+    assert '"done": true' in response.text
+    assert mock_pb.collection().get_full_list.call_count == 1
+
+
+async def test_pipeline_status_streams_bus_events(mock_pb):
+    """A local run's events are pushed from the event bus without re-querying."""
+    import asyncio
+
+    import httpx
+
+    from app.main import app
+    from app.models import PipelineEvent
+    from app.services.event_bus import event_bus
+    from tests.conftest import _make_section_record
+
+    mock_pb.collection().get_one.return_value = _make_job_record()
+    mock_pb.collection().get_full_list.return_value = [
+        _make_section_record(section_key="evidence_cleanup", status="running"),
+    ]
+
+    async def finish_run():
+        while not event_bus._subscribers.get("test_job_id"):
+            await asyncio.sleep(0.01)
+        event_bus.publish(
+            "test_job_id",
+            PipelineEvent(section_key="evidence_cleanup", status="complete"),
+        )
+        event_bus.end_run("test_job_id")
+
+    event_bus.begin_run("test_job_id")
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            publisher = asyncio.create_task(finish_run())
+            response = await asyncio.wait_for(ac.get("/api/pipeline/test_job_id/status"), 5)
+            await publisher
+    finally:
+        event_bus.clear()
+
+    lines = [l for l in response.text.splitlines() if l.startswith("data:")]
+    assert lines == [
+        'data: {"evidence_cleanup": "running"}',
+        'data: {"evidence_cleanup": "complete"}',
+        'data: {"done": true}',
+    ]
+    assert mock_pb.collection().get_full_list.call_count == 1
+
+
+async def test_status_stream_reconnects_after_realtime_error(mock_pb, monkeypatch):
+    """A failed realtime connection is retried and the stream still ends with done."""
+    import httpx
+
+    from app.main import app
+    from app.routers import pipeline
+    from tests.conftest import _make_section_record
+
+    mock_pb.collection().get_one.return_value = _make_job_record()
+    mock_pb.collection().get_full_list.side_effect = [
+        [_make_section_record(status="running")],
+        [_make_section_record(status="complete")],
+    ]
+    attempts = []
+
+    async def changes(job_id):
+        attempts.append(job_id)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("connection refused")
+        yield None
+
+    monkeypatch.setattr(pipeline, "section_changes", changes)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/api/pipeline/test_job_id/status")
+
+    lines = [l for l in response.text.splitlines() if l.startswith("data:")]
+    assert lines == [
+        'data: {"evidence_cleanup": "running"}',
+        'data: {"evidence_cleanup": "complete"}',
+        'data: {"done": true}',
+    ]
+    assert len(attempts) == 2
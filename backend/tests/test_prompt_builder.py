@@ -0,0 +1,92 @@
+"""Tests for token-budgeted prompt assembly."""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.sections import cover_letter
+from app.services.prompt_builder import (
+    TRIMMED_MARKER,
+    PromptBuilder,
+    count_tokens,
+    prompt_budget,
+)
+
+
+def _lines(word, n):
+    return "\n".join(f"{word} line {i}" for i in range(n))
+
+
+def _prompt(budget=None):
+    prompt = PromptBuilder("Header", budget=budget)
+    prompt.add("JD", _lines("jd", 50), priority=3, min_tokens=100)
+    prompt.add("Analysis", _lines("analysis", 50), priority=2)
+    prompt.add("Template", _lines("template", 50), priority=1)
+    prompt.text("Instructions:\n- be brief")
+    return prompt
+
+
+def test_under_budget_renders_like_an_fstring():
+    prompt = PromptBuilder("Header", budget=10_000)
+    prompt.add("JD", "body").add("Verdict", None).text("Produce:\n1. x")
+
+    assert prompt.build() == "Header\n\nJD:\nbody\n\nVerdict:\nN/A\n\nProduce:\n1. x\n"
+    assert prompt.trimmed == {}
+    assert prompt.tokens == count_tokens(prompt.build())
+
+
+def test_trims_lowest_priority_first_at_line_boundaries():
+    full = _prompt().build()
+    prompt = _prompt(budget=count_tokens(full) - 100)
+
+    text = prompt.build()
+    assert list(prompt.trimmed) == ["Template"]
+    assert prompt.tokens <= prompt.budget
+    template = text.split("Template:\n")[1].split("\n\nInstructions:")[0]
+    assert template.endswith(f"\n{TRIMMED_MARKER}")
+    assert all(line.startswith("template line") for line in template.splitlines()[:-1])
+    # Higher-priority context and fixed text are untouched
+    assert _lines("analysis", 50) in text and text.endswith("- be brief\n")
+
+
+def test_drops_exhausted_blocks_and_respects_min_tokens():
+    prompt = _prompt(budget=60)
+
+    text = prompt.build()
+    assert "Template:" not in text and "Analysis:" not in text
+    assert list(prompt.trimmed) == ["Template", "Analysis", "JD"]
+    jd = text.split("JD:\n")[1].split("\n\nInstructions:")[0]
+    assert count_tokens(jd) >= 90  # floor, less the partial line cut off
+    # Over budget rather than below the JD's floor
+    assert prompt.tokens > 60
+
+
+def test_budget_comes_from_context():
+    with prompt_budget(200):
+        trimmed = _prompt().build()
+    assert TRIMMED_MARKER in trimmed
+    assert TRIMMED_MARKER not in _prompt().build()
+
+
+async def test_cover_letter_prompt_keeps_grounding_over_references():
+    """Under a tight budget cl_intro loses reference material before the
+    analysis and the JD/LinkedIn profile it is grounded in."""
+    refs = {
+        "li_profile": _lines("profile", 100),
+        "cover_letter_template": _lines("template", 400),
+        "approach": _lines("approach", 400),
+    }
+    job = SimpleNamespace(company="Acme", role="PM", jd_cleaned=_lines("jd", 100), jd_text="")
+    dep_context = {"between_the_lines": "BTL", "cl_pep_talk": "Pep"}
+    users = []
+
+    async def fake_call(**kwargs):
+        users.append(kwargs["user"])
+
+    with patch.object(cover_letter, "call_llm_async", fake_call), prompt_budget(2000):
+        await cover_letter.generate_cl_intro(job, refs, dep_context)
+
+    user = users[0]
+    assert count_tokens(user) <= 2000
+    assert refs["li_profile"] in user and job.jd_cleaned in user
+    assert "Between the Lines:\nBTL" in user and "Pep Talk:\nPep" in user
+    assert "Approach:" not in user
+    assert TRIMMED_MARKER in user.split("Cover Letter Template:\n")[1]
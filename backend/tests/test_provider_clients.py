@@ -0,0 +1,15 @@
+"""Tests for the shared provider client registry."""
+from unittest.mock import patch
+
+from app.services import provider_clients
+
+
+async def test_get_anthropic_reuses_one_client():
+    with patch.object(provider_clients, "_anthropic", None), \
+            patch("app.services.llm_service.client", None):
+        first = provider_clients.get_anthropic()
+        assert provider_clients.get_anthropic() is first
+
+        await provider_clients.close_clients()
+        assert provider_clients._anthropic is None
+        assert first._client.is_closed
@@ -0,0 +1,118 @@
+"""Tests for the provider rate limiter."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.rate_limiter import (
+    Limits,
+    RateLimiter,
+    TokenBucket,
+    anthropic_usage_tokens,
+    estimate_tokens,
+)
+
+
+def test_estimate_tokens_counts_prompt_and_output_budget():
+    assert estimate_tokens("a" * 400, None, "b" * 40, max_output=100) == 210
+
+
+def test_token_bucket_wait_time_and_refill():
+    bucket = TokenBucket(60)  # one unit per second
+    now = bucket.updated
+
+    assert bucket.wait_time(60, now) == 0
+    bucket.take(60, now)
+    assert bucket.wait_time(1, now) == 1
+    assert bucket.wait_time(1, now + 1) == 0
+
+
+async def test_limit_enforces_requests_per_minute():
+    limiter = RateLimiter({"gemini": Limits(rpm=2, tpm=0)})
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+        # Pretend the time passed by refilling the bucket
+        limiter._buckets[("gemini", "m")][0].level = 1
+
+    with patch("app.services.rate_limiter.asyncio.sleep", fake_sleep):
+        for _ in range(3):
+            async with limiter.limit("gemini", "m", 10):
+                pass
+
+    assert len(waits) == 1
+    assert waits[0] > 0
+
+
+async def test_limit_reconciles_estimate_with_usage():
+    limiter = RateLimiter({"anthropic": Limits(rpm=0, tpm=6000)})
+
+    async with limiter.limit("anthropic", "haiku", 1000) as usage:
+        usage.record(250)
+
+    tokens = limiter._buckets[("anthropic", "haiku")][1]
+    assert 5749 <= tokens.level <= 5751
+
+    # Unreported usage keeps the estimate charged
+    async with limiter.limit("anthropic", "haiku", 1000) as usage:
+        usage.record(None)
+    assert 4749 <= tokens.level <= 4752
+
+
+async def test_failed_call_refunds_output_budget():
+    limiter = RateLimiter({"gemini": Limits(rpm=0, tpm=6000)})
+
+    with pytest.raises(RuntimeError):
+        async with limiter.limit("gemini", "flash", 1000, max_output=800):
+            raise RuntimeError("429 Resource exhausted")
+
+    tokens = limiter._buckets[("gemini", "flash")][1]
+    assert 5799 <= tokens.level <= 5801
+
+    with pytest.raises(TimeoutError):
+        with limiter.limit_sync("gemini", "flash", 1000, max_output=1000):
+            raise TimeoutError()
+    assert 5799 <= tokens.level <= 5802
+
+
+def test_model_limits_override_provider_limits():
+    limiter = RateLimiter(
+        {"gemini": Limits(rpm=10, tpm=0)},
+        {("gemini", "pro"): Limits(rpm=1, tpm=0)},
+    )
+
+    with limiter.limit_sync("gemini", "pro", 0):
+        pass
+
+    assert limiter._try_admit(("gemini", "pro"), 0) > 0
+    assert limiter._try_admit(("gemini", "flash"), 0) == 0
+
+
+def test_unknown_provider_is_unlimited():
+    limiter = RateLimiter({})
+    for _ in range(100):
+        assert limiter._try_admit(("other", "m"), 10**9) == 0
+
+
+def test_anthropic_usage_tokens():
+    message = MagicMock()
+    message.usage.input_tokens = 12
+    message.usage.output_tokens = 30
+    assert anthropic_usage_tokens(message) == 42
+    assert anthropic_usage_tokens(MagicMock()) is None
+
+
+def test_limits_are_split_across_processes(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "PIPELINE_WORKER_PROCESSES", 2)
+    monkeypatch.setattr(settings, "ANTHROPIC_RPM", 50)
+    monkeypatch.setattr(settings, "ANTHROPIC_TPM", 0)
+    monkeypatch.setattr(settings, "LLM_RATE_LIMITS", '{"gemini:flash": {"rpm": 300, "tpm": 90000}}')
+
+    limiter = RateLimiter.from_settings()
+
+    # The API process plus two workers each get a third
+    assert limiter.provider_limits["anthropic"] == Limits(rpm=16, tpm=0)
+    assert limiter.model_limits[("gemini", "flash")] == Limits(rpm=100, tpm=30000)
+    assert settings.process_share(1) == 1
@@ -0,0 +1,40 @@
+"""Tests for PocketBase realtime subscriptions."""
+import json
+from unittest.mock import patch
+
+import httpx
+
+from app.async_database import AsyncPocketBase
+from app.services.realtime import section_changes
+
+
+def _sse(name: str, data: dict) -> str:
+    return f"id:1\nevent:{name}\ndata:{json.dumps(data)}\n\n"
+
+
+async def test_section_changes_subscribes_and_yields_records():
+    posted = []
+
+    def handler(request):
+        if request.method == "POST":
+            posted.append(json.loads(request.content))
+            return httpx.Response(204)
+        body = (
+            _sse("PB_CONNECT", {"clientId": "c1"})
+            + _sse("sections/*", {"action": "update", "record": {"section_key": "gate_check", "status": "complete"}})
+            + _sse("sections/*", {"action": "delete", "record": {"section_key": "gate_check"}})
+        )
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    client = AsyncPocketBase("http://pb.test")
+    client.http = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    streams = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+
+    with patch("app.services.realtime.apb", client), patch("app.services.realtime._client", streams):
+        changes = [c async for c in section_changes("job1")]
+
+    assert changes == [None, {"section_key": "gate_check", "status": "complete"}]
+    assert posted[0]["clientId"] == "c1"
+    topic = posted[0]["subscriptions"][0]
+    assert topic.startswith("sections/*?options=")
+    assert "job1" in topic
@@ -0,0 +1,72 @@
+"""Tests for the reference snapshot store."""
+import asyncio
+import os
+
+import pytest
+
+from app.services.reference_loader import ReferenceSnapshot, ReferenceStore
+
+
+def _store(tmp_path, **kwargs):
+    (tmp_path / "a.md").write_text("alpha")
+    (tmp_path / "b.md").write_text("beta")
+    return ReferenceStore(tmp_path, {"a": "a.md", "b": "b.md"}, **kwargs)
+
+
+def _touch(path, text):
+    """Rewrite ``path`` with a newer mtime than it had."""
+    stat = path.stat()
+    path.write_text(text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_snapshot_is_immutable_and_hashed(tmp_path):
+    snapshot = _store(tmp_path, poll_seconds=0).snapshot()
+
+    assert dict(snapshot) == {"a": "alpha", "b": "beta"}
+    assert snapshot.digest == ReferenceSnapshot.from_texts({"a": "alpha", "b": "beta"}).digest
+    assert snapshot.hashes["a"] != snapshot.hashes["b"]
+    with pytest.raises(TypeError):
+        snapshot["a"] = "changed"
+    with pytest.raises(KeyError, match="not loaded"):
+        snapshot["missing"]
+
+
+def test_reload_swaps_in_new_snapshot_for_changed_files(tmp_path):
+    store = _store(tmp_path, poll_seconds=0)
+    before = store.snapshot()
+
+    assert store.reload_if_changed() == []
+    assert store.snapshot().digest == before.digest
+
+    _touch(tmp_path / "a.md", "alpha v2")
+    assert store.reload_if_changed() == ["a"]
+    after = store.snapshot()
+    assert after["a"] == "alpha v2" and after.digest != before.digest
+    # Unchanged files are carried over, and earlier snapshots are untouched
+    assert after.file("b") is before.file("b")
+    assert before["a"] == "alpha"
+
+
+def test_touch_without_content_change_keeps_digest(tmp_path):
+    store = _store(tmp_path, poll_seconds=0)
+    digest = store.snapshot().digest
+
+    _touch(tmp_path / "b.md", "beta")
+    assert store.reload_if_changed() == []
+    assert store.snapshot().digest == digest
+
+
+async def test_polling_picks_up_edits(tmp_path):
+    store = _store(tmp_path, poll_seconds=0.01)
+    await store.start()
+    try:
+        _touch(tmp_path / "b.md", "beta v2")
+        for _ in range(200):
+            if store.snapshot()["b"] == "beta v2":
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await store.stop()
+
+    assert store.snapshot()["b"] == "beta v2"
@@ -0,0 +1,136 @@
+"""Tests for the content-addressed LLM response cache."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.response_cache import CachedResponse, ResponseCache, make_cache_key
+
+
+def _key(**overrides):
+    params = dict(
+        model="m", system="s", user="u", temperature=0.3, max_tokens=100, tools=None
+    )
+    params.update(overrides)
+    return make_cache_key(**params)
+
+
+def test_cache_key_covers_all_inputs():
+    """Changing any input changes the key."""
+    base = _key()
+    assert _key() == base
+    for field, value in [
+        ("model", "other"),
+        ("system", "x"),
+        ("user", "x"),
+        ("temperature", 0.5),
+        ("max_tokens", 200),
+        ("tools", [{"google_search": {}}]),
+    ]:
+        assert _key(**{field: value}) != base
+
+
+def test_get_and_set_roundtrip(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", ttl_seconds=60, max_bytes=10_000)
+    cache.set("k", CachedResponse("# Hello", "m", 10, 100))
+
+    hit = cache.get("k")
+    assert hit is not None
+    assert hit.content_md == "# Hello"
+    assert cache.get("missing") is None
+
+
+def test_persists_across_instances(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    ResponseCache(path, ttl_seconds=60, max_bytes=10_000).set(
+        "k", CachedResponse("x", "m", 1, 1)
+    )
+    assert ResponseCache(path, ttl_seconds=60, max_bytes=10_000).get("k") is not None
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", ttl_seconds=60, max_bytes=10_000)
+    with patch("app.services.response_cache.time.time", return_value=1000.0):
+        cache.set("k", CachedResponse("x", "m", 1, 1))
+    with patch("app.services.response_cache.time.time", return_value=1061.0):
+        assert cache.get("k") is None
+
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", ttl_seconds=60, max_bytes=20)
+    with patch("app.services.response_cache.time.time", return_value=1.0):
+        cache.set("a", CachedResponse("a" * 10, "m", 1, 1))
+    with patch("app.services.response_cache.time.time", return_value=2.0):
+        cache.set("b", CachedResponse("b" * 10, "m", 1, 1))
+    with patch("app.services.response_cache.time.time", return_value=3.0):
+        cache.get("a")  # "a" is now most recently used
+    with patch("app.services.response_cache.time.time", return_value=4.0):
+        cache.set("c", CachedResponse("c" * 10, "m", 1, 1))
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+
+@pytest.mark.asyncio
+async def test_call_llm_async_hits_cache(tmp_path, monkeypatch):
+    """Second identical call is served from cache and recorded as a hit."""
+    from app.config import settings
+    from app.services import llm_service
+
+    monkeypatch.setattr(settings, "LLM_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+
+    response = MagicMock()
+    response.text = "# Fresh"
+    response.usage_metadata.prompt_token_count = 10
+    response.usage_metadata.candidates_token_count = 5
+    response.usage_metadata.cached_content_input_token_count = 0
+    calls = []
+
+    async def fake_generate(**kwargs):
+        calls.append(kwargs)
+        return response
+
+    mock_client = MagicMock()
+    mock_client.aio.models.generate_content = fake_generate
+
+    with patch.object(llm_service, "client", mock_client):
+        first = await llm_service.call_llm_async(system="s", user="u")
+        second = await llm_service.call_llm_async(system="s", user="u")
+        bypassed = await llm_service.call_llm_async(system="s", user="u", bypass_cache=True)
+
+    assert (first.cache_hits, first.cache_misses) == (0, 1)
+    assert (second.cache_hits, second.cache_misses) == (1, 0)
+    assert second.content_md == "# Fresh"
+    assert second.tokens_used == 0
+    assert bypassed.cache_hits == 0
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_bypass_context_var_skips_cache(tmp_path, monkeypatch):
+    from app.config import settings
+    from app.services import llm_service
+
+    monkeypatch.setattr(settings, "LLM_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+
+    response = MagicMock()
+    response.text = "# Fresh"
+    response.usage_metadata = None
+    calls = []
+
+    async def fake_generate(**kwargs):
+        calls.append(kwargs)
+        return response
+
+    mock_client = MagicMock()
+    mock_client.aio.models.generate_content = fake_generate
+
+    with patch.object(llm_service, "client", mock_client):
+        await llm_service.call_llm_async(system="s", user="u")
+        token = llm_service.bypass_response_cache.set(True)
+        try:
+            result = await llm_service.call_llm_async(system="s", user="u")
+        finally:
+            llm_service.bypass_response_cache.reset(token)
+
+    assert result.cache_hits == 0
+    assert len(calls) == 2
@@ -0,0 +1,114 @@
+"""Tests for the critical-path DAG scheduler."""
+import asyncio
+
+from app.sections.config import ANALYSIS_SECTIONS, SectionDef
+from app.services.scheduler import DagScheduler, PrioritySlots, SectionDurations
+
+
+def _defs():
+    return [
+        SectionDef("a", "A", 1, [], "analysis"),
+        SectionDef("short", "Short", 2, ["a"], "analysis"),
+        SectionDef("long", "Long", 3, ["a"], "analysis"),
+        SectionDef("tail", "Tail", 4, ["long"], "analysis"),
+    ]
+
+
+def test_critical_path_includes_downstream_work():
+    durations = {"a": 1, "short": 5, "long": 3, "tail": 10}
+    scheduler = DagScheduler(_defs(), [], durations.__getitem__)
+
+    assert scheduler.priority == {"a": 14, "short": 5, "long": 13, "tail": 10}
+
+
+def test_ready_sections_ordered_by_critical_path():
+    durations = {"a": 1, "short": 5, "long": 3, "tail": 10}
+    scheduler = DagScheduler(_defs(), [], durations.__getitem__)
+
+    assert [sd.key for sd in scheduler.pop_ready()] == ["a"]
+    assert scheduler.pop_ready() == []
+
+    scheduler.mark_done("a")
+    # "long" gates "tail", so it starts before the individually slower "short"
+    assert [sd.key for sd in scheduler.pop_ready()] == ["long", "short"]
+
+    scheduler.mark_done("long")
+    assert [sd.key for sd in scheduler.pop_ready()] == ["tail"]
+
+
+def test_done_keys_satisfy_dependencies():
+    scheduler = DagScheduler(_defs()[1:], ["a"], lambda key: 1)
+
+    assert {sd.key for sd in scheduler.pop_ready()} == {"short", "long"}
+
+
+def test_missing_dependency_blocks_section():
+    defs = [SectionDef("b", "B", 1, ["not_in_run"], "analysis")]
+    scheduler = DagScheduler(defs, [], lambda key: 1)
+
+    assert scheduler.pop_ready() == []
+    assert scheduler.release_missing() == ["not_in_run"]
+    assert [sd.key for sd in scheduler.pop_ready()] == ["b"]
+    assert scheduler.release_missing() == []
+
+
+def test_analysis_dag_runs_every_section_once():
+    scheduler = DagScheduler(ANALYSIS_SECTIONS, [], lambda key: 1)
+    seen = []
+    ready = scheduler.pop_ready()
+    while ready:
+        for sd in ready:
+            seen.append(sd.key)
+            scheduler.mark_done(sd.key)
+        ready = scheduler.pop_ready()
+
+    assert sorted(seen) == sorted(sd.key for sd in ANALYSIS_SECTIONS)
+    assert seen[0] == "evidence_cleanup"
+    assert seen[-1] == "final_verdict"
+
+
+def test_section_durations_seed_and_record():
+    durations = SectionDurations(alpha=0.5, default_ms=100)
+    durations.seed([("a", 1000), ("a", 3000), ("b", 0)])
+
+    assert durations.estimate("a") == 2000
+    assert durations.estimate("b") == 100
+
+    durations.record("a", 4000)
+    assert durations.estimate("a") == 3000
+
+
+async def test_priority_slots_wake_highest_priority_first():
+    slots = PrioritySlots(1)
+    order = []
+
+    async def worker(name, priority):
+        async with slots.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await slots.acquire(0)
+    tasks = [
+        asyncio.create_task(worker("low", 1)),
+        asyncio.create_task(worker("high", 10)),
+        asyncio.create_task(worker("mid", 5)),
+    ]
+    await asyncio.sleep(0)
+    slots.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["high", "mid", "low"]
+
+
+async def test_priority_slots_skip_cancelled_waiters():
+    slots = PrioritySlots(1)
+    await slots.acquire(0)
+
+    waiter = asyncio.create_task(slots.acquire(5))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    slots.release()
+    # The slot is free again rather than handed to the cancelled waiter
+    await asyncio.wait_for(slots.acquire(1), 1)
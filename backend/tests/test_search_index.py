@@ -0,0 +1,160 @@
+"""Tests for the local full-text search index and GET /api/search."""
+import sqlite3
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services import search_index as search_index_module
+from app.services.search_index import SearchIndex, reindex_all, to_match_query
+from tests.conftest import _make_job_record, _make_section_record
+
+
+def _index():
+    index = SearchIndex(":memory:")
+    index.index_job("j1", "Acme Corp", "Platform Engineer", "We run Kubernetes clusters at scale.")
+    index.index_job("j2", "Globex", "Data Scientist", "Python, statistics and experimentation.")
+    index.index_section("j1", "company_research", "Acme builds logistics software in Rust.")
+    index.index_section("j2", "fit_assessment", "Strong match: Python and Kubernetes experience.")
+    return index
+
+
+def test_to_match_query_quotes_words():
+    """User input never reaches FTS5 as query syntax."""
+    assert to_match_query('rust OR "go" NEAR(x') == '"rust"* "OR"* "go"* "NEAR"* "x"*'
+    assert to_match_query("  -- ") == ""
+
+
+def test_search_matches_jobs_and_sections():
+    index = _index()
+
+    hits = index.search("kubernetes")
+    assert {(h.job_id, h.section_key) for h in hits} == {("j1", None), ("j2", "fit_assessment")}
+    assert all("<mark>" in h.snippet for h in hits)
+
+
+def test_search_requires_every_word_and_matches_prefixes():
+    index = _index()
+
+    assert [h.job_id for h in index.search("python kube")] == ["j2"]
+    assert [h.section_key for h in index.search("logist")] == ["company_research"]
+    assert index.search("python rust") == []
+
+
+def test_company_matches_rank_above_body_matches():
+    index = SearchIndex(":memory:")
+    index.index_job("j1", "Other", "Engineer", "Partnered with globex on billing.")
+    index.index_job("j2", "Globex", "Engineer", "Billing systems.")
+    for i in range(5):  # bm25 needs a corpus where the term is rare
+        index.index_job(f"filler{i}", "Initech", "Engineer", "Payments platform.")
+
+    hits = index.search("globex")
+    assert [h.job_id for h in hits] == ["j2", "j1"]
+    assert hits[0].score > hits[1].score
+
+
+def test_section_updates_replace_previous_content():
+    index = _index()
+
+    index.index_section("j1", "company_research", "Acme builds warehouse robots.")
+    assert index.search("logistics") == []
+    assert [h.section_key for h in index.search("robots")] == ["company_research"]
+
+    index.index_section("j1", "company_research", "")
+    assert index.search("robots") == []
+
+
+def test_job_updates_propagate_company_to_sections():
+    """Sections are findable by their job's company, including after a rename."""
+    index = _index()
+    assert ("j1", "company_research") in {(h.job_id, h.section_key) for h in index.search("acme")}
+
+    index.index_job("j1", company="Initech")
+    hits = index.search("initech")
+    assert {(h.job_id, h.section_key) for h in hits} == {("j1", None), ("j1", "company_research")}
+    # Fields not passed keep their indexed value
+    assert [h.job_id for h in index.search("clusters")] == ["j1"]
+
+
+def test_remove_job_drops_its_documents():
+    index = _index()
+    index.remove_job("j1")
+
+    assert index.search("acme") == []
+    assert index.count() == 2
+
+
+async def test_reindex_all_rebuilds_from_pocketbase(mock_pb):
+    index = SearchIndex(":memory:")
+    index.index_job("stale", "Stale Co", "Role", "gone")
+    jobs = [_make_job_record(id="j1", company="Acme Corp", jd_cleaned="Kubernetes clusters")]
+    sections = [_make_section_record(job="j1", section_key="fit_assessment", content_md="Rust experience")]
+
+    def collection(name):
+        coll = MagicMock()
+        coll.get_full_list.return_value = jobs if name == "jobs" else sections
+        return coll
+
+    mock_pb.collection.side_effect = collection
+
+    assert await reindex_all(index) == 2
+    assert index.search("stale") == []
+    assert [h.section_key for h in index.search("acme rust")] == ["fit_assessment"]
+
+
+def test_rebuild_is_one_transaction():
+    """A rebuild that fails part way leaves the previous index intact."""
+    index = _index()
+    # The second job violates NOT NULL on company
+    jobs = [("j3", "Initech", "Engineer", "TPS reports"), ("j4", None, "Role", "body")]
+
+    with pytest.raises(sqlite3.IntegrityError):
+        index.rebuild(jobs, [])
+
+    assert index.count() == 4
+    assert [h.job_id for h in index.search("acme")] == ["j1", "j1"]
+    assert index.search("initech") == []
+
+
+async def test_update_hooks_run_off_the_event_loop(search_index, monkeypatch):
+    threads = []
+    real = search_index.index_section
+
+    def index_section(*args):
+        threads.append(threading.current_thread())
+        real(*args)
+
+    monkeypatch.setattr(search_index, "index_section", index_section)
+
+    await search_index_module.index_section("j1", "fit_assessment", "Rust experience")
+
+    assert threads and threads[0] is not threading.main_thread()
+    assert [h.section_key for h in search_index.search("rust")] == ["fit_assessment"]
+
+
+def test_search_endpoint(client, search_index):
+    search_index.index_job("j1", "Acme Corp", "Platform Engineer", "Kubernetes clusters.")
+
+    response = client.get("/api/search", params={"q": "kubernetes"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["query"] == "kubernetes"
+    assert [r["job_id"] for r in data["results"]] == ["j1"]
+    assert data["results"][0]["company"] == "Acme Corp"
+    assert data["results"][0]["section_key"] is None
+    assert "<mark>Kubernetes</mark>" in data["results"][0]["snippet"]
+
+
+def test_edited_section_is_searchable(client, mock_pb, search_index):
+    mock_pb.collection().get_full_list.return_value = [_make_section_record()]
+    mock_pb.collection().update.return_value = _make_section_record(
+        content_md="Hand-written notes about Terraform", is_locked=True
+    )
+
+    response = client.put(
+        "/api/sections/test_job_id/evidence_cleanup",
+        json={"content_md": "Hand-written notes about Terraform"},
+    )
+    assert response.status_code == 200
+    hits = search_index.search("terraform")
+    assert [(h.job_id, h.section_key) for h in hits] == [("test_job_id", "evidence_cleanup")]
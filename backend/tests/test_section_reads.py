@@ -0,0 +1,81 @@
+"""Static check: section functions read only the dep_context keys their
+SectionDef declares (``depends_on`` + ``reads``)."""
+import ast
+import inspect
+import textwrap
+
+from app.sections.config import ALL_SECTIONS
+from app.sections.registry import SECTION_FUNCTIONS
+
+DYNAMIC = "<dynamic>"
+
+
+def _is_dep_context(node) -> bool:
+    return isinstance(node, ast.Name) and node.id == "dep_context"
+
+
+def dep_context_reads(fn) -> set[str]:
+    """Keys ``fn`` reads from ``dep_context``.
+
+    Keys must be string literals, or loop variables over a literal list of
+    strings; any other use of ``dep_context`` is reported as ``DYNAMIC``.
+    """
+    tree = ast.parse(textwrap.dedent(inspect.getsource(fn)))
+    loop_keys = {
+        node.target.id: {e.value for e in node.iter.elts if isinstance(e, ast.Constant)}
+        for node in ast.walk(tree)
+        if isinstance(node, ast.For)
+        and isinstance(node.target, ast.Name)
+        and isinstance(node.iter, (ast.List, ast.Tuple))
+    }
+
+    def resolve(key) -> set[str]:
+        if isinstance(key, ast.Constant) and isinstance(key.value, str):
+            return {key.value}
+        if isinstance(key, ast.Name) and key.id in loop_keys:
+            return loop_keys[key.id]
+        return {DYNAMIC}
+
+    keys, accounted = set(), set()
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "get"
+            and _is_dep_context(node.func.value)
+            and node.args
+        ):
+            keys |= resolve(node.args[0])
+            accounted.add(id(node.func.value))
+        elif isinstance(node, ast.Subscript) and _is_dep_context(node.value):
+            keys |= resolve(node.slice)
+            accounted.add(id(node.value))
+    if any(_is_dep_context(n) and id(n) not in accounted for n in ast.walk(tree)):
+        keys.add(DYNAMIC)
+    return keys
+
+
+def test_section_functions_read_only_declared_inputs():
+    undeclared = {}
+    for sd in ALL_SECTIONS:
+        extra = dep_context_reads(SECTION_FUNCTIONS[sd.key]) - set(sd.inputs)
+        if extra:
+            undeclared[sd.key] = sorted(extra)
+
+    assert undeclared == {}, f"Sections read dep_context keys they do not declare: {undeclared}"
+
+
+def test_reads_name_other_sections():
+    keys = {sd.key for sd in ALL_SECTIONS}
+    for sd in ALL_SECTIONS:
+        assert set(sd.reads) <= keys - {sd.key}, sd.key
+
+
+def test_checker_flags_undeclared_and_dynamic_reads():
+    def section(job, refs, dep_context):
+        for key in ["a", "b"]:
+            dep_context.get(key, "")
+        name = "c"
+        return dep_context["d"], dep_context.get(name), dict(dep_context)
+
+    assert dep_context_reads(section) == {"a", "b", "d", DYNAMIC}
@@ -0,0 +1,166 @@
+"""Tests for the write-behind section buffer."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.database import SectionWriteBuffer
+from tests.conftest import _make_section_record
+
+
+def _mock_pb(existing=()):
+    mock_pb = MagicMock()
+    mock_pb.collection.return_value.get_full_list.return_value = list(existing)
+    return mock_pb
+
+
+@pytest.mark.asyncio
+async def test_stage_coalesces_per_section():
+    """Running + complete for the same section become one write."""
+    buffer = SectionWriteBuffer(flush_interval=60)
+    buffer.stage("job1", "gate_check", {"status": "running", "is_locked": False})
+    buffer.stage("job1", "gate_check", {"status": "complete", "content_md": "# Done"})
+
+    pending = buffer.pending("job1")
+    assert pending == {
+        ("job1", "gate_check"): {
+            "status": "complete", "is_locked": False, "content_md": "# Done",
+        }
+    }
+    buffer.clear()
+
+
+@pytest.mark.asyncio
+async def test_flush_sends_one_batch():
+    """Flush resolves ids from the index and sends a single batch."""
+    mock_pb = _mock_pb([_make_section_record(id="sec1", section_key="gate_check")])
+    batch = mock_pb.create_batch.return_value
+
+    buffer = SectionWriteBuffer(flush_interval=60)
+    buffer.stage("job1", "gate_check", {"status": "complete"})
+    buffer.stage("job1", "company_research", {"status": "running"})
+
+    with patch("app.database.pb", mock_pb):
+        await buffer.flush("job1")
+
+    mock_pb.collection.return_value.get_full_list.assert_called_once()
+    batch.collection.return_value.update.assert_called_once_with("sec1", {"status": "complete"})
+    created = batch.collection.return_value.create.call_args[0][0]
+    assert created["section_key"] == "company_research"
+    assert created["job"] == "job1"
+    batch.send.assert_called_once()
+    assert buffer.pending() == {}
+
+
+@pytest.mark.asyncio
+async def test_flush_only_targets_requested_job():
+    mock_pb = _mock_pb()
+    buffer = SectionWriteBuffer(flush_interval=60)
+    buffer.stage("job1", "gate_check", {"status": "running"})
+    buffer.stage("job2", "gate_check", {"status": "running"})
+
+    with patch("app.database.pb", mock_pb):
+        await buffer.flush("job1")
+
+    assert list(buffer.pending()) == [("job2", "gate_check")]
+    buffer.clear()
+
+
+@pytest.mark.asyncio
+async def test_falls_back_when_batch_unavailable():
+    """A 403 from the batch API switches to per-section upserts."""
+    from pocketbase.utils import ClientResponseError
+
+    mock_pb = _mock_pb()
+    mock_pb.create_batch.return_value.send.side_effect = ClientResponseError(
+        "Batch requests are not allowed.", status=403
+    )
+
+    buffer = SectionWriteBuffer(flush_interval=60)
+    buffer.stage("job1", "gate_check", {"status": "complete"})
+
+    with patch("app.database.pb", mock_pb), \
+            patch("app.database.upsert_section") as mock_upsert:
+        await buffer.flush()
+        buffer.stage("job1", "gate_check", {"status": "running"})
+        await buffer.flush()
+
+    assert mock_upsert.call_count == 2
+    # Batch is not retried once known to be unavailable
+    assert mock_pb.create_batch.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_writes():
+    mock_pb = _mock_pb()
+    buffer = SectionWriteBuffer(flush_interval=60)
+    buffer.stage("job1", "gate_check", {"status": "complete"})
+
+    with patch("app.database.pb", mock_pb), \
+            patch.object(buffer, "_write", side_effect=Exception("down")):
+        await buffer.flush()
+
+    assert buffer.pending() == {("job1", "gate_check"): {"status": "complete"}}
+    buffer.clear()
+
+
+def test_stage_without_event_loop_writes_through():
+    buffer = SectionWriteBuffer()
+    with patch.object(buffer, "_write") as mock_write:
+        buffer.stage("job1", "gate_check", {"status": "running"})
+
+    mock_write.assert_called_once_with({("job1", "gate_check"): {"status": "running"}})
+    assert buffer.pending() == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_flushes_keep_write_order():
+    """A later flush waits for an earlier one, so "complete" can't be overwritten by "running"."""
+    import asyncio
+    import threading
+
+    written = []
+    release = threading.Event()
+
+    def write(entries):
+        if not written:
+            release.wait(1)  # first flush is slow
+        written.append(dict(entries))
+
+    buffer = SectionWriteBuffer(flush_interval=60)
+    buffer._write = write
+    buffer.stage("job1", "gate_check", {"status": "running"})
+    first = asyncio.create_task(buffer.flush("job1"))
+    await asyncio.sleep(0.01)
+    buffer.stage("job1", "gate_check", {"status": "complete"})
+    second = asyncio.create_task(buffer.flush("job1"))
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(first, second)
+
+    assert [w[("job1", "gate_check")]["status"] for w in written] == ["running", "complete"]
+    buffer.clear()
+
+
+@pytest.mark.asyncio
+async def test_writes_staged_during_background_flush_are_flushed():
+    import asyncio
+
+    written = []
+    buffer = SectionWriteBuffer(flush_interval=0.01)
+
+    def write(entries):
+        written.append(dict(entries))
+        if len(written) == 1:
+            # Staged while the background task is inside flush()
+            loop.call_soon_threadsafe(buffer.stage, "job1", "gate_check", {"status": "complete"})
+
+    loop = asyncio.get_running_loop()
+    buffer._write = write
+    buffer.stage("job1", "gate_check", {"status": "running"})
+    for _ in range(100):
+        if len(written) == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    assert written[1] == {("job1", "gate_check"): {"status": "complete"}}
+    assert buffer.pending() == {}
@@ -1,4 +1,5 @@
 """Tests for sections router."""
+import json
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
 
@@ -48,8 +49,7 @@ def test_get_section_not_found(client, mock_pb):
 
 def test_update_section(client, mock_pb):
     """PUT /api/sections/{job_id}/{key} updates content and locks."""
-    mock_pb.collection().get_first_list_item.side_effect = None
-    mock_pb.collection().get_first_list_item.return_value = _make_section_record()
+    mock_pb.collection().get_full_list.return_value = [_make_section_record()]
     mock_pb.collection().update.return_value = _make_section_record(
         content_md="Updated content", is_locked=True
     )
@@ -65,8 +65,7 @@ def test_update_section(client, mock_pb):
 
 def test_toggle_lock(client, mock_pb):
     """POST /api/sections/{job_id}/{key}/lock toggles lock."""
-    mock_pb.collection().get_first_list_item.side_effect = None
-    mock_pb.collection().get_first_list_item.return_value = _make_section_record()
+    mock_pb.collection().get_full_list.return_value = [_make_section_record()]
     mock_pb.collection().update.return_value = _make_section_record(is_locked=True)
 
     response = client.post(
@@ -80,7 +79,7 @@ def test_toggle_lock(client, mock_pb):
 
 def test_toggle_lock_section_not_found(client, mock_pb):
     """POST lock returns 404 if section doesn't exist."""
-    mock_pb.collection().get_first_list_item.side_effect = Exception("Not found")
+    mock_pb.collection().get_full_list.return_value = []
 
     response = client.post(
         "/api/sections/test_job_id/evidence_cleanup/lock",
@@ -89,6 +88,68 @@ def test_toggle_lock_section_not_found(client, mock_pb):
     assert response.status_code == 404
 
 
+def test_lock_finds_section_created_after_index_was_loaded(client, mock_pb):
+    """A section created by a worker after the API cached the job's ids is still found."""
+    mock_pb.collection().get_full_list.side_effect = [
+        [_make_section_record(id="sec1")],
+        [_make_section_record(id="sec1"), _make_section_record(id="sec2", section_key="gate_check")],
+    ]
+    mock_pb.collection().update.return_value = _make_section_record(is_locked=True)
+
+    assert client.post(
+        "/api/sections/test_job_id/evidence_cleanup/lock", json={"is_locked": True}
+    ).status_code == 200
+    response = client.post("/api/sections/test_job_id/gate_check/lock", json={"is_locked": True})
+
+    assert response.status_code == 200
+    assert mock_pb.collection().update.call_args[0][0] == "sec2"
+
+
+def test_update_section_reresolves_stale_section_id(client, mock_pb):
+    """A cached id whose record was recreated is reloaded instead of surfacing a 500."""
+    from pocketbase.utils import ClientResponseError
+
+    mock_pb.collection().get_full_list.side_effect = [
+        [_make_section_record(id="old")],
+        [_make_section_record(id="new")],
+    ]
+
+    def update(section_id, data):
+        if section_id == "old":
+            raise ClientResponseError("not found", status=404)
+        return _make_section_record(id=section_id, **data)
+
+    mock_pb.collection().update.side_effect = update
+
+    response = client.put("/api/sections/test_job_id/evidence_cleanup", json={"content_md": "Edited"})
+    assert response.status_code == 200
+    assert response.json()["id"] == "new"
+
+    # Deleted for good: a 404, not a 500
+    mock_pb.collection().get_full_list.side_effect = None
+    mock_pb.collection().get_full_list.return_value = []
+    mock_pb.collection().update.side_effect = ClientResponseError("not found", status=404)
+    response = client.post("/api/sections/test_job_id/evidence_cleanup/lock", json={"is_locked": True})
+    assert response.status_code == 404
+
+
+def test_update_section_uses_single_request(client, mock_pb):
+    """Repeated edits reuse the cached section id — one PATCH, no lookup."""
+    mock_pb.collection().get_full_list.return_value = [_make_section_record(id="sec1")]
+    mock_pb.collection().update.return_value = _make_section_record(is_locked=True)
+
+    for _ in range(3):
+        response = client.put(
+            "/api/sections/test_job_id/evidence_cleanup",
+            json={"content_md": "Updated content"},
+        )
+        assert response.status_code == 200
+
+    assert mock_pb.collection().get_full_list.call_count == 1
+    mock_pb.collection().get_first_list_item.assert_not_called()
+    assert mock_pb.collection().update.call_args[0][0] == "sec1"
+
+
 def test_get_section_definitions(client, mock_pb):
     """GET /api/section-definitions returns section definitions."""
     response = client.get("/api/section-definitions")
@@ -102,3 +163,82 @@ def test_get_section_definitions(client, mock_pb):
     assert "order" in first
     assert "depends_on" in first
     assert "phase" in first
+
+
+def test_regenerate_section_cascade_streams_events(client, mock_pb):
+    """?cascade=true streams the section's and its dependents' events as SSE."""
+    from app.models import PipelineEvent
+
+    mock_pb.collection().get_full_list.return_value = [_make_section_record(id="sec1")]
+    seen = {}
+
+    async def fake_cascade(job, key, bypass_cache=False):
+        seen["args"] = (job.id, key, bypass_cache)
+        yield PipelineEvent(section_key=key, status="complete", content_md="# new")
+        yield PipelineEvent(section_key="final_verdict", status="complete", content_md="# verdict")
+
+    with patch("app.routers.sections.run_cascade", fake_cascade):
+        response = client.post(
+            "/api/sections/test_job_id/evidence_cleanup/generate",
+            params={"cascade": "true", "fresh": "true"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[6:]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [e.get("section_key") for e in events[:-1]] == ["evidence_cleanup", "final_verdict"]
+    assert events[-1] == {"done": True}
+    assert seen["args"] == ("test_job_id", "evidence_cleanup", True)
+    # The section itself is unlocked first
+    mock_pb.collection().update.assert_called_once_with("sec1", {"is_locked": False})
+
+
+def test_regenerate_section_cascade_unknown_key(client, mock_pb):
+    response = client.post("/api/sections/test_job_id/nope/generate", params={"cascade": "true"})
+    assert response.status_code == 404
+
+
+def test_regenerate_section_skips_response_cache_by_default(client, mock_pb, tmp_path, monkeypatch):
+    """Regenerating twice with an unchanged prompt calls the provider both times."""
+    from app.config import settings
+    from app.services import llm_service, pipeline_executor
+
+    monkeypatch.setattr(settings, "LLM_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    mock_pb.collection().get_full_list.return_value = [_make_section_record(id="sec1")]
+    mock_pb.collection().get_one.side_effect = lambda record_id, *a, **kw: (
+        _make_job_record() if record_id == "test_job_id" else _make_section_record(id="sec1")
+    )
+    calls = []
+
+    def response(text):
+        chunk = MagicMock()
+        chunk.text = text
+        chunk.usage_metadata.prompt_token_count = 10
+        chunk.usage_metadata.candidates_token_count = 5
+        chunk.usage_metadata.cached_content_input_token_count = 0
+        return chunk
+
+    async def fake_generate(**kwargs):
+        calls.append(kwargs)
+        return response(f"# Output {len(calls)}")
+
+    async def fake_stream(**kwargs):
+        calls.append(kwargs)
+
+        async def chunks():
+            yield response(f"# Output {len(calls)}")
+        return chunks()
+
+    async def section(job, refs, dep_context):
+        return await llm_service.call_llm_async(system="sys", user="same prompt")
+
+    mock_client = MagicMock()
+    mock_client.aio.models.generate_content = fake_generate
+    mock_client.aio.models.generate_content_stream = fake_stream
+    with patch.object(llm_service, "client", mock_client), \
+            patch.dict(pipeline_executor.SECTION_FUNCTIONS, {"evidence_cleanup": section}):
+        for _ in range(2):
+            response_ = client.post("/api/sections/test_job_id/evidence_cleanup/generate")
+            assert response_.status_code == 200
+
+    assert len(calls) == 2
@@ -1,6 +1,9 @@
-"""Tests for database.upsert_section."""
+"""Tests for database.upsert_section and the section id index."""
 from unittest.mock import MagicMock, patch
 
+import pytest
+from pocketbase.utils import ClientResponseError
+
 from tests.conftest import _make_section_record
 
 
@@ -10,7 +13,7 @@ def test_upsert_creates_when_not_found():
     collection = MagicMock()
     mock_pb.collection.return_value = collection
 
-    collection.get_first_list_item.side_effect = Exception("Not found")
+    collection.get_full_list.return_value = []
     collection.create.return_value = _make_section_record()
 
     with patch("app.database.pb", mock_pb):
@@ -34,7 +37,7 @@ def test_upsert_updates_when_found():
     mock_pb.collection.return_value = collection
 
     existing = _make_section_record(id="existing_id")
-    collection.get_first_list_item.return_value = existing
+    collection.get_full_list.return_value = [existing]
     collection.update.return_value = _make_section_record(status="running")
 
     with patch("app.database.pb", mock_pb):
@@ -44,6 +47,7 @@ def test_upsert_updates_when_found():
         })
 
     collection.update.assert_called_once()
+    assert collection.update.call_args[0][0] == "existing_id"
     assert result["status"] == "running"
 
 
@@ -53,7 +57,7 @@ def test_upsert_returns_dict():
     collection = MagicMock()
     mock_pb.collection.return_value = collection
 
-    collection.get_first_list_item.side_effect = Exception("Not found")
+    collection.get_full_list.return_value = []
     collection.create.return_value = _make_section_record()
 
     with patch("app.database.pb", mock_pb):
@@ -64,3 +68,76 @@ def test_upsert_returns_dict():
 
     assert isinstance(result, dict)
     assert "id" in result
+
+
+def test_steady_state_upsert_is_single_update():
+    """After the first lookup, upserts for the job skip the query entirely."""
+    mock_pb = MagicMock()
+    collection = MagicMock()
+    mock_pb.collection.return_value = collection
+
+    collection.get_full_list.return_value = []
+    collection.create.return_value = _make_section_record(id="new_id")
+    collection.update.return_value = _make_section_record(id="new_id")
+
+    with patch("app.database.pb", mock_pb):
+        from app.database import upsert_section
+        upsert_section("job1", "evidence_cleanup", {"status": "running"})
+        upsert_section("job1", "evidence_cleanup", {"status": "complete"})
+        upsert_section("job1", "evidence_cleanup", {"status": "complete"})
+
+    collection.get_full_list.assert_called_once()
+    collection.get_first_list_item.assert_not_called()
+    assert collection.update.call_count == 2
+    assert collection.update.call_args[0][0] == "new_id"
+
+
+def test_stale_index_is_reloaded_and_retried():
+    """A 404 on update invalidates the job's ids and retries once."""
+    mock_pb = MagicMock()
+    collection = MagicMock()
+    mock_pb.collection.return_value = collection
+
+    collection.get_full_list.side_effect = [
+        [_make_section_record(id="deleted_id")],
+        [],
+    ]
+    collection.update.side_effect = ClientResponseError("gone", status=404)
+    collection.create.return_value = _make_section_record(id="fresh_id")
+
+    with patch("app.database.pb", mock_pb):
+        from app.database import upsert_section
+        upsert_section("job1", "evidence_cleanup", {"status": "running"})
+
+    assert collection.get_full_list.call_count == 2
+    collection.create.assert_called_once()
+
+
+def test_upsert_propagates_other_errors():
+    mock_pb = MagicMock()
+    collection = MagicMock()
+    mock_pb.collection.return_value = collection
+
+    collection.get_full_list.return_value = []
+    collection.create.side_effect = ClientResponseError("server error", status=500)
+
+    with patch("app.database.pb", mock_pb):
+        from app.database import upsert_section
+        with pytest.raises(ClientResponseError):
+            upsert_section("job1", "evidence_cleanup", {"status": "running"})
+
+
+def test_index_invalidate_forces_reload():
+    mock_pb = MagicMock()
+    collection = MagicMock()
+    mock_pb.collection.return_value = collection
+    collection.get_full_list.return_value = [_make_section_record(id="sec1")]
+
+    with patch("app.database.pb", mock_pb):
+        from app.database import section_ids
+        assert section_ids.get("job1", "evidence_cleanup") == "sec1"
+        assert section_ids.get("job1", "gate_check") is None
+        section_ids.invalidate("job1")
+        section_ids.get("job1", "evidence_cleanup")
+
+    assert collection.get_full_list.call_count == 2
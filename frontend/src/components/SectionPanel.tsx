@@ -21,6 +21,8 @@ interface SectionPanelProps {
   jobId: string;
   onUpdate: () => void;
   defaultExpanded?: boolean;
+  /** Output streamed so far while the section is generating. */
+  streamingContent?: string;
 }
 
 const STATUS_DOT: Record<string, string> = {
@@ -28,6 +30,7 @@ const STATUS_DOT: Record<string, string> = {
   running: "bg-teal animate-pulse",
   complete: "bg-sage",
   failed: "bg-error",
+  skipped: "bg-border-medium",
 };
 
 export default function SectionPanel({
@@ -36,6 +39,7 @@ export default function SectionPanel({
   jobId,
   onUpdate,
   defaultExpanded = true,
+  streamingContent,
 }: SectionPanelProps) {
   const [editing, setEditing] = useState(false);
   const [viewRaw, setViewRaw] = useState(false);
@@ -157,11 +161,22 @@ export default function SectionPanel({
         <p className="text-sm text-error">{section.error_message}</p>
       )}
 
-      {status === "running" && (
-        <p className="text-sm text-text-secondary animate-pulse">Generating...</p>
+      {status === "skipped" && section?.error_message && (
+        <p className="text-sm text-text-secondary">{section.error_message}</p>
       )}
 
-      {status === "pending" && (
+      {streamingContent ? (
+        <pre className="whitespace-pre-wrap font-sans text-sm text-text-body">
+          {streamingContent}
+          <span className="animate-pulse">▍</span>
+        </pre>
+      ) : (
+        status === "running" && (
+          <p className="text-sm text-text-secondary animate-pulse">Generating...</p>
+        )
+      )}
+
+      {status === "pending" && !streamingContent && (
         <p className="text-sm text-text-secondary">Not yet generated</p>
       )}
 
@@ -4,6 +4,8 @@ import { startPipelineSSE } from "../lib/api";
 
 interface UseSSEReturn {
   statuses: Record<string, SectionStatus>;
+  /** Partial output of sections that are still streaming. */
+  partial: Record<string, string>;
   running: boolean;
   error: string | null;
   start: (jobId: string, phase: "analyze" | "cover-letter") => void;
@@ -12,6 +14,7 @@ interface UseSSEReturn {
 
 export function useSSE(): UseSSEReturn {
   const [statuses, setStatuses] = useState<Record<string, SectionStatus>>({});
+  const [partial, setPartial] = useState<Record<string, string>>({});
   const [running, setRunning] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const controllerRef = useRef<AbortController | null>(null);
@@ -26,6 +29,7 @@ export function useSSE(): UseSSEReturn {
     (jobId: string, phase: "analyze" | "cover-letter") => {
       stop();
       setStatuses({});
+      setPartial({});
       setError(null);
       setRunning(true);
 
@@ -34,6 +38,21 @@ export function useSSE(): UseSSEReturn {
         phase,
         (data) => {
           const event = data as PipelineEvent;
+          if (event.status === "delta") {
+            setPartial((prev) => ({
+              ...prev,
+              [event.section_key]:
+                (prev[event.section_key] || "") + (event.content_md || ""),
+            }));
+            return;
+          }
+          // Any other event ends (or restarts) the section's partial output
+          setPartial((prev) => {
+            if (!(event.section_key in prev)) return prev;
+            const next = { ...prev };
+            delete next[event.section_key];
+            return next;
+          });
           setStatuses((prev) => ({
             ...prev,
             [event.section_key]: event.status,
@@ -51,5 +70,5 @@ export function useSSE(): UseSSEReturn {
     [stop],
   );
 
-  return { statuses, running, error, start, stop };
+  return { statuses, partial, running, error, start, stop };
 }
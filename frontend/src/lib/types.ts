@@ -56,7 +56,7 @@ export interface JobDetail extends Job {
 
 // ── Sections ────────────────────────────────────────────────────
 
-export type SectionStatus = "pending" | "running" | "complete" | "failed";
+export type SectionStatus = "pending" | "running" | "complete" | "failed" | "skipped";
 
 export interface Section {
   id: string;
@@ -86,7 +86,7 @@ export interface SectionDefinition {
 
 export interface PipelineEvent {
   section_key: string;
-  status: SectionStatus;
+  status: SectionStatus | "delta";
   content_md?: string;
   error_message?: string;
 }
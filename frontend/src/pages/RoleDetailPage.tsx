@@ -196,6 +196,7 @@ export default function RoleDetailPage() {
                   jobId={id!}
                   onUpdate={refresh}
                   defaultExpanded={!MINIMIZED_KEYS.has(d.key)}
+                  streamingContent={sse.partial[d.key]}
                 />
               ))}
 
@@ -209,6 +210,7 @@ export default function RoleDetailPage() {
                     jobId={id!}
                     onUpdate={refresh}
                     defaultExpanded={true}
+                    streamingContent={sse.partial[d.key]}
                   />
                 ))}
 
@@ -0,0 +1,15 @@
+/// <reference path="../pb_data/types.d.ts" />
+migrate((app) => {
+  // Enable the batch API so section writes can be flushed in one request
+  const settings = app.settings()
+  settings.batch.enabled = true
+  settings.batch.maxRequests = 100
+  settings.batch.timeout = 10
+
+  return app.save(settings)
+}, (app) => {
+  const settings = app.settings()
+  settings.batch.enabled = false
+
+  return app.save(settings)
+})
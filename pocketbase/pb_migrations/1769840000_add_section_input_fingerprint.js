@@ -0,0 +1,26 @@
+/// <reference path="../pb_data/types.d.ts" />
+migrate((app) => {
+  // Hash of the inputs a section was generated from (incremental pipeline runs)
+  const sections = app.findCollectionByNameOrId("sections")
+  sections.fields.add(new Field({
+    "autogeneratePattern": "",
+    "hidden": false,
+    "id": "text_input_fingerprint",
+    "max": 0,
+    "min": 0,
+    "name": "input_fingerprint",
+    "pattern": "",
+    "presentable": false,
+    "primaryKey": false,
+    "required": false,
+    "system": false,
+    "type": "text"
+  }))
+
+  return app.save(sections)
+}, (app) => {
+  const sections = app.findCollectionByNameOrId("sections")
+  sections.fields.removeById("text_input_fingerprint")
+
+  return app.save(sections)
+})
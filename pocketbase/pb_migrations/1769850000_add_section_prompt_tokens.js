@@ -0,0 +1,24 @@
+/// <reference path="../pb_data/types.d.ts" />
+migrate((app) => {
+  // Input tokens of the LLM call that generated a section (prompt budgeting)
+  const sections = app.findCollectionByNameOrId("sections")
+  sections.fields.add(new Field({
+    "hidden": false,
+    "id": "number_prompt_tokens",
+    "max": null,
+    "min": null,
+    "name": "prompt_tokens",
+    "onlyInt": true,
+    "presentable": false,
+    "required": false,
+    "system": false,
+    "type": "number"
+  }))
+
+  return app.save(sections)
+}, (app) => {
+  const sections = app.findCollectionByNameOrId("sections")
+  sections.fields.removeById("number_prompt_tokens")
+
+  return app.save(sections)
+})
@@ -36,6 +36,9 @@ fi
 echo "Rotating logs..."
 rotate_logs "pocketbase"
 rotate_logs "backend"
+for log in "$LOGDIR"/worker-*-current.log; do
+  [ -f "$log" ] && rotate_logs "$(basename "$log" -current.log)"
+done
 echo "Logs rotated (keeping 3 most recent per service)"
 echo ""
 
@@ -28,6 +28,15 @@ cd "$DIR/backend"
 python3 -m uvicorn app.main:app --reload --port 8000 2>&1 | tee "$LOGDIR/backend-current.log" &
 echo "backend=$!" >> "$PIDFILE"
 
+# ── Pipeline workers ──────────────────────────────────────────────
+WORKERS="${PIPELINE_WORKER_PROCESSES:-2}"
+echo "Starting $WORKERS pipeline worker(s)..."
+cd "$DIR/backend"
+for i in $(seq 1 "$WORKERS"); do
+  python3 -m app.worker 2>&1 | tee "$LOGDIR/worker-$i-current.log" &
+  echo "worker$i=$!" >> "$PIDFILE"
+done
+
 # ── Frontend ──────────────────────────────────────────────────────
 echo "Starting frontend..."
 cd "$DIR/frontend"